@@ -1,8 +1,8 @@
 from fastapi import APIRouter
 
-from .events import event_router
+from . import events
 
 event_router = APIRouter()
-event_router.include_router(event_router, tags=["events"])
+event_router.include_router(events.event_router, tags=["events"])
 
 __all__ = ["event_router"]
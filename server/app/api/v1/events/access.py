@@ -0,0 +1,94 @@
+import uuid
+from typing import Any, Sequence, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, literal
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.schema import Event, UserEventLink
+
+# (event_id, user_id) pairs a session has already seen in user_event_link;
+# sessions live for one request, so does the memo
+MEMBERSHIPS_KEY = "event_memberships"
+
+
+def _memberships(session: AsyncSession) -> Set[Tuple[uuid.UUID, uuid.UUID]]:
+    return session.info.setdefault(MEMBERSHIPS_KEY, set())
+
+
+def remember_member(event_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession) -> None:
+    _memberships(session).add((event_id, user_id))
+
+
+def forget_event(event_id: uuid.UUID, session: AsyncSession) -> None:
+    memberships = _memberships(session)
+    memberships.difference_update({key for key in memberships if key[0] == event_id})
+
+
+def is_known_member(event_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession) -> bool:
+    return (event_id, user_id) in _memberships(session)
+
+
+def is_member(event_id: Any, user_id: uuid.UUID):
+    """``EXISTS`` clause for the user's link to ``event_id``, which may be
+    a value or a column of the enclosing statement."""
+    return exists().where(
+        UserEventLink.event_id == event_id, UserEventLink.user_id == user_id
+    )
+
+
+def access_denied() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Event not found or access denied",
+    )
+
+
+async def ensure_event_member(
+    event_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession
+) -> None:
+    if is_known_member(event_id, user_id, session):
+        return
+    result = await session.exec(select(literal(True)).where(is_member(event_id, user_id)))
+    if result.first() is None:
+        raise access_denied()
+    remember_member(event_id, user_id, session)
+
+
+async def fetch_event(
+    event_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession, *columns: Any
+) -> Any:
+    """The event, or the given columns of it, in the same statement that
+    checks the user's access."""
+    stmt = (
+        select(*(columns or (Event,)))
+        .join(UserEventLink, UserEventLink.event_id == Event.id)
+        .where(UserEventLink.user_id == user_id, Event.id == event_id)
+    )
+    result = await session.exec(stmt)
+    row = result.first()
+    if row is None:
+        raise access_denied()
+    remember_member(event_id, user_id, session)
+    return row
+
+
+async def fetch_scoped(
+    stmt: Any, event_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession
+) -> Sequence[Any]:
+    """Rows of ``stmt``, a query over one event's resources, for members only.
+
+    The membership check rides along as an ``EXISTS`` in the same
+    statement; only an empty result needs a second look to tell "nothing
+    there" from "no access".
+    """
+    if is_known_member(event_id, user_id, session):
+        return (await session.exec(stmt)).all()
+
+    rows = (await session.exec(stmt.where(is_member(event_id, user_id)))).all()
+    if rows:
+        remember_member(event_id, user_id, session)
+    else:
+        await ensure_event_member(event_id, user_id, session)
+    return rows
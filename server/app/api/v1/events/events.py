@@ -1,6 +1,18 @@
 import uuid
+from datetime import datetime
+from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    WebSocket,
+    WebSocketException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.v1.events.models import (
@@ -9,42 +21,159 @@ from app.api.v1.events.models import (
     delete_event_by_user,
     create_event_by_user,
     update_event_by_user,
+    get_event_document_by_user,
+    get_tables_by_event as get_tables_by_event_id,
+)
+from app.api.v1.events.access import access_denied, ensure_event_member
+from app.api.v1.events.live import live_sessions
+from app.api.v1.events.versions import get_layout_version
+from app.api.v1.tables.model import (
+    get_nearest_tables,
+    get_tables_within_radius,
+    save_layout_by_event,
 )
+from app.config.settings import settings
 from app.cors.dependencies.base import (
+    CurrentUser,
+    decode_firebase_token,
     get_current_user,
+    get_read_session,
+)
+from app.cors.etag import cache_headers, expected_version, not_modified, version_etag
+from app.cors.pagination import PageParams, page_params, set_next_cursor
+from app.cors.responses import dump_trusted, negotiated, negotiated_json, wants_msgpack
+from app.db import async_session, get_session
+from app.schemas.request import (
+    MAX_CANVAS_SIZE,
+    CreateEventRequest,
+    SaveLayoutRequest,
+    UpdateEventRequest,
+)
+from app.schemas.response import (
+    EventResponse,
+    FullEventResponse,
+    TableDistanceResponse,
+    TableResponse,
 )
-from app.db import get_session
-from app.schemas.request import CreateEventRequest, UpdateEventRequest
-from app.schemas.response import EventResponse
-from app.schemas.schema import User
 
 event_router = APIRouter()
 
 
-@event_router.get("/", response_model=EventResponse)
+def _layout_etag(request: Request, version: int) -> str:
+    return version_etag(version, "msgpack" if wants_msgpack(request) else None)
+
+
+@event_router.get("/", response_model=List[EventResponse])
 async def get_events(
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    title: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    page: PageParams = Depends(page_params()),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    return await get_all_events_by_user(current_user.id, session)
+    events, next_cursor = await get_all_events_by_user(
+        current_user.id, page, session, title, created_after, created_before
+    )
+    response = negotiated(request, dump_trusted(events, EventResponse))
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 @event_router.get("/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    return await get_event_by_user(current_user.id, event_id, session)
+    version = await get_layout_version(current_user.id, event_id, session)
+    etag = _layout_etag(request, version)
+    if cached := not_modified(request, etag):
+        return cached
+    event = await get_event_by_user(
+        current_user.id, event_id, session, layout_version=version
+    )
+    return negotiated(
+        request, dump_trusted([event], EventResponse)[0], headers=cache_headers(etag)
+    )
 
 
-@event_router.get("/{event_id}/tables", response_model=EventResponse)
+@event_router.get(
+    "/{event_id}/full",
+    response_class=Response,
+    responses={200: {"model": FullEventResponse}},
+)
+async def get_event_full(
+    event_id: uuid.UUID,
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    etag = _layout_etag(
+        request, await get_layout_version(current_user.id, event_id, session)
+    )
+    if cached := not_modified(request, etag):
+        return cached
+    # Postgres builds the JSON; it is sent as is, without a model pass
+    document = await get_event_document_by_user(current_user.id, event_id, session)
+    return negotiated_json(request, document, headers=cache_headers(etag))
+
+
+@event_router.get("/{event_id}/tables", response_model=List[TableResponse])
 async def get_tables_by_event(
     event_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    name: str | None = None,
+    shape: str | None = None,
+    # a whole floor plan usually fits in one page
+    page: PageParams = Depends(page_params(settings.MAX_PAGE_SIZE)),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    return await get_tables_by_event(event_id, current_user.id, session)
+    version = await get_layout_version(current_user.id, event_id, session)
+    etag = _layout_etag(request, version)
+    if cached := not_modified(request, etag):
+        return cached
+    tables, next_cursor = await get_tables_by_event_id(
+        event_id, current_user.id, page, session, name, shape, layout_version=version
+    )
+    response = negotiated(
+        request, dump_trusted(tables, TableResponse), headers=cache_headers(etag)
+    )
+    set_next_cursor(response, next_cursor)
+    return response
+
+
+@event_router.get(
+    "/{event_id}/tables/nearby", response_model=List[TableDistanceResponse]
+)
+async def get_tables_nearby(
+    event_id: uuid.UUID,
+    x: float = Query(ge=-MAX_CANVAS_SIZE, le=MAX_CANVAS_SIZE, allow_inf_nan=False),
+    y: float = Query(ge=-MAX_CANVAS_SIZE, le=MAX_CANVAS_SIZE, allow_inf_nan=False),
+    radius: float = Query(gt=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await get_tables_within_radius(
+        event_id, x, y, radius, current_user.id, session
+    )
+
+
+@event_router.get(
+    "/{event_id}/tables/nearest", response_model=List[TableDistanceResponse]
+)
+async def get_tables_nearest(
+    event_id: uuid.UUID,
+    x: float = Query(ge=-MAX_CANVAS_SIZE, le=MAX_CANVAS_SIZE, allow_inf_nan=False),
+    y: float = Query(ge=-MAX_CANVAS_SIZE, le=MAX_CANVAS_SIZE, allow_inf_nan=False),
+    k: int = Query(default=1, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await get_nearest_tables(event_id, x, y, k, current_user.id, session)
 
 
 @event_router.post(
@@ -52,7 +181,7 @@ async def get_tables_by_event(
 )
 async def create_event(
     payload: CreateEventRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     return await create_event_by_user(payload, current_user.id, session)
@@ -61,7 +190,7 @@ async def create_event(
 @event_router.delete("/", response_model=EventResponse)
 async def delete_event(
     event_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     return await delete_event_by_user(event_id, current_user.id, session)
@@ -72,7 +201,53 @@ async def delete_event(
 )
 async def update_event(
     payload: UpdateEventRequest,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    event = await update_event_by_user(
+        payload, current_user.id, session, expected_version(request)
+    )
+    response.headers["ETag"] = version_etag(event.layout_version)
+    return event
+
+
+@event_router.put("/{event_id}/layout", response_model=List[TableResponse])
+async def save_layout(
+    event_id: uuid.UUID,
+    payload: SaveLayoutRequest,
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    return await update_event_by_user(payload, current_user.id, session)
+    tables, version = await save_layout_by_event(
+        event_id, payload, current_user.id, session, expected_version(request)
+    )
+    return negotiated(
+        request,
+        dump_trusted(tables, TableResponse),
+        headers={"ETag": _layout_etag(request, version)},
+    )
+
+
+@event_router.websocket("/{event_id}/live")
+async def live_layout(websocket: WebSocket, event_id: uuid.UUID, token: str):
+    # browsers can not set headers on websockets, so the ID token comes
+    # in the query string
+    async with async_session() as session:
+        try:
+            claims = await decode_firebase_token(token)
+        except HTTPException as e:
+            raise WebSocketException(status.WS_1008_POLICY_VIOLATION, e.detail)
+
+        current_user = await get_current_user(claims, session)
+        try:
+            if current_user is None:
+                raise access_denied()
+            await ensure_event_member(event_id, current_user.id, session)
+        except HTTPException as e:
+            raise WebSocketException(status.WS_1008_POLICY_VIOLATION, e.detail)
+
+    await websocket.accept()
+    await live_sessions.serve(event_id, websocket)
@@ -0,0 +1,506 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Literal, Set, Tuple
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.api.v1.events.versions import bump_layout_version, invalidate_event
+from app.api.v1.tables.model import build_spatial_index, spatial_indexes
+from app.api.v1.tables.seats import regenerate_seats
+from app.api.v1.tables.spatial import table_outline
+from app.config.settings import settings
+from app.cors.response_cache import CacheBackendError, RedisBackend, response_cache
+from app.db import async_session
+from app.schemas.request import MAX_CANVAS_SIZE, MAX_TABLE_SEATS
+from app.schemas.schema import Event, Guest, Seat, Table
+
+logger = logging.getLogger(__name__)
+
+EntityKey = Tuple[str, uuid.UUID]
+
+GEOMETRY_FIELDS = ("shape", "x", "y", "width", "height")
+# fields that move a table's chairs
+SEAT_LAYOUT_FIELDS = (*GEOMETRY_FIELDS, "seats")
+# how long another worker can take a live write for its own
+SHARED_VERSION_TTL = 60
+
+
+class LiveTableUpdate(BaseModel):
+    type: Literal["table"]
+    id: uuid.UUID
+    name: str | None = None
+    shape: str | None = None
+    seats: int | None = Field(default=None, ge=0, le=MAX_TABLE_SEATS)
+    x: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    y: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    width: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    height: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+
+
+class LiveSeatUpdate(BaseModel):
+    type: Literal["seat"]
+    id: uuid.UUID
+    x: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    y: float | None = Field(default=None, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    guest_id: uuid.UUID | None = None
+
+
+LiveUpdate = TypeAdapter(LiveTableUpdate | LiveSeatUpdate)
+
+
+class LiveConnection:
+    """One client of a live layout session.
+
+    Outgoing diffs are merged into a single pending dict instead of being
+    queued, so a slow or idle client holds at most one entry per changed
+    table or seat.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._outbox: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._reload: int | None = None
+        self._ready = asyncio.Event()
+
+    def push(self, kind: str, entity_id: str, fields: Dict[str, Any]) -> None:
+        self._outbox.setdefault(kind, {}).setdefault(entity_id, {}).update(fields)
+        self._ready.set()
+
+    def reload(self, layout_version: int) -> None:
+        """Tells the client to fetch the layout again; pending diffs were
+        made against the old one."""
+        self._outbox = {}
+        self._reload = layout_version
+        self._ready.set()
+
+    async def send_forever(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._reload is not None:
+                version, self._reload = self._reload, None
+                await self.websocket.send_json({"type": "reload", "layout_version": version})
+            diff, self._outbox = self._outbox, {}
+            if diff:
+                await self.websocket.send_json({"type": "diff", **diff})
+
+
+class LayoutSession:
+    """Coalesces live edits of one event's layout.
+
+    Updates are merged per table/seat, broadcast to the other clients
+    every ``broadcast_interval`` and written to Postgres in batches every
+    ``persist_interval``. Table moves are checked against a spatial index
+    of the event before they are accepted.
+
+    Writes expect the layout version the session loaded. When another
+    writer got in between, the pending edits are dropped, the layout is
+    loaded again and the clients are told to reload.
+
+    With ``shared`` set, the sessions of the event on every server worker
+    publish their diffs, writes and reloads on ``live:{event_id}`` and
+    relay each other's to their own clients. A write of another worker's
+    session moves the expected version on instead of forcing a reload.
+    """
+
+    def __init__(
+        self,
+        event_id: uuid.UUID,
+        broadcast_interval: float,
+        persist_interval: float,
+        shared: RedisBackend | None = None,
+    ):
+        self.event_id = event_id
+        self.broadcast_interval = broadcast_interval
+        self.persist_interval = persist_interval
+        self.shared = shared
+        self.sender = uuid.uuid4().hex
+        self.connections: Set[LiveConnection] = set()
+        self._broadcast: Dict[EntityKey, Tuple[Dict[str, Any], LiveConnection]] = {}
+        self._persist: Dict[EntityKey, Dict[str, Any]] = {}
+        self._geometry: Dict[uuid.UUID, Dict[str, Any]] = {}
+        self.guests: Set[uuid.UUID] = set()
+        self.version: int | None = None
+        self.grid = None
+        self.ready = asyncio.create_task(self._load())
+        self._tasks = [
+            asyncio.create_task(self._broadcast_loop()),
+            asyncio.create_task(self._persist_loop()),
+        ]
+        if shared is not None:
+            self._tasks.append(asyncio.create_task(self._listen_loop()))
+
+    @property
+    def channel(self) -> str:
+        return f"live:{self.event_id}"
+
+    @property
+    def version_key(self) -> str:
+        return f"live-version:{self.event_id}"
+
+    async def _load(self) -> None:
+        await self._load_geometry()
+        await self.load_guests()
+
+    async def load_guests(self) -> None:
+        async with async_session() as session:
+            result = await session.exec(
+                select(Guest.id).where(Guest.event_id == self.event_id)
+            )
+            self.guests = set(result.scalars().all())
+
+    async def _load_geometry(self) -> None:
+        async with async_session() as session:
+            # read first: a write after it makes the next flush conflict
+            version = (
+                await session.exec(
+                    select(Event.layout_version).where(Event.id == self.event_id)
+                )
+            ).scalar_one()
+            result = await session.exec(
+                select(Table).where(Table.event_id == self.event_id)
+            )
+            tables = list(result.scalars().all())
+        self._geometry = {
+            table.id: {field: getattr(table, field) for field in SEAT_LAYOUT_FIELDS}
+            for table in tables
+        }
+        self.grid = build_spatial_index(tables)
+        self.version = version
+
+    def check_table(self, update_: LiveTableUpdate) -> str | None:
+        """Moves the table in the index, or explains why it can not move."""
+        fields = update_.model_dump(include=set(SEAT_LAYOUT_FIELDS), exclude_unset=True)
+        if not fields:
+            return None
+        current = self._geometry[update_.id]
+        geometry = {**current, **fields}
+        if not fields.keys().isdisjoint(GEOMETRY_FIELDS):
+            outline = table_outline(*(geometry[field] for field in GEOMETRY_FIELDS))
+            overlapping = self.grid.overlapping(outline, exclude=update_.id)
+            if overlapping:
+                return f"Table overlaps {', '.join(str(key) for key in overlapping)}"
+        self._place(update_.id, fields)
+        return None
+
+    def _place(self, table_id: uuid.UUID, fields: Dict[str, Any]) -> None:
+        geometry = {**self._geometry[table_id], **fields}
+        if not fields.keys().isdisjoint(GEOMETRY_FIELDS):
+            outline = table_outline(*(geometry[field] for field in GEOMETRY_FIELDS))
+            self.grid.move(table_id, outline)
+        self._geometry[table_id] = geometry
+
+    def apply(
+        self, update_: LiveTableUpdate | LiveSeatUpdate, origin: LiveConnection
+    ) -> str | None:
+        fields = update_.model_dump(exclude={"type", "id"}, exclude_unset=True)
+        if not fields:
+            return None
+        if update_.type == "table":
+            # seats are scoped to the event when they are written
+            if update_.id not in self._geometry:
+                return "Unknown table"
+            error = self.check_table(update_)
+            if error is not None:
+                return error
+        elif update_.guest_id is not None and update_.guest_id not in self.guests:
+            return "Unknown guest"
+        key = (update_.type, update_.id)
+        pending, _ = self._broadcast.get(key, ({}, origin))
+        pending.update(fields)
+        self._broadcast[key] = (pending, origin)
+        self._persist.setdefault(key, {}).update(fields)
+        return None
+
+    def flush_broadcast(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Pushes the pending diffs to the clients and returns them."""
+        pending, self._broadcast = self._broadcast, {}
+        diff = []
+        for (kind, entity_id), (fields, origin) in pending.items():
+            payload = {
+                k: str(v) if isinstance(v, uuid.UUID) else v for k, v in fields.items()
+            }
+            for connection in self.connections:
+                if connection is not origin:
+                    connection.push(f"{kind}s", str(entity_id), payload)
+            diff.append((kind, str(entity_id), payload))
+        return diff
+
+    async def flush_persist(self) -> None:
+        pending, self._persist = self._persist, {}
+        if not pending:
+            return
+        try:
+            try:
+                await self._write(pending)
+            except IntegrityError:
+                await self._write_each(pending)
+        except Exception as e:
+            conflict = (
+                isinstance(e, HTTPException)
+                and e.status_code == status.HTTP_412_PRECONDITION_FAILED
+            )
+            if conflict and not await self._caught_up():
+                await self._reload(len(pending))
+                await self._publish({"type": "reload"})
+                return
+            # clients have seen these edits; keep them for the next flush,
+            # under any newer edits of the same fields
+            for key, fields in pending.items():
+                self._persist[key] = {**fields, **self._persist.get(key, {})}
+            if not conflict:
+                raise
+
+    async def _write_each(self, pending: Dict[EntityKey, Dict[str, Any]]) -> None:
+        """Writes the edits one transaction each and drops those the database
+        rejects, so one bad edit does not hold back the rest of the event.
+        Written and dropped edits are removed from ``pending``."""
+        for key in list(pending):
+            try:
+                await self._write({key: pending[key]})
+            except IntegrityError:
+                logger.warning(
+                    "Dropped live edit of %s %s in event %s", *key, self.event_id, exc_info=True
+                )
+            del pending[key]
+
+    async def _write(self, pending: Dict[EntityKey, Dict[str, Any]]) -> None:
+        # executemany needs one parameter shape per statement
+        batches: Dict[Tuple[str, Tuple[str, ...]], list] = {}
+        for (kind, entity_id), fields in pending.items():
+            columns = tuple(sorted(fields))
+            params = {f"b_{column}": fields[column] for column in columns}
+            batches.setdefault((kind, columns), []).append({"b_id": entity_id, **params})
+
+        tables, seats = Table.__table__, Seat.__table__
+        event_tables = select(tables.c.id).where(tables.c.event_id == self.event_id)
+        async with async_session() as session:
+            for (kind, columns), params in batches.items():
+                target = tables if kind == "table" else seats
+                stmt = update(target).values(
+                    {column: bindparam(f"b_{column}") for column in columns}
+                )
+                if kind == "table":
+                    stmt = stmt.where(
+                        tables.c.id == bindparam("b_id"),
+                        tables.c.event_id == self.event_id,
+                    )
+                else:
+                    stmt = stmt.where(
+                        seats.c.id == bindparam("b_id"),
+                        seats.c.table_id.in_(event_tables),
+                    )
+                await session.exec(stmt, params=params)
+            moved = [
+                entity_id
+                for (kind, entity_id), fields in pending.items()
+                if kind == "table"
+                and entity_id in self._geometry
+                and not fields.keys().isdisjoint(SEAT_LAYOUT_FIELDS)
+            ]
+            if moved:
+                # a layout save may have deleted some of them meanwhile; the
+                # lock keeps the rest until the new seats are in
+                result = await session.exec(
+                    select(tables.c.id)
+                    .where(tables.c.id.in_(moved), tables.c.event_id == self.event_id)
+                    .with_for_update()
+                )
+                existing = set(result.scalars().all())
+                await regenerate_seats(
+                    [
+                        Table(id=entity_id, **self._geometry[entity_id])
+                        for entity_id in moved
+                        if entity_id in existing
+                    ],
+                    session,
+                )
+            expected = self.version
+            version = await bump_layout_version(self.event_id, session, expected)
+            if self.shared is not None:
+                # before the commit: a worker waiting on the row lock finds it
+                written = f"{expected}:{version}".encode()
+                await self._share(
+                    self.shared.set, self.version_key, written, SHARED_VERSION_TTL
+                )
+            await session.commit()
+            self.version = version
+            await invalidate_event(self.event_id, session)
+        spatial_indexes.pop(self.event_id)
+        await self._publish({"type": "written", "from": expected, "to": version})
+
+    async def _caught_up(self) -> bool:
+        """Takes over the version another worker's session wrote on top of
+        this session's, so its edits are written next time instead of
+        dropped: the other session's diffs were relayed here."""
+        if self.shared is None:
+            return False
+        value = await self._share(self.shared.get_many, [self.version_key])
+        if not value or value[0] is None:
+            return False
+        written_from, written_to = (int(part) for part in value[0].split(b":"))
+        if written_from != self.version:
+            return False
+        self.version = written_to
+        return True
+
+    async def _share(self, command, *args: Any) -> Any:
+        try:
+            return await command(*args)
+        except CacheBackendError:
+            logger.warning(
+                "Could not share live edits of event %s", self.event_id, exc_info=True
+            )
+            return None
+
+    async def _publish(self, message: Dict[str, Any]) -> None:
+        if self.shared is not None:
+            payload = json.dumps({"sender": self.sender, **message}).encode()
+            await self._share(self.shared.publish, self.channel, payload)
+
+    async def relay(self, message: Dict[str, Any]) -> None:
+        """Applies a message of another worker's session of the event."""
+        if message["type"] == "diff":
+            for kind, entity_id, fields in message["diff"]:
+                table_id = uuid.UUID(entity_id)
+                if kind == "table" and table_id in self._geometry:
+                    layout = {k: v for k, v in fields.items() if k in SEAT_LAYOUT_FIELDS}
+                    self._place(table_id, layout)
+                for connection in self.connections:
+                    connection.push(f"{kind}s", entity_id, fields)
+        elif message["type"] == "written":
+            # a gap means someone else wrote too; the next write finds out
+            if message["from"] == self.version:
+                self.version = message["to"]
+            spatial_indexes.pop(self.event_id)
+        elif message["type"] == "reload":
+            await self._reload(len(self._persist))
+
+    async def _reload(self, dropped: int) -> None:
+        logger.warning(
+            "Layout of event %s was changed elsewhere, dropped %d live edits",
+            self.event_id,
+            dropped,
+        )
+        await self._load()
+        # edits made meanwhile were checked against the old layout too
+        self._broadcast.clear()
+        self._persist.clear()
+        for connection in self.connections:
+            connection.reload(self.version)
+
+    async def _broadcast_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.broadcast_interval)
+            await self.broadcast()
+
+    async def broadcast(self) -> None:
+        diff = self.flush_broadcast()
+        if diff:
+            await self._publish({"type": "diff", "diff": diff})
+
+    async def _listen_loop(self) -> None:
+        while True:
+            try:
+                async for payload in self.shared.listen(self.channel):
+                    message = json.loads(payload)
+                    if message["sender"] != self.sender:
+                        await self.relay(message)
+            except CacheBackendError:
+                # what was published meanwhile is lost; a missed write
+                # shows up as a version conflict on the next flush
+                logger.warning(
+                    "Lost the live channel of event %s, resubscribing", self.event_id
+                )
+            await asyncio.sleep(self.persist_interval)
+
+    async def _persist_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            try:
+                await self.flush_persist()
+            except Exception:
+                logger.exception(
+                    "Could not save live edits of event %s, retrying", self.event_id
+                )
+
+    async def close(self) -> None:
+        self.ready.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(self.ready, *self._tasks, return_exceptions=True)
+        try:
+            await self.flush_persist()
+        except Exception:
+            logger.exception(
+                "Dropped %d live edits of event %s on close",
+                len(self._persist),
+                self.event_id,
+            )
+
+
+class LiveSessionManager:
+    def __init__(self):
+        self.sessions: Dict[uuid.UUID, LayoutSession] = {}
+
+    async def serve(self, event_id: uuid.UUID, websocket: WebSocket) -> None:
+        session = self.sessions.get(event_id)
+        if session is None:
+            backend = response_cache.backend
+            session = LayoutSession(
+                event_id,
+                broadcast_interval=settings.LIVE_BROADCAST_INTERVAL,
+                persist_interval=settings.LIVE_PERSIST_INTERVAL,
+                shared=backend if isinstance(backend, RedisBackend) else None,
+            )
+            self.sessions[event_id] = session
+
+        connection = LiveConnection(websocket)
+        session.connections.add(connection)
+        sender = asyncio.create_task(connection.send_forever())
+        try:
+            await asyncio.shield(session.ready)
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    update_ = LiveUpdate.validate_json(message)
+                except ValidationError as e:
+                    await websocket.send_json(
+                        {"type": "error", "detail": e.errors(include_url=False, include_context=False)}
+                    )
+                    continue
+                if (
+                    update_.type == "seat"
+                    and update_.guest_id is not None
+                    and update_.guest_id not in session.guests
+                ):
+                    # the guest may have been added since the session started
+                    await session.load_guests()
+                error = session.apply(update_, connection)
+                if error is not None:
+                    await websocket.send_json(
+                        {"type": "error", "id": str(update_.id), "detail": error}
+                    )
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            session.connections.discard(connection)
+            if not session.connections:
+                if self.sessions.get(event_id) is session:
+                    del self.sessions[event_id]
+                await session.close()
+
+    async def close(self) -> None:
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+
+live_sessions = LiveSessionManager()
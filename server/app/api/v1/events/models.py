@@ -1,70 +1,190 @@
+import itertools
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy import Text, case, cast, func, literal_column, null, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select, and_
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.api.v1.events.access import (
+    access_denied,
+    ensure_event_member,
+    fetch_event,
+    fetch_scoped,
+    forget_event,
+    is_member,
+    remember_member,
+)
+from app.api.v1.events.versions import (
+    event_cache_tags,
+    invalidate_event,
+)
+from app.cors.pagination import (
+    CREATED_CURSOR,
+    PageParams,
+    created_key,
+    decode_cursor,
+    keyset,
+    page_of,
+)
+from app.cors.response_cache import event_tag, response_cache, user_tag
+from app.db import mark_write
 from app.schemas.request import CreateEventRequest, UpdateEventRequest
-from app.schemas.response import TableResponse
-from app.schemas.schema import Event, UserEventLink, Table
-
-
-async def get_all_events_by_user(user_id: UUID, session: AsyncSession):
+from app.schemas.response import EventResponse, TableResponse
+from app.schemas.schema import Event, Guest, Seat, UserEventLink, Table
+
+# tables have no creation time; they are listed by name
+TABLE_CURSOR = TypeAdapter(Tuple[str, uuid.UUID])
+
+
+@response_cache.cached(
+    "events",
+    TypeAdapter(Tuple[List[EventResponse], str | None]),
+    tags=lambda args: [user_tag(args["user_id"])],
+)
+async def get_all_events_by_user(
+    user_id: UUID,
+    page: PageParams,
+    session: AsyncSession,
+    title: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> Tuple[List[Event], str | None]:
+    after = decode_cursor(CREATED_CURSOR, page.cursor)
     stmt = (
         select(Event)
         .join(UserEventLink, UserEventLink.event_id == Event.id)
         .where(UserEventLink.user_id == user_id)
     )
+    if title:
+        stmt = stmt.where(Event.title.icontains(title, autoescape=True))
+    if created_after:
+        stmt = stmt.where(Event.created_at >= created_after)
+    if created_before:
+        stmt = stmt.where(Event.created_at < created_before)
+    # newest events first
+    stmt = keyset(stmt, [Event.created_at, Event.id], after, page.limit, descending=True)
 
     result = await session.exec(stmt)
-    return result.all()
+    return page_of(result.all(), page.limit, CREATED_CURSOR, created_key)
 
 
+@response_cache.cached(
+    "event",
+    TypeAdapter(EventResponse),
+    tags=lambda args: [event_tag(args["event_id"]), user_tag(args["user_id"])],
+    # a body is never served under the ETag of a later version
+    key_extra="layout_version",
+)
 async def get_event_by_user(user_id: UUID, event_id: UUID, session: AsyncSession):
-    stmt = (
-        select(Event)
-        .join(UserEventLink, UserEventLink.event_id == Event.id)
-        .where(and_(UserEventLink.user_id == user_id, Event.id == event_id))
-    )
+    return await fetch_event(event_id, user_id, session)
 
-    result = await session.exec(stmt)
-    event = result.first()
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found or access denied",
-        )
-    return event
 
+def _json_object(**fields):
+    return func.jsonb_build_object(*itertools.chain.from_iterable(fields.items()))
 
-async def delete_event_by_user(event_id: UUID, user_id: UUID, session: AsyncSession):
-    db_event = await session.get(Event, event_id)
 
-    if not db_event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Event not found"
-        )
+def _json_list(document, order_by):
+    return func.coalesce(
+        func.jsonb_agg(aggregate_order_by(document, order_by)),
+        literal_column("'[]'::jsonb"),
+    )
 
-    stmt = (
-        select(Event)
+
+def event_document_query(user_id: UUID, event_id: UUID):
+    """One statement building the event, its tables, seats and guests as
+    a JSON document; no row comes back when the user has no access."""
+    guest = case(
+        (Guest.id.is_(None), null()),
+        else_=_json_object(
+            id=Guest.id,
+            first_name=Guest.first_name,
+            last_name=Guest.last_name,
+            email=Guest.email,
+        ),
+    )
+    seats = (
+        select(
+            _json_list(
+                _json_object(
+                    id=Seat.id,
+                    seat_number=Seat.seat_number,
+                    x=Seat.x,
+                    y=Seat.y,
+                    guest=guest,
+                ),
+                Seat.seat_number,
+            )
+        )
+        .select_from(Seat)
+        .outerjoin(Guest, Guest.id == Seat.guest_id)
+        .where(Seat.table_id == Table.id)
+        .correlate(Table)
+        .scalar_subquery()
+    )
+    tables = (
+        select(
+            _json_list(
+                _json_object(
+                    id=Table.id,
+                    name=Table.name,
+                    shape=Table.shape,
+                    x=Table.x,
+                    y=Table.y,
+                    width=Table.width,
+                    height=Table.height,
+                    seats=Table.seats,
+                    chairs=seats,
+                ),
+                Table.name,
+            )
+        )
+        .where(Table.event_id == Event.id)
+        .correlate(Event)
+        .scalar_subquery()
+    )
+    document = _json_object(
+        id=Event.id,
+        title=Event.title,
+        created_at=Event.created_at,
+        layout_version=Event.layout_version,
+        tables=tables,
+    )
+    return (
+        # as text, so the driver hands the bytes through untouched
+        select(cast(document, Text))
         .join(UserEventLink, UserEventLink.event_id == Event.id)
-        .where(and_(UserEventLink.user_id == user_id, Event.id == event_id))
+        .where(UserEventLink.user_id == user_id, Event.id == event_id)
     )
 
-    result = await session.exec(stmt)
-    event = result.first()
 
-    if db_event.id != event.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this user",
-        )
+async def get_event_document_by_user(
+    user_id: UUID, event_id: UUID, session: AsyncSession
+) -> str:
+    result = await session.exec(event_document_query(user_id, event_id))
+    document = result.first()
+    if document is None:
+        raise access_denied()
+    remember_member(event_id, user_id, session)
+    return document
 
+
+async def delete_event_by_user(event_id: UUID, user_id: UUID, session: AsyncSession):
+    db_event = await fetch_event(event_id, user_id, session)
+
+    # the links go with the event, collect its members first
+    tags = await event_cache_tags(event_id, session)
     await session.delete(db_event)
     await session.commit()
+    forget_event(event_id, session)
+    await mark_write(user_id)
+    await response_cache.invalidate(*tags)
 
     return db_event
 
@@ -77,6 +197,8 @@ async def create_event_by_user(
         link = UserEventLink(user_id=user_id, event_id=event.id)
         session.add_all([event, link])
         await session.commit()
+        await mark_write(user_id)
+        await response_cache.invalidate(user_tag(user_id))
         return event
     except IntegrityError:
         await session.rollback()
@@ -93,75 +215,69 @@ async def create_event_by_user(
 
 
 async def update_event_by_user(
-    payload: UpdateEventRequest, user_id: uuid.UUID, session: AsyncSession
+    payload: UpdateEventRequest,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+    expected_version: int | None = None,
 ):
-    try:
-        event = await session.get(Event, payload.id)
-        if not event:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Unexpected error occurred while creating event.",
-            )
-
-        stmt = select(UserEventLink).where(
-            UserEventLink.event_id == event.id, UserEventLink.user_id == user_id
+    # access check, version check and the write are one statement
+    stmt = (
+        update(Event)
+        .where(Event.id == payload.id, is_member(payload.id, user_id))
+        .values(
+            **payload.model_dump(exclude_unset=True, exclude={"id"}),
+            layout_version=Event.layout_version + 1,
         )
+        .returning(Event)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(Event.layout_version == expected_version)
 
-        result = await session.exec(stmt)
-        link = result.first()
-        if not link:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Unauthorized error",
-            )
-
-        event_to_update = payload.model_dump(exclude_unset=True)
-        for key, value in event_to_update.items():
-            setattr(event, key, value)
-
-        session.add(event)
-        await session.commit()
-        await session.refresh(event)
-
-        return event
+    try:
+        result = await session.exec(stmt, execution_options={"populate_existing": True})
+        event = result.scalars().first()
     except Exception:
         await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unexpected error occurred while creating event.",
+            detail="Unexpected error occurred while updating event.",
         )
-
-
-async def get_tables_by_event(
-    event_id, user_id: uuid.UUID, session: AsyncSession
-) -> List[TableResponse]:
-    try:
-        event = await session.get(Event, event_id)
-
-        if not event:
-            HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Current Event can not be found",
-            )
-
-        stmt = select(UserEventLink).where(
-            UserEventLink.event_id == event_id, UserEventLink.user_id == user_id
+    if event is None:
+        await session.rollback()
+        # no row either way; only members learn that the version moved
+        await ensure_event_member(payload.id, user_id, session)
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="The layout was changed by someone else",
         )
 
-        result = await session.exec(stmt)
-        is_valid_linked = result.first()
-        if not is_valid_linked:
-            HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized user"
-            )
+    await session.commit()
+    await mark_write(user_id)
+    await invalidate_event(event.id, session)
+    return event
 
-        stmt_table = select(Table).where(Table.event_id == event_id)
-        table_result = await session.exec(stmt_table)
 
-        return table_result.all()
-    except Exception:
-        await session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unexpected error occurred while creating event.",
-        )
+@response_cache.cached(
+    "tables",
+    TypeAdapter(Tuple[List[TableResponse], str | None]),
+    tags=lambda args: [event_tag(args["event_id"]), user_tag(args["user_id"])],
+    key_extra="layout_version",
+)
+async def get_tables_by_event(
+    event_id,
+    user_id: uuid.UUID,
+    page: PageParams,
+    session: AsyncSession,
+    name: str | None = None,
+    shape: str | None = None,
+) -> Tuple[List[TableResponse], str | None]:
+    after = decode_cursor(TABLE_CURSOR, page.cursor)
+    stmt = select(Table).where(Table.event_id == event_id)
+    if name:
+        stmt = stmt.where(Table.name.icontains(name, autoescape=True))
+    if shape:
+        stmt = stmt.where(Table.shape == shape)
+    stmt = keyset(stmt, [Table.name, Table.id], after, page.limit)
+
+    tables = await fetch_scoped(stmt, event_id, user_id, session)
+    return page_of(tables, page.limit, TABLE_CURSOR, lambda table: (table.name, table.id))
@@ -0,0 +1,77 @@
+import uuid
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.v1.events.access import (
+    ensure_event_member,
+    fetch_event,
+    is_known_member,
+    is_member,
+    remember_member,
+)
+from app.cors.response_cache import event_tag, response_cache, user_tag
+from app.schemas.schema import Event, UserEventLink
+
+
+async def get_layout_version(
+    user_id: uuid.UUID, event_id: uuid.UUID, session: AsyncSession
+) -> int:
+    return await fetch_event(event_id, user_id, session, Event.layout_version)
+
+
+async def bump_layout_version(
+    event_id: uuid.UUID,
+    session: AsyncSession,
+    expected: int | None = None,
+    user_id: uuid.UUID | None = None,
+) -> int:
+    """Increments the event's version within the caller's transaction.
+
+    The row stays locked until the transaction ends, so with ``expected``
+    set a concurrent writer waits and then fails the check with a 412
+    instead of overwriting this write. With ``user_id`` set the same
+    statement checks the user's access.
+    """
+    stmt = (
+        update(Event)
+        .where(Event.id == event_id)
+        .values(layout_version=Event.layout_version + 1)
+        .returning(Event.layout_version)
+    )
+    if expected is not None:
+        stmt = stmt.where(Event.layout_version == expected)
+    if user_id is not None and not is_known_member(event_id, user_id, session):
+        stmt = stmt.where(is_member(event_id, user_id))
+    result = await session.exec(stmt)
+    version = result.scalar_one_or_none()
+    if version is None:
+        await session.rollback()
+        if user_id is not None:
+            # a missing event or link is a 404, not a version conflict
+            await ensure_event_member(event_id, user_id, session)
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="The layout was changed by someone else",
+        )
+    if user_id is not None:
+        remember_member(event_id, user_id, session)
+    return version
+
+
+async def event_cache_tags(event_id: uuid.UUID, session: AsyncSession) -> List[str]:
+    """Cache tags of everything that shows the event: its own reads and
+    the event listings of every member."""
+    result = await session.exec(
+        select(UserEventLink.user_id).where(UserEventLink.event_id == event_id)
+    )
+    return [event_tag(event_id), *(user_tag(user_id) for user_id in result.all())]
+
+
+async def invalidate_event(event_id: uuid.UUID, session: AsyncSession) -> None:
+    # only after the write committed, or a concurrent read could cache
+    # the old rows again
+    await response_cache.invalidate(*await event_cache_tags(event_id, session))
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+
+from . import guests
+
+guest_router = APIRouter()
+guest_router.include_router(guests.guest_router, tags=["guests"])
+
+__all__ = ["guest_router"]
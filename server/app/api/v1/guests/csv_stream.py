@@ -0,0 +1,57 @@
+import codecs
+import csv
+import re
+from typing import AsyncIterator, List
+
+# universal newlines: \r\n, \n or a lone \r
+_NEWLINE = re.compile(r"\r\n|\r|\n")
+
+
+async def csv_rows(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8-sig",
+    max_record: int = 64 * 1024,
+) -> AsyncIterator[List[str]]:
+    """Parses CSV records out of a byte stream as they arrive.
+
+    Lines are held back only while they end inside a quoted field, and a
+    record longer than ``max_record`` characters raises ``csv.Error``, so
+    memory is bounded by ``max_record`` rather than the file.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+    record: List[str] = []
+    size = 0
+    quotes = 0
+
+    def too_long() -> csv.Error:
+        return csv.Error(f"record longer than {max_record} characters")
+
+    async for chunk in chunks:
+        text = buffer + decoder.decode(chunk)
+        # a trailing \r may be the first half of a \r\n
+        cut = len(text) - 1 if text.endswith("\r") else len(text)
+        # the last piece may still be an incomplete line
+        *lines, buffer = _NEWLINE.split(text[:cut])
+        buffer += text[cut:]
+        complete: List[str] = []
+        for line in lines:
+            line += "\n"
+            record.append(line)
+            size += len(line)
+            if size > max_record:
+                raise too_long()
+            # an odd number of quotes so far means a field spans lines
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                complete.append("".join(record))
+                record, size, quotes = [], 0, 0
+        if size + len(buffer) > max_record:
+            raise too_long()
+        for row in csv.reader(complete):
+            yield row
+
+    tail = "".join(record) + buffer + decoder.decode(b"", final=True)
+    if tail.strip():
+        for row in csv.reader([tail]):
+            yield row
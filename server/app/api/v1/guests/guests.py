@@ -0,0 +1,86 @@
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.v1.guests.models import (
+    ExportFormat,
+    export_seating_by_event,
+    get_guests_by_event,
+    import_guests_by_event,
+)
+from app.cors.dependencies.base import CurrentUser, get_current_user, get_read_session
+from app.cors.pagination import PageParams, page_params, set_next_cursor
+from app.db import get_session
+from app.schemas.response import GuestImportResponse, GuestResponse
+
+guest_router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@guest_router.get("/{event_id}/guests", response_model=List[GuestResponse])
+async def get_guests(
+    event_id: uuid.UUID,
+    response: Response,
+    search: str | None = None,
+    seated: bool | None = None,
+    page: PageParams = Depends(page_params()),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    guests, next_cursor = await get_guests_by_event(
+        event_id, current_user.id, page, session, search, seated
+    )
+    set_next_cursor(response, next_cursor)
+    return guests
+
+
+@guest_router.post(
+    "/{event_id}/guests/import",
+    response_model=GuestImportResponse,
+    # the body is streamed, it only shows up here for the docs
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def import_guests(
+    event_id: uuid.UUID,
+    request: Request,
+    atomic: bool = False,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Imports guests from a CSV request body.
+
+    The header needs ``first_name`` and ``last_name`` columns, ``email``
+    is optional. Invalid rows are reported and skipped, or abort the
+    whole import when ``atomic`` is set.
+    """
+    return await import_guests_by_event(
+        event_id, request.stream(), atomic, current_user.id, session
+    )
+
+
+@guest_router.get("/{event_id}/export/seating")
+async def export_seating(
+    event_id: uuid.UUID,
+    export_format: ExportFormat = Query(default="csv", alias="format"),
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+):
+    body = await export_seating_by_event(
+        event_id, export_format, current_user.id, session
+    )
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="seating-{event_id}.{export_format}"'
+        },
+    )
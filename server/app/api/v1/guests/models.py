@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+import uuid
+from typing import AsyncIterator, List, Literal, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.v1.events.access import ensure_event_member, fetch_scoped
+from app.api.v1.guests.csv_stream import csv_rows
+from app.config.settings import settings
+from app.cors.pagination import (
+    CREATED_CURSOR,
+    PageParams,
+    created_key,
+    decode_cursor,
+    keyset,
+    page_of,
+)
+from app.db import mark_write, read_session_maker
+from app.schemas.request import GuestImportRow
+from app.schemas.response import GuestImportError, GuestImportResponse
+from app.schemas.schema import Guest, Seat, Table
+
+GUEST_COLUMNS = ("id", "first_name", "last_name", "email", "event_id")
+REQUIRED_HEADERS = ("first_name", "last_name")
+EXPORT_COLUMNS = (
+    "guest_id",
+    "first_name",
+    "last_name",
+    "email",
+    "table_id",
+    "table_name",
+    "seat_id",
+    "seat_number",
+)
+
+ExportFormat = Literal["csv", "ndjson"]
+
+
+def _header_name(name: str) -> str:
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def _unreadable(error: Exception, row_number: int) -> HTTPException:
+    if isinstance(error, UnicodeDecodeError):
+        detail = "CSV must be UTF-8 encoded"
+    else:
+        detail = f"CSV row {row_number} could not be read: {error}"
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+async def get_guests_by_event(
+    event_id: uuid.UUID,
+    user_id: uuid.UUID,
+    page: PageParams,
+    session: AsyncSession,
+    search: str | None = None,
+    seated: bool | None = None,
+) -> Tuple[List[Guest], str | None]:
+    after = decode_cursor(CREATED_CURSOR, page.cursor)
+    stmt = select(Guest).where(Guest.event_id == event_id)
+    if search:
+        stmt = stmt.where(
+            or_(
+                Guest.first_name.icontains(search, autoescape=True),
+                Guest.last_name.icontains(search, autoescape=True),
+                Guest.email.icontains(search, autoescape=True),
+            )
+        )
+    if seated is not None:
+        has_seat = exists().where(Seat.guest_id == Guest.id)
+        stmt = stmt.where(has_seat if seated else ~has_seat)
+    stmt = keyset(stmt, [Guest.created_at, Guest.id], after, page.limit)
+
+    guests = await fetch_scoped(stmt, event_id, user_id, session)
+    return page_of(guests, page.limit, CREATED_CURSOR, created_key)
+
+
+async def import_guests_by_event(
+    event_id: uuid.UUID,
+    chunks: AsyncIterator[bytes],
+    atomic: bool,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+) -> GuestImportResponse:
+    await ensure_event_member(event_id, user_id, session)
+
+    # COPY goes through the session's own connection, so it shares the
+    # transaction of the membership check above
+    connection = await session.connection()
+    driver = (await connection.get_raw_connection()).driver_connection
+
+    rows = csv_rows(chunks, max_record=settings.GUEST_IMPORT_MAX_RECORD_SIZE)
+    header = None
+    # rows are numbered like spreadsheet rows, the header included
+    row_number = 0
+    try:
+        async for record in rows:
+            row_number += 1
+            if any(field.strip() for field in record):
+                header = [_header_name(field) for field in record]
+                break
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise _unreadable(e, row_number + 1)
+    missing = [name for name in REQUIRED_HEADERS if header is None or name not in header]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV is missing the columns: {', '.join(missing)}",
+        )
+    columns = [
+        (index, name)
+        for index, name in enumerate(header)
+        if name in GuestImportRow.model_fields
+    ]
+
+    imported, rejected = 0, 0
+    errors: List[GuestImportError] = []
+    truncated = False
+    batch: List[tuple] = []
+
+    async def copy_batch() -> None:
+        nonlocal imported
+        await driver.copy_records_to_table(
+            Guest.__tablename__, records=batch, columns=GUEST_COLUMNS
+        )
+        imported += len(batch)
+        batch.clear()
+
+    try:
+        async for record in rows:
+            row_number += 1
+            if not any(field.strip() for field in record):
+                continue
+            values = {
+                name: record[index].strip() or None
+                for index, name in columns
+                if index < len(record)
+            }
+            try:
+                guest = GuestImportRow.model_validate(values)
+            except ValidationError as e:
+                rejected += 1
+                for error in e.errors(include_url=False, include_context=False):
+                    if len(errors) >= settings.GUEST_IMPORT_MAX_ERRORS:
+                        truncated = True
+                        break
+                    errors.append(
+                        GuestImportError(
+                            row=row_number,
+                            field=".".join(str(part) for part in error["loc"]) or None,
+                            message=error["msg"],
+                        )
+                    )
+                continue
+
+            if atomic and rejected:
+                # the import will be rolled back, only keep validating
+                continue
+            batch.append(
+                (uuid.uuid4(), guest.first_name, guest.last_name, guest.email, event_id)
+            )
+            if len(batch) >= settings.GUEST_IMPORT_CHUNK_SIZE:
+                await copy_batch()
+
+        if atomic and rejected:
+            await session.rollback()
+            return GuestImportResponse(
+                imported=0, rejected=rejected, errors=errors, truncated=truncated
+            )
+        if batch:
+            await copy_batch()
+        await session.commit()
+    except HTTPException:
+        raise
+    except (UnicodeDecodeError, csv.Error) as e:
+        await session.rollback()
+        raise _unreadable(e, row_number + 1)
+    except Exception:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected error occurred while importing guests.",
+        )
+
+    await mark_write(user_id)
+    return GuestImportResponse(
+        imported=imported, rejected=rejected, errors=errors, truncated=truncated
+    )
+
+
+async def export_seating_by_event(
+    event_id: uuid.UUID,
+    export_format: ExportFormat,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+) -> AsyncIterator[bytes]:
+    """Checks access and returns the export body of an event's seating list.
+
+    The body opens its own session: it is consumed by the response after
+    the request's session has been closed.
+    """
+    await ensure_event_member(event_id, user_id, session)
+    return _stream_seating(event_id, export_format, await read_session_maker(user_id))
+
+
+async def _stream_seating(
+    event_id: uuid.UUID,
+    export_format: ExportFormat,
+    session_maker: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[bytes]:
+    stmt = (
+        select(
+            Guest.id,
+            Guest.first_name,
+            Guest.last_name,
+            Guest.email,
+            Table.id,
+            Table.name,
+            Seat.id,
+            Seat.seat_number,
+        )
+        .outerjoin(Seat, Seat.guest_id == Guest.id)
+        .outerjoin(Table, Table.id == Seat.table_id)
+        .where(Guest.event_id == event_id)
+        .order_by(Table.name, Seat.seat_number, Guest.last_name, Guest.first_name)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode()
+
+    async with session_maker() as session:
+        # a server-side cursor: one batch of rows in memory at a time
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            if export_format == "csv":
+                writer.writerows(
+                    ["" if value is None else value for value in row]
+                    for row in partition
+                )
+            else:
+                for row in partition:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue().encode()
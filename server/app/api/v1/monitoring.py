@@ -1,15 +1,28 @@
+import os
+
 from fastapi import APIRouter
-from fastapi.params import Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi import status
-from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.db import get_session
-from app.schemas.schema import User
+from app.config.settings import settings
+from app.cors.dependencies.base import current_key_set
+from app.cors.health import ReadinessProbe
+from app.cors import workers
+from app.cors.metrics import exposition_registry
+from app.db import engine_options, engines, pool_status
 
 monitoring_router = APIRouter()
 
+readiness = ReadinessProbe(
+    engines=engines,
+    key_set=current_key_set,
+    ttl=settings.READINESS_CACHE_TTL,
+    timeout=settings.READINESS_TIMEOUT,
+    # pgbouncer needs the same statement settings as the pools
+    connect_args=engine_options(settings)["connect_args"],
+)
+
 
 @monitoring_router.get("/ping", tags=["server-health"])
 async def ping():
@@ -20,25 +33,66 @@ async def ping():
     return JSONResponse(content={"ping": "pong"}, status_code=status.HTTP_200_OK)
 
 
-@monitoring_router.get("/healthz", tags=["health"])
-async def healthz(session: AsyncSession = Depends(get_session)):
+@monitoring_router.get("/livez", tags=["health"])
+async def livez():
+    """_summary_
+
+    the process is up and its event loop answers; no dependency is
+    touched, so a slow database never gets a worker restarted
+    """
+    return JSONResponse(
+        content={"status": "alive", "pid": os.getpid()}, status_code=status.HTTP_200_OK
+    )
+
+
+@monitoring_router.get("/readyz", tags=["health"])
+async def readyz():
+    """_summary_
+
+    showcase the status of third party deps: a cached SELECT 1 per
+    database, pool saturation and the auth key cache
+    """
+    ready, content = await readiness.check()
+    return JSONResponse(
+        content=content,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+# kept for probes configured before livez/readyz existed
+monitoring_router.add_api_route("/healthz", readyz, tags=["health"], name="healthz")
+
+
+@monitoring_router.get("/pool", tags=["health"])
+async def pool():
+    """_summary_
+
+    showcase the connection pool usage of this worker
+    """
+    content = {name: pool_status(engine) for name, engine in engines().items()}
+    return JSONResponse(content=content, status_code=status.HTTP_200_OK)
+
+
+@monitoring_router.get("/workers", tags=["health"])
+async def worker_status():
+    """_summary_
+
+    heartbeat of every worker of the production server, as seen from
+    the worker that answers; empty in single-process mode
+    """
+    board = workers.worker_board
+    rows = board.rows(settings.WORKER_HEARTBEAT_TIMEOUT) if board is not None else []
+    return JSONResponse(
+        content={"served_by": os.getpid(), "workers": rows},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@monitoring_router.get("/metrics", tags=["health"])
+async def metrics():
     """_summary_
 
-    showcase the status of third party deps
-    example: SQL database/redis
+    request, database and auth metrics of this worker in the Prometheus
+    text format
     """
-    try:
-        db_status = await session.exec(select(User))
-        if db_status.first() is not None:
-            return JSONResponse(
-                content={"status": "healthy"}, status_code=status.HTTP_200_OK
-            )
-        else:
-            return JSONResponse(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                content={"status": "unhealthy"},
-            )
-    except Exception:
-        return JSONResponse(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "error"}
-        )
+    return Response(content=generate_latest(exposition_registry()), media_type=CONTENT_TYPE_LATEST)
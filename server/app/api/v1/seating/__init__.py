@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+
+from . import seating
+
+seating_router = APIRouter()
+seating_router.include_router(seating.seating_router, tags=["seating"])
+
+__all__ = ["seating_router"]
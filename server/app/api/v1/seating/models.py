@@ -0,0 +1,225 @@
+import asyncio
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.v1.events.access import fetch_scoped
+from app.api.v1.events.versions import bump_layout_version, invalidate_event
+from app.api.v1.tables.seats import regenerate_seats
+from app.api.v1.seating.solver import (
+    InfeasibleSeating,
+    SeatingSolution,
+    anneal,
+    best_of,
+    build_problem,
+)
+from app.config.settings import settings
+from app.db import mark_write
+from app.schemas.request import SolveSeatingRequest
+from app.schemas.response import (
+    SeatAssignmentResponse,
+    SeatingScoreResponse,
+    SeatingSolutionResponse,
+)
+from app.schemas.schema import Event, Guest, Seat, Table
+
+SOLVER_WORKERS = settings.SEATING_SOLVER_WORKERS or os.cpu_count() or 1
+
+_solver_pool: ProcessPoolExecutor | None = None
+
+
+def get_solver_pool() -> ProcessPoolExecutor:
+    global _solver_pool
+    if _solver_pool is None:
+        _solver_pool = ProcessPoolExecutor(max_workers=SOLVER_WORKERS)
+    return _solver_pool
+
+
+def shutdown_solver_pool() -> None:
+    global _solver_pool
+    if _solver_pool is not None:
+        _solver_pool.shutdown(cancel_futures=True)
+        _solver_pool = None
+
+
+def _index_of(ids: Dict[uuid.UUID, int], key: uuid.UUID, kind: str) -> int:
+    if key not in ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {kind} {key} for this event",
+        )
+    return ids[key]
+
+
+async def solve_seating_by_event(
+    event_id: uuid.UUID,
+    payload: SolveSeatingRequest,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+    expected_version: int | None = None,
+) -> SeatingSolutionResponse:
+    # the layout the solution is computed for; read before the tables, so
+    # a layout saved in between fails the apply with a 412
+    (layout_version,) = await fetch_scoped(
+        select(Event.layout_version).where(Event.id == event_id), event_id, user_id, session
+    )
+    guest_ids = list(
+        await fetch_scoped(
+            select(Guest.id).where(Guest.event_id == event_id), event_id, user_id, session
+        )
+    )
+    tables = list(
+        await fetch_scoped(
+            select(Table).where(Table.event_id == event_id), event_id, user_id, session
+        )
+    )
+    # release the connection while the solver runs
+    await session.commit()
+
+    guest_index = {guest_id: i for i, guest_id in enumerate(guest_ids)}
+    table_index = {table.id: i for i, table in enumerate(tables)}
+    try:
+        problem = build_problem(
+            len(guest_ids),
+            [table.seats for table in tables],
+            parties=[
+                [_index_of(guest_index, g, "guest") for g in party]
+                for party in payload.parties
+            ],
+            keep_apart=[
+                (_index_of(guest_index, a, "guest"), _index_of(guest_index, b, "guest"))
+                for a, b in payload.keep_apart
+            ],
+            preferences=[
+                (
+                    _index_of(guest_index, p.guest_id, "guest"),
+                    _index_of(table_index, p.table_id, "table"),
+                    p.weight,
+                )
+                for p in payload.preferred_tables
+            ],
+        )
+    except InfeasibleSeating as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    pool = get_solver_pool()
+    loop = asyncio.get_running_loop()
+    solutions = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, anneal, problem, payload.time_budget, seed)
+            for seed in range(SOLVER_WORKERS)
+        )
+    )
+    solution = best_of(solutions)
+
+    seated: Dict[int, List[uuid.UUID]] = {}
+    assignments = []
+    for unit, guests in enumerate(problem.units):
+        table = int(solution.assignment[unit])
+        for guest in guests:
+            assignments.append(
+                SeatAssignmentResponse(
+                    guest_id=guest_ids[guest],
+                    table_id=tables[table].id if table >= 0 else None,
+                )
+            )
+            if table >= 0:
+                seated.setdefault(table, []).append(guest_ids[guest])
+
+    if payload.apply:
+        await bump_layout_version(
+            event_id,
+            session,
+            layout_version if expected_version is None else expected_version,
+            user_id=user_id,
+        )
+        seat_of = await apply_seating(event_id, tables, seated, session)
+        for assignment in assignments:
+            assignment.seat_id = seat_of.get(assignment.guest_id)
+        await mark_write(user_id)
+        await invalidate_event(event_id, session)
+
+    return _solution_response(solution, assignments, payload.apply)
+
+
+def _solution_response(
+    solution: SeatingSolution, assignments: List[SeatAssignmentResponse], applied: bool
+) -> SeatingSolutionResponse:
+    return SeatingSolutionResponse(
+        assignments=assignments,
+        score=SeatingScoreResponse(
+            total=solution.score,
+            preferences=solution.preference_score,
+            violated_separations=solution.violated_separations,
+            unseated_guests=solution.unseated_guests,
+        ),
+        applied=applied,
+    )
+
+
+async def apply_seating(
+    event_id: uuid.UUID,
+    tables: List[Table],
+    seated: Dict[int, List[uuid.UUID]],
+    session: AsyncSession,
+) -> Dict[uuid.UUID, uuid.UUID]:
+    """Writes a solution to ``seats.guest_id``.
+
+    Guests fill a table's seats in seat-number order; tables that do not
+    have enough seat rows yet get them from ``regenerate_seats`` first.
+    """
+    seats_table = Seat.__table__
+    event_tables = select(Table.id).where(Table.event_id == event_id)
+    await session.exec(
+        update(seats_table)
+        .where(seats_table.c.table_id.in_(event_tables))
+        .values(guest_id=None)
+    )
+    seats_by_table = await _seats_by_table(event_tables, session)
+    short = [
+        tables[index]
+        for index, guest_ids in seated.items()
+        if len(seats_by_table.get(tables[index].id, [])) < len(guest_ids)
+    ]
+    if short:
+        await regenerate_seats(short, session)
+        seats_by_table = await _seats_by_table(event_tables, session)
+
+    seat_of: Dict[uuid.UUID, uuid.UUID] = {}
+    updates = []
+    for index, guest_ids in seated.items():
+        free = seats_by_table.get(tables[index].id, [])
+        # the solver never seats more guests than the table has seats
+        for seat_id, guest_id in zip(free, guest_ids, strict=False):
+            updates.append({"b_id": seat_id, "b_guest_id": guest_id})
+            seat_of[guest_id] = seat_id
+
+    if updates:
+        await session.exec(
+            update(seats_table)
+            .where(seats_table.c.id == bindparam("b_id"))
+            .values(guest_id=bindparam("b_guest_id")),
+            params=updates,
+        )
+    await session.commit()
+    return seat_of
+
+
+async def _seats_by_table(
+    event_tables: Any, session: AsyncSession
+) -> Dict[uuid.UUID, List[uuid.UUID]]:
+    result = await session.exec(
+        select(Seat.id, Seat.table_id)
+        .where(Seat.table_id.in_(event_tables))
+        .order_by(Seat.table_id, Seat.seat_number)
+    )
+    seats_by_table: Dict[uuid.UUID, List[uuid.UUID]] = {}
+    for seat_id, table_id in result.all():
+        seats_by_table.setdefault(table_id, []).append(seat_id)
+    return seats_by_table
@@ -0,0 +1,28 @@
+import uuid
+
+from fastapi import APIRouter, Depends, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.v1.seating.models import solve_seating_by_event
+from app.cors.dependencies.base import CurrentUser, get_current_user
+from app.cors.etag import expected_version
+from app.db import get_session
+from app.schemas.request import SolveSeatingRequest
+from app.schemas.response import SeatingSolutionResponse
+
+seating_router = APIRouter()
+
+
+@seating_router.post(
+    "/{event_id}/seating/solve", response_model=SeatingSolutionResponse
+)
+async def solve_seating(
+    event_id: uuid.UUID,
+    payload: SolveSeatingRequest,
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    return await solve_seating_by_event(
+        event_id, payload, current_user.id, session, expected_version(request)
+    )
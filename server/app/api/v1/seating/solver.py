@@ -0,0 +1,234 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# weights of the hard constraints, far above any preference score
+SEPARATION_PENALTY = 1000.0
+UNSEATED_PENALTY = 100.0
+
+
+@dataclass(frozen=True)
+class SeatingProblem:
+    """Guests grouped into units that must share a table.
+
+    ``preferences[u, t]`` is the score of seating unit ``u`` at table
+    ``t`` and ``conflicts[u, v]`` counts the keep-apart pairs between
+    two units.
+    """
+
+    units: List[List[int]]
+    unit_sizes: np.ndarray
+    capacities: np.ndarray
+    preferences: np.ndarray
+    conflicts: np.ndarray
+
+
+@dataclass(frozen=True)
+class SeatingSolution:
+    assignment: np.ndarray  # table index per unit, -1 when unseated
+    score: float
+    preference_score: float
+    violated_separations: int
+    unseated_guests: int
+
+
+class InfeasibleSeating(ValueError):
+    pass
+
+
+def build_problem(
+    guest_count: int,
+    capacities: Sequence[int],
+    parties: Sequence[Sequence[int]] = (),
+    keep_apart: Sequence[Tuple[int, int]] = (),
+    preferences: Sequence[Tuple[int, int, float]] = (),
+) -> SeatingProblem:
+    # overlapping parties collapse into one unit (union-find)
+    parent = list(range(guest_count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for party in parties:
+        for guest in party[1:]:
+            parent[find(guest)] = find(party[0])
+
+    roots: Dict[int, int] = {}
+    unit_of = np.empty(guest_count, dtype=np.int64)
+    units: List[List[int]] = []
+    for guest in range(guest_count):
+        root = find(guest)
+        if root not in roots:
+            roots[root] = len(units)
+            units.append([])
+        unit_of[guest] = roots[root]
+        units[roots[root]].append(guest)
+
+    unit_count, table_count = len(units), len(capacities)
+    unit_sizes = np.array([len(unit) for unit in units], dtype=np.int64)
+    capacities_ = np.asarray(capacities, dtype=np.int64)
+    if unit_count and unit_sizes.max() > capacities_.max(initial=0):
+        raise InfeasibleSeating("A party is larger than every table")
+
+    prefs = np.zeros((unit_count, table_count))
+    if preferences:
+        guests, tables, weights = (np.asarray(column) for column in zip(*preferences))
+        np.add.at(prefs, (unit_of[guests.astype(np.int64)], tables.astype(np.int64)), weights)
+
+    conflicts = np.zeros((unit_count, unit_count))
+    if keep_apart:
+        pairs = unit_of[np.asarray(keep_apart, dtype=np.int64)]
+        if np.any(pairs[:, 0] == pairs[:, 1]):
+            raise InfeasibleSeating("Guests that must sit together are also kept apart")
+        np.add.at(conflicts, (pairs[:, 0], pairs[:, 1]), 1)
+        np.add.at(conflicts, (pairs[:, 1], pairs[:, 0]), 1)
+
+    return SeatingProblem(units, unit_sizes, capacities_, prefs, conflicts)
+
+
+def evaluate(problem: SeatingProblem, assignment: np.ndarray) -> SeatingSolution:
+    seated = assignment >= 0
+    preference_score = float(
+        problem.preferences[np.flatnonzero(seated), assignment[seated]].sum()
+    )
+    same_table = (assignment[:, None] == assignment[None, :]) & seated[:, None]
+    violated = int((problem.conflicts * same_table).sum() // 2)
+    unseated = int(problem.unit_sizes[~seated].sum())
+    score = preference_score - SEPARATION_PENALTY * violated - UNSEATED_PENALTY * unseated
+    return SeatingSolution(assignment, score, preference_score, violated, unseated)
+
+
+def _separation_penalty(table_count: int) -> np.ndarray:
+    # keep-apart pairs only count when both guests are actually seated
+    penalty = np.full(table_count + 1, SEPARATION_PENALTY)
+    penalty[table_count] = 0
+    return penalty
+
+
+def _initial_assignment(
+    problem: SeatingProblem, scores: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    unit_count, table_count = scores.shape[0], scores.shape[1] - 1
+    assignment = np.full(unit_count, table_count, dtype=np.int64)
+    load = np.zeros(table_count + 1, dtype=np.int64)
+    conflict_load = np.zeros((unit_count, table_count + 1))
+    penalty = _separation_penalty(table_count)
+    # largest parties first, ties broken randomly per restart
+    order = np.lexsort((rng.random(unit_count), -problem.unit_sizes))
+    for unit in order:
+        size = problem.unit_sizes[unit]
+        gain = scores[unit] - penalty * conflict_load[unit]
+        gain[:table_count][load[:table_count] + size > problem.capacities] = -np.inf
+        table = int(np.argmax(gain))
+        assignment[unit] = table
+        load[table] += size
+        conflict_load[:, table] += problem.conflicts[:, unit]
+    return assignment
+
+
+def anneal(problem: SeatingProblem, time_budget: float, seed: int) -> SeatingSolution:
+    """Simulated annealing over unit moves and swaps.
+
+    Table ``m`` (one past the last real table) is an unbounded "unseated"
+    bucket, so capacity is always respected and running out of seats is
+    just another penalty in the score.
+    """
+    rng = np.random.default_rng(seed)
+    unit_count, table_count = len(problem.units), len(problem.capacities)
+    if unit_count == 0 or table_count == 0:
+        return evaluate(problem, np.full(unit_count, -1, dtype=np.int64))
+
+    sizes = problem.unit_sizes
+    scores = np.hstack([problem.preferences, -UNSEATED_PENALTY * sizes[:, None]])
+    capacities = np.append(problem.capacities, sizes.sum())
+    conflicts = problem.conflicts
+    penalty = _separation_penalty(table_count)
+
+    assignment = _initial_assignment(problem, scores, rng)
+    load = np.bincount(assignment, weights=sizes, minlength=table_count + 1)
+    # conflict_load[u, t]: keep-apart pairs between unit u and table t
+    conflict_load = conflicts @ np.eye(table_count + 1)[assignment]
+
+    rows = np.arange(unit_count)
+    current = float(scores[rows, assignment].sum())
+    current -= float((penalty[assignment] * conflict_load[rows, assignment]).sum() / 2)
+    best, best_assignment = current, assignment.copy()
+
+    t_start = max(float(np.abs(problem.preferences).max(initial=0)), 1.0)
+    t_end = 1e-3
+    started = time.perf_counter()
+    temperature, iteration = t_start, 0
+    while True:
+        if iteration % 256 == 0:
+            progress = (time.perf_counter() - started) / time_budget
+            if progress >= 1:
+                break
+            temperature = t_start * (t_end / t_start) ** progress
+            units = rng.integers(unit_count, size=256)
+            targets = rng.integers(table_count + 1, size=256)
+            thresholds = rng.random(256)
+        k = iteration % 256
+        iteration += 1
+
+        i, target = units[k], targets[k]
+        source = assignment[i]
+        if target == source:
+            continue
+
+        if load[target] + sizes[i] <= capacities[target]:
+            j = -1
+            delta = scores[i, target] - scores[i, source] - (
+                penalty[target] * conflict_load[i, target]
+                - penalty[source] * conflict_load[i, source]
+            )
+        else:
+            # the target table is full: try swapping with one of its units
+            members = np.flatnonzero(assignment == target)
+            if members.size == 0:
+                continue
+            j = members[rng.integers(members.size)]
+            if (
+                load[target] - sizes[j] + sizes[i] > capacities[target]
+                or load[source] - sizes[i] + sizes[j] > capacities[source]
+            ):
+                continue
+            delta = (
+                scores[i, target] + scores[j, source] - scores[i, source] - scores[j, target]
+            ) - (
+                penalty[target] * (conflict_load[i, target] - conflicts[i, j])
+                - penalty[source] * conflict_load[i, source]
+                + penalty[source] * (conflict_load[j, source] - conflicts[i, j])
+                - penalty[target] * conflict_load[j, target]
+            )
+
+        if delta < 0 and thresholds[k] >= math.exp(delta / temperature):
+            continue
+
+        assignment[i] = target
+        load[source] -= sizes[i]
+        load[target] += sizes[i]
+        conflict_load[:, source] -= conflicts[:, i]
+        conflict_load[:, target] += conflicts[:, i]
+        if j >= 0:
+            assignment[j] = source
+            load[target] -= sizes[j]
+            load[source] += sizes[j]
+            conflict_load[:, target] -= conflicts[:, j]
+            conflict_load[:, source] += conflicts[:, j]
+
+        current += delta
+        if current > best + 1e-9:
+            best, best_assignment = current, assignment.copy()
+
+    best_assignment[best_assignment == table_count] = -1
+    return evaluate(problem, best_assignment)
+
+
+def best_of(solutions: Sequence[SeatingSolution]) -> SeatingSolution:
+    return max(solutions, key=lambda solution: solution.score)
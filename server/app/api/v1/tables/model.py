@@ -1,11 +1,80 @@
 import uuid
+from typing import List, Tuple
 
 from fastapi import status, HTTPException
-from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.schemas.request import CreateTableRequest
-from app.schemas.schema import Table, UserEventLink
+from app.api.v1.events.access import ensure_event_member
+from app.api.v1.events.versions import bump_layout_version, invalidate_event
+from app.api.v1.tables.seats import regenerate_seats
+from app.api.v1.tables.spatial import SpatialGrid, find_overlaps, table_outline
+from app.config.settings import settings
+from app.cors.cache import TTLCache
+from app.db import mark_write
+from app.schemas.request import CreateTableRequest, SaveLayoutRequest
+from app.schemas.response import TableDistanceResponse
+from app.schemas.schema import Seat, Table, UserEventLink
+
+LAYOUT_FIELDS = ("name", "shape", "seats", "x", "y", "width", "height")
+
+# per-event placement indexes of this process
+spatial_indexes: TTLCache[SpatialGrid] = TTLCache(
+    maxsize=1_000, ttl=settings.TABLE_INDEX_TTL
+)
+
+
+def build_spatial_index(tables: List[Table]) -> SpatialGrid:
+    grid = SpatialGrid(cell_size=settings.TABLE_GRID_CELL_SIZE)
+    for table in tables:
+        grid.insert(
+            table.id,
+            table_outline(table.shape, table.x, table.y, table.width, table.height),
+        )
+    return grid
+
+
+async def get_spatial_index(event_id: uuid.UUID, session: AsyncSession) -> SpatialGrid:
+    grid = spatial_indexes.get(event_id)
+    if grid is None:
+        result = await session.exec(select(Table).where(Table.event_id == event_id))
+        grid = build_spatial_index(list(result.all()))
+        spatial_indexes.set(event_id, grid)
+    return grid
+
+
+async def get_tables_within_radius(
+    event_id: uuid.UUID,
+    x: float,
+    y: float,
+    radius: float,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+) -> List[TableDistanceResponse]:
+    await ensure_event_member(event_id, user_id, session)
+    grid = await get_spatial_index(event_id, session)
+    return [
+        TableDistanceResponse(id=key, distance=distance)
+        for key, distance in grid.within_radius(x, y, radius)
+    ]
+
+
+async def get_nearest_tables(
+    event_id: uuid.UUID,
+    x: float,
+    y: float,
+    k: int,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+) -> List[TableDistanceResponse]:
+    await ensure_event_member(event_id, user_id, session)
+    grid = await get_spatial_index(event_id, session)
+    return [
+        TableDistanceResponse(id=key, distance=distance)
+        for key, distance in grid.nearest(x, y, k)
+    ]
 
 
 async def create_table_by_event(
@@ -24,3 +93,101 @@ async def create_table_by_event(
         table = Table(**payload.model_dump())
     except Exception:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="")
+
+
+async def save_layout_by_event(
+    event_id: uuid.UUID,
+    payload: SaveLayoutRequest,
+    user_id: uuid.UUID,
+    session: AsyncSession,
+    expected_version: int | None = None,
+) -> Tuple[List[Table], int]:
+    rows = [
+        {**table.model_dump(), "id": table.id or uuid.uuid4(), "event_id": event_id}
+        for table in payload.tables
+    ]
+    table_ids = [row["id"] for row in rows]
+    if len(set(table_ids)) != len(table_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Layout contains the same table more than once",
+        )
+
+    grid = SpatialGrid(cell_size=settings.TABLE_GRID_CELL_SIZE)
+    overlaps = find_overlaps(
+        grid,
+        [
+            (row["id"], row["shape"], row["x"], row["y"], row["width"], row["height"])
+            for row in rows
+        ],
+    )
+    if overlaps:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Tables overlap",
+                "overlapping": [[str(a), str(b)] for a, b in overlaps],
+            },
+        )
+
+    try:
+        # also the access check, before anything is written
+        version = await bump_layout_version(
+            event_id, session, expected_version, user_id=user_id
+        )
+        tables: List[Table] = []
+        if rows:
+            upsert = insert(Table).values(rows)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[Table.id],
+                set_={field: upsert.excluded[field] for field in LAYOUT_FIELDS},
+                # never move a table that belongs to another event
+                where=Table.event_id == event_id,
+            ).returning(Table)
+            result = await session.exec(
+                upsert, execution_options={"populate_existing": True}
+            )
+            tables = list(result.scalars().all())
+            if len(tables) != len(rows):
+                await session.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Layout references tables of another event",
+                )
+            await regenerate_seats(tables, session)
+
+        # seats of removed tables go in the same statement as the tables
+        removed_ids = select(Table.id).where(
+            Table.event_id == event_id, Table.id.not_in(table_ids)
+        )
+        removed_seats = (
+            delete(Seat)
+            .where(Seat.table_id.in_(removed_ids))
+            .returning(Seat.id)
+            .cte("removed_seats")
+        )
+        await session.exec(
+            delete(Table)
+            .where(Table.event_id == event_id, Table.id.not_in(table_ids))
+            .add_cte(removed_seats)
+        )
+
+        await session.commit()
+        await mark_write(user_id)
+        spatial_indexes.set(event_id, grid)
+        await invalidate_event(event_id, session)
+        return tables, version
+    except HTTPException:
+        raise
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unexpected error occurred while saving layout.",
+        )
+    except Exception:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Unexpected error occurred while saving layout.",
+        )
@@ -0,0 +1,177 @@
+import uuid
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION, INTEGER, UUID
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.schemas.schema import Seat, Table
+
+# distance between a table's edge and the centre of its chairs
+SEAT_DISTANCE = 20.0
+
+CURVED_SHAPES = ("round", "circle", "oval", "ellipse")
+
+
+class SeatPositions(NamedTuple):
+    """One entry per seat, ordered by table then seat number."""
+
+    table_index: np.ndarray
+    seat_number: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+
+
+def _seat_ranks(counts: np.ndarray) -> tuple:
+    table_index = np.repeat(np.arange(len(counts)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return table_index, np.arange(len(table_index)) - starts
+
+
+def _curved(cx, cy, rx, ry, counts):
+    table, rank = _seat_ranks(counts)
+    # the first chair sits at twelve o'clock
+    angle = 2 * np.pi * rank / counts[table] - np.pi / 2
+    return table, rank, cx[table] + rx[table] * np.cos(angle), cy[table] + ry[table] * np.sin(angle)
+
+
+def _polygon(vertices: np.ndarray, counts: np.ndarray):
+    """Spreads chairs evenly along the perimeter of ``(n, v, 2)`` polygons."""
+    edges = np.roll(vertices, -1, axis=1) - vertices
+    lengths = np.linalg.norm(edges, axis=2)
+    walked = np.concatenate(
+        [np.zeros((len(vertices), 1)), np.cumsum(lengths, axis=1)], axis=1
+    )
+    table, rank = _seat_ranks(counts)
+    distance = (rank + 0.5) / counts[table] * walked[table, -1]
+    edge = np.minimum(
+        (walked[table, 1:] <= distance[:, None]).sum(axis=1), vertices.shape[1] - 1
+    )
+    fraction = (distance - walked[table, edge]) / np.maximum(lengths[table, edge], 1e-9)
+    points = vertices[table, edge] + fraction[:, None] * edges[table, edge]
+    return table, rank, points[:, 0], points[:, 1]
+
+
+def seat_positions(
+    shapes: Sequence[str],
+    x: Sequence[float],
+    y: Sequence[float],
+    width: Sequence[float | None],
+    height: Sequence[float | None],
+    seats: Sequence[int],
+) -> SeatPositions:
+    """Chair positions of many tables at once, one array pass per shape family.
+
+    Tables are described like ``tables`` rows: ``(x, y)`` is the top-left
+    corner of the bounding box.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    w = np.nan_to_num(np.asarray(width, dtype=float))
+    h = np.nan_to_num(np.asarray(height, dtype=float))
+    counts = np.maximum(np.asarray(seats, dtype=np.int64), 0)
+    shapes_ = np.array([shape.lower() for shape in shapes], dtype=object)
+    cx, cy = x + w / 2, y + h / 2
+
+    families = {
+        "curved": np.isin(shapes_, CURVED_SHAPES),
+        "triangle": shapes_ == "triangle",
+    }
+    families["rectangle"] = ~(families["curved"] | families["triangle"])
+
+    parts = []
+    for family, mask in families.items():
+        index = np.flatnonzero(mask & (counts > 0))
+        if index.size == 0:
+            continue
+        n = counts[index]
+        if family == "curved":
+            rx, ry = w[index] / 2, h[index] / 2
+            # round tables are circles with the smaller side as diameter
+            round_ = np.isin(shapes_[index], ("round", "circle"))
+            radius = np.minimum(rx, ry)
+            rx = np.where(round_, radius, rx) + SEAT_DISTANCE
+            ry = np.where(round_, radius, ry) + SEAT_DISTANCE
+            table, rank, sx, sy = _curved(cx[index], cy[index], rx, ry, n)
+        else:
+            left, top = x[index] - SEAT_DISTANCE, y[index] - SEAT_DISTANCE
+            right = x[index] + w[index] + SEAT_DISTANCE
+            bottom = y[index] + h[index] + SEAT_DISTANCE
+            if family == "triangle":
+                corners = [(cx[index], top), (right, bottom), (left, bottom)]
+            else:
+                corners = [(left, top), (right, top), (right, bottom), (left, bottom)]
+            vertices = np.stack([np.column_stack(corner) for corner in corners], axis=1)
+            table, rank, sx, sy = _polygon(vertices, n)
+        parts.append((index[table], rank + 1, sx, sy))
+
+    if not parts:
+        empty = np.zeros(0)
+        return SeatPositions(empty.astype(np.int64), empty.astype(np.int64), empty, empty)
+
+    table_index, seat_number, sx, sy = (np.concatenate(column) for column in zip(*parts))
+    order = np.lexsort((seat_number, table_index))
+    return SeatPositions(
+        table_index[order],
+        seat_number[order],
+        # seats share the canvas' non-negative coordinates
+        np.maximum(sx[order], 0.0),
+        np.maximum(sy[order], 0.0),
+    )
+
+
+async def regenerate_seats(tables: List[Table], session: AsyncSession) -> None:
+    """Rewrites the seats of ``tables`` in one statement.
+
+    Existing seats keep their id and guest and only move; missing seat
+    numbers are inserted and seats beyond the table's count are removed.
+    """
+    if not tables:
+        return
+    positions = seat_positions(
+        [table.shape for table in tables],
+        [table.x for table in tables],
+        [table.y for table in tables],
+        [table.width for table in tables],
+        [table.height for table in tables],
+        [table.seats for table in tables],
+    )
+    table_ids = [tables[i].id for i in positions.table_index]
+    layout = func.unnest(
+        bindparam("seat_ids", [uuid.uuid4() for _ in table_ids], type_=ARRAY(UUID(as_uuid=True))),
+        bindparam("table_ids", table_ids, type_=ARRAY(UUID(as_uuid=True))),
+        bindparam("seat_numbers", positions.seat_number.tolist(), type_=ARRAY(INTEGER)),
+        bindparam("xs", positions.x.tolist(), type_=ARRAY(DOUBLE_PRECISION)),
+        bindparam("ys", positions.y.tolist(), type_=ARRAY(DOUBLE_PRECISION)),
+    ).table_valued("id", "table_id", "seat_number", "x", "y").render_derived(
+        name="layout"
+    )
+
+    seats = Seat.__table__
+    same_seat = and_(
+        seats.c.table_id == layout.c.table_id,
+        seats.c.seat_number == layout.c.seat_number,
+    )
+    # every CTE sees the seats as they were before the statement
+    moved = (
+        update(seats)
+        .values(x=layout.c.x, y=layout.c.y)
+        .where(same_seat)
+        .returning(seats.c.id)
+        .cte("moved")
+    )
+    removed = (
+        delete(seats)
+        .where(
+            seats.c.table_id.in_([table.id for table in tables]),
+            ~exists().where(same_seat),
+        )
+        .returning(seats.c.id)
+        .cte("removed")
+    )
+    added = insert(seats).from_select(
+        ["id", "table_id", "seat_number", "x", "y"],
+        select(layout.c.id, layout.c.table_id, layout.c.seat_number, layout.c.x, layout.c.y)
+        .where(~exists().where(same_seat)),
+    )
+    await session.exec(added.add_cte(moved).add_cte(removed))
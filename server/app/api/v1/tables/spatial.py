@@ -0,0 +1,200 @@
+import math
+from typing import Dict, Hashable, Iterator, List, Set, Tuple
+
+import numpy as np
+
+Bounds = Tuple[float, float, float, float]
+
+# curved tables are approximated by this many vertices
+CURVE_SEGMENTS = 32
+_EPSILON = 1e-9
+# tables covering more cells than this are kept out of the cells and
+# checked by every query instead
+MAX_TABLE_CELLS = 1024
+
+
+def table_outline(shape: str, x: float, y: float, width: float, height: float) -> np.ndarray:
+    """Convex outline of a table whose bounding box starts at (x, y).
+
+    Round tables are circles with the smaller side as diameter, oval
+    tables fill their box, triangles point up.
+    """
+    width, height = width or 0.0, height or 0.0
+    cx, cy = x + width / 2, y + height / 2
+    shape = shape.lower()
+    if shape in ("round", "circle", "oval", "ellipse"):
+        rx, ry = width / 2, height / 2
+        if shape in ("round", "circle"):
+            rx = ry = min(rx, ry)
+        angles = np.linspace(0, 2 * np.pi, CURVE_SEGMENTS, endpoint=False)
+        return np.column_stack([cx + rx * np.cos(angles), cy + ry * np.sin(angles)])
+    if shape == "triangle":
+        return np.array([[cx, y], [x + width, y + height], [x, y + height]])
+    return np.array(
+        [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+    )
+
+
+def outline_bounds(outline: np.ndarray) -> Bounds:
+    (min_x, min_y), (max_x, max_y) = outline.min(axis=0), outline.max(axis=0)
+    return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+def _axes(outline: np.ndarray) -> np.ndarray:
+    edges = np.roll(outline, -1, axis=0) - outline
+    return np.column_stack([-edges[:, 1], edges[:, 0]])
+
+
+def outlines_overlap(a: np.ndarray, b: np.ndarray) -> bool:
+    """Separating axis test; tables that only touch do not overlap."""
+    axes = np.vstack([_axes(a), _axes(b)])
+    projected_a, projected_b = a @ axes.T, b @ axes.T
+    lengths = np.linalg.norm(axes, axis=1)
+    valid = lengths > _EPSILON
+    gap = np.maximum(
+        projected_b.min(axis=0) - projected_a.max(axis=0),
+        projected_a.min(axis=0) - projected_b.max(axis=0),
+    )
+    if not valid.any():
+        return False
+    return bool((gap[valid] / lengths[valid] < -_EPSILON).all())
+
+
+def distance_to_outline(outline: np.ndarray, px: float, py: float) -> float:
+    point = np.array([px, py])
+    start, end = outline, np.roll(outline, -1, axis=0)
+    edges = end - start
+    # the point is inside a convex polygon when it is on the same side of
+    # every edge; a zero-area outline (a point or a line) has no inside
+    area = abs((start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1]).sum()) / 2
+    cross = edges[:, 0] * (py - start[:, 1]) - edges[:, 1] * (px - start[:, 0])
+    if area > _EPSILON and ((cross >= 0).all() or (cross <= 0).all()):
+        return 0.0
+    lengths = np.maximum((edges**2).sum(axis=1), _EPSILON)
+    t = np.clip(((point - start) * edges).sum(axis=1) / lengths, 0, 1)
+    closest = start + t[:, None] * edges
+    return float(np.sqrt(((closest - point) ** 2).sum(axis=1)).min())
+
+
+class SpatialGrid:
+    """Uniform-grid index of table outlines.
+
+    Each table is registered in the cells its bounding box covers, so an
+    insert, move or overlap check only looks at a handful of cells no
+    matter how many tables the venue has. The few tables too large for
+    that sit in one oversized bucket that every query includes.
+    """
+
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._outlines: Dict[Hashable, np.ndarray] = {}
+        self._bounds: Dict[Hashable, Bounds] = {}
+        self._oversized: Set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._outlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._outlines
+
+    def _cell_count(self, bounds: Bounds) -> int:
+        min_x, min_y, max_x, max_y = bounds
+        size = self.cell_size
+        return (math.floor(max_x / size) - math.floor(min_x / size) + 1) * (
+            math.floor(max_y / size) - math.floor(min_y / size) + 1
+        )
+
+    def _cells_of(self, bounds: Bounds) -> Iterator[Tuple[int, int]]:
+        min_x, min_y, max_x, max_y = bounds
+        size = self.cell_size
+        for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+                yield cx, cy
+
+    def insert(self, key: Hashable, outline: np.ndarray) -> None:
+        if key in self._outlines:
+            self.remove(key)
+        bounds = outline_bounds(outline)
+        self._outlines[key] = outline
+        self._bounds[key] = bounds
+        if self._cell_count(bounds) > MAX_TABLE_CELLS:
+            self._oversized.add(key)
+            return
+        for cell in self._cells_of(bounds):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        bounds = self._bounds.pop(key, None)
+        if bounds is None:
+            return
+        del self._outlines[key]
+        if key in self._oversized:
+            self._oversized.discard(key)
+            return
+        for cell in self._cells_of(bounds):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._cells[cell]
+
+    # a move is a remove plus an insert; both only touch the table's cells
+    move = insert
+
+    def candidates(self, bounds: Bounds) -> Set[Hashable]:
+        if self._cell_count(bounds) > len(self._outlines):
+            # a huge query area: scanning every table is cheaper
+            return set(self._outlines)
+
+        found: Set[Hashable] = set(self._oversized)
+        for cell in self._cells_of(bounds):
+            found |= self._cells.get(cell, set())
+        return found
+
+    def overlapping(self, outline: np.ndarray, exclude: Hashable = None) -> List[Hashable]:
+        min_x, min_y, max_x, max_y = outline_bounds(outline)
+        hits = []
+        for key in self.candidates((min_x, min_y, max_x, max_y)):
+            if key == exclude:
+                continue
+            o_min_x, o_min_y, o_max_x, o_max_y = self._bounds[key]
+            if o_min_x >= max_x or o_max_x <= min_x or o_min_y >= max_y or o_max_y <= min_y:
+                continue
+            if outlines_overlap(outline, self._outlines[key]):
+                hits.append(key)
+        return hits
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[Tuple[Hashable, float]]:
+        bounds = (x - radius, y - radius, x + radius, y + radius)
+        hits = []
+        for key in self.candidates(bounds):
+            distance = distance_to_outline(self._outlines[key], x, y)
+            if distance <= radius:
+                hits.append((key, distance))
+        return sorted(hits, key=lambda hit: hit[1])
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[Hashable, float]]:
+        if not self._outlines:
+            return []
+        # grow the search ring until it holds k tables and nothing outside
+        # the ring can be closer than the k-th hit
+        radius = self.cell_size
+        while True:
+            hits = self.within_radius(x, y, radius)
+            if len(hits) >= min(k, len(self._outlines)):
+                return hits[:k]
+            radius *= 2
+
+
+def find_overlaps(
+    grid: SpatialGrid, tables: List[Tuple[Hashable, str, float, float, float, float]]
+) -> List[Tuple[Hashable, Hashable]]:
+    """Inserts ``(key, shape, x, y, width, height)`` rows into ``grid`` and
+    returns every overlapping pair."""
+    pairs = []
+    for key, shape, x, y, width, height in tables:
+        outline = table_outline(shape, x, y, width, height)
+        pairs.extend((other, key) for other in grid.overlapping(outline, exclude=key))
+        grid.insert(key, outline)
+    return pairs
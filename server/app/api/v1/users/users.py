@@ -6,8 +6,11 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.cors.dependencies.base import (
     get_current_user,
+    CurrentUser,
     FirebaseClaims,
     get_firebase_claims,
+    invalidate_current_user,
+    revocation_watcher,
 )
 from app.db import get_session
 from app.schemas.request import CreateUserRequest
@@ -18,7 +21,7 @@ user_router = APIRouter()
 
 
 @user_router.get("/me", response_model=UserResponse)
-async def get_user(current_user: User = Depends(get_current_user)):
+async def get_user(current_user: CurrentUser = Depends(get_current_user)):
     return current_user
 
 
@@ -45,6 +48,7 @@ async def create_user(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unexpected error occurred while creating user.",
         )
+    invalidate_current_user(claims.uid)
     return db_user
 
 
@@ -52,7 +56,7 @@ async def create_user(
 async def delete_user(
     user_id: uuid.UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     db_user = await session.get(User, user_id)
 
@@ -69,5 +73,7 @@ async def delete_user(
 
     await session.delete(db_user)
     await session.commit()
+    revocation_watcher.invalidate(db_user.firebase_uid)
+    invalidate_current_user(db_user.firebase_uid)
 
     return db_user
@@ -1,5 +1,5 @@
-from firebase_admin import credentials, initialize_app, App, _apps
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, Literal
 import pathlib
 
 
@@ -17,6 +17,93 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str | None = None
     FIREBASE_WEB_API_KEY: str | None = None
 
+    # database engine; unset pool options fall back to DB_POOL_PROFILE.
+    # DB_ECHO logs statements through the log queue, subject to sampling
+    DB_ECHO: bool = False
+    DB_POOL_PROFILE: Literal["development", "production"] = "development"
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_RECYCLE: int | None = None
+    DB_POOL_PRE_PING: bool | None = None
+    DB_POOL_TIMEOUT: float | None = None
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_CONNECTION_MODE: Literal["direct", "pgbouncer"] = "direct"
+    # optional read replica; reads stick to the primary for a user for
+    # DB_READ_YOUR_WRITES_WINDOW seconds after their own write
+    DB_REPLICA_URL: str | None = None
+    DB_READ_YOUR_WRITES_WINDOW: int = 5
+
+    # read-path response cache: "memory", "redis" (any RESP server) or "none"
+    RESPONSE_CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    RESPONSE_CACHE_URL: str | None = None
+    RESPONSE_CACHE_TTL: int = 30
+    RESPONSE_CACHE_SIZE: int = 10_000
+
+    # response compression; brotli is used when installed and accepted
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # logging goes through a bounded queue drained by a background thread;
+    # LOG_SAMPLE_RATES keeps a share of the records of noisy loggers
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_SAMPLE_RATES: Dict[str, float] = {"sqlalchemy.engine": 0.01}
+
+    # production server (app/server.py); SERVER_WORKERS defaults to one
+    # worker per core, and more than one needs the redis response cache,
+    # which also carries the read-your-writes marks and live sessions
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+    # a worker whose event loop misses heartbeats this long is replaced
+    WORKER_HEARTBEAT_INTERVAL: float = 1.0
+    WORKER_HEARTBEAT_TIMEOUT: float = 30.0
+
+    # Prometheus metrics at /monitoring/metrics
+    METRICS_ENABLED: bool = True
+    # /monitoring/readyz answers from a report this many seconds old at most
+    READINESS_CACHE_TTL: float = 2.0
+    READINESS_TIMEOUT: float = 1.0
+
+    # keyset pagination of listings
+    PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+
+    # live layout editing
+    LIVE_BROADCAST_INTERVAL: float = 0.05
+    LIVE_PERSIST_INTERVAL: float = 1.0
+
+    # table placement index
+    TABLE_GRID_CELL_SIZE: float = 100.0
+    TABLE_INDEX_TTL: int = 30
+
+    # seating solver; restarts run in parallel, one per worker process.
+    # Under app/server.py the default is the cores divided by SERVER_WORKERS
+    SEATING_SOLVER_WORKERS: int | None = None
+
+    # guest CSV import; rows are validated and copied per chunk
+    GUEST_IMPORT_CHUNK_SIZE: int = 1_000
+    GUEST_IMPORT_MAX_ERRORS: int = 1_000
+    # longest accepted record, in characters; bounds the parse buffer
+    GUEST_IMPORT_MAX_RECORD_SIZE: int = 64 * 1024
+    # rows fetched per server-side cursor round trip when exporting
+    EXPORT_BATCH_SIZE: int = 1_000
+
+    # auth
+    FIREBASE_PROJECT_ID: str | None = None
+    FIREBASE_CERTS_REFRESH_MARGIN: int = 300
+    FIREBASE_REVOCATION_STALENESS: int = 60
+    FIREBASE_REVOCATION_REFRESH_INTERVAL: int = 30
+    FIREBASE_REVOCATION_ACTIVE_WINDOW: int = 600
+    CURRENT_USER_CACHE_TTL: int = 60
+    CURRENT_USER_CACHE_SIZE: int = 10_000
+    FIREBASE_CLAIMS_CACHE_TTL: int = 300
+    FIREBASE_CLAIMS_CACHE_SIZE: int = 10_000
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     @property
@@ -37,18 +124,22 @@ class Settings(BaseSettings):
 
 
 def init_firebase_admin_app():
+    """The default Firebase app, initialized on first use.
+
+    firebase_admin is only imported here, so importing the settings
+    neither loads it nor reads the service account.
+    """
+    from firebase_admin import _apps, credentials, get_app, initialize_app
+
+    if _apps:
+        return get_app()
+
     base_dir = pathlib.Path(__file__).resolve().parents[2]
     service_account_path = base_dir / "service-account.json"
     service_account = credentials.Certificate(service_account_path)
-    default_app: App | None = None
-
-    if not _apps:
-        default_app = initialize_app(
-            credential=service_account,
-        )
-
-    return default_app
+    return initialize_app(
+        credential=service_account,
+    )
 
 
-firebase = init_firebase_admin_app()
 settings = Settings()
@@ -1,14 +1,25 @@
+import hashlib
+import time
+import uuid
+from typing import AsyncGenerator
+
 from fastapi import HTTPException, status, Depends
-from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from firebase_admin import auth
-import google.auth.exceptions
-from pydantic import EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from sqlmodel import SQLModel
 from typing import Dict, Any, cast
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db import get_session
+from app.config.settings import init_firebase_admin_app, settings
+from app.cors.cache import TTLCache
+from app.cors.firebase import (
+    FirebaseTokenVerifier,
+    KeySetUnavailable,
+    PublicKeySet,
+)
+from app.cors.metrics import auth_verification_duration
+from app.cors.revocation import RevocationWatcher
+from app.db import get_session, read_session_maker
 from app.schemas.schema import User
 from sqlmodel.sql.expression import SelectOfScalar
 
@@ -22,21 +33,102 @@ class FirebaseClaims(SQLModel):
     firebase: Dict[str, Any]
 
 
+class CurrentUser(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    id: uuid.UUID
+    firebase_uid: str
+    full_name: str
+    email: str
+
+
+claims_cache: TTLCache[FirebaseClaims] = TTLCache(
+    maxsize=settings.FIREBASE_CLAIMS_CACHE_SIZE,
+    ttl=settings.FIREBASE_CLAIMS_CACHE_TTL,
+)
+
+
+current_user_cache: TTLCache[CurrentUser] = TTLCache(
+    maxsize=settings.CURRENT_USER_CACHE_SIZE,
+    ttl=settings.CURRENT_USER_CACHE_TTL,
+)
+
+
+revocation_watcher = RevocationWatcher(
+    staleness=settings.FIREBASE_REVOCATION_STALENESS,
+    active_window=settings.FIREBASE_REVOCATION_ACTIVE_WINDOW,
+    refresh_interval=settings.FIREBASE_REVOCATION_REFRESH_INTERVAL,
+)
+_token_verifier: FirebaseTokenVerifier | None = None
+
+
+def get_token_verifier() -> FirebaseTokenVerifier:
+    global _token_verifier
+    if _token_verifier is None:
+        project_id = settings.FIREBASE_PROJECT_ID or init_firebase_admin_app().project_id
+        _token_verifier = FirebaseTokenVerifier(
+            project_id=project_id,
+            key_set=PublicKeySet(refresh_margin=settings.FIREBASE_CERTS_REFRESH_MARGIN),
+        )
+    return _token_verifier
+
+
+def current_key_set() -> PublicKeySet | None:
+    return _token_verifier.key_set if _token_verifier is not None else None
+
+
+async def close_auth_clients() -> None:
+    global _token_verifier
+    await revocation_watcher.aclose()
+    if _token_verifier is not None:
+        await _token_verifier.aclose()
+        _token_verifier = None
+
+
+def _auth_unavailable_errors() -> tuple:
+    # only evaluated when verification fails, so firebase_admin and
+    # google.auth stay out of the import of this module
+    import firebase_admin.exceptions
+    import google.auth.exceptions
+
+    return (
+        KeySetUnavailable,
+        firebase_admin.exceptions.UnavailableError,
+        google.auth.exceptions.TransportError,
+    )
+
+
+def _token_cache_key(id_token: str) -> str:
+    return hashlib.sha256(id_token.encode()).hexdigest()
+
+
 async def decode_firebase_token(id_token: str) -> FirebaseClaims:
+    cache_key = _token_cache_key(id_token)
+    started = time.perf_counter()
+    result = "cached"
     try:
-        decoded: dict = await run_in_threadpool(
-            auth.verify_id_token,
-            id_token,
-            check_revoked=True,
-        )
-    except google.auth.exceptions.TransportError:
+        claims = claims_cache.get(cache_key)
+        if claims is None:
+            result = "verified"
+            decoded = await get_token_verifier().verify(id_token)
+            claims = FirebaseClaims(**decoded)
+            claims_cache.set(cache_key, claims, expires_at=claims.exp)
+
+        # checked on cache hits too, so revocation is bounded by the
+        # watcher's staleness rather than the claims cache ttl
+        await revocation_watcher.ensure_not_revoked(claims.uid, claims.iat)
+    except _auth_unavailable_errors():
+        result = "unavailable"
         raise HTTPException(
             status.HTTP_503_SERVICE_UNAVAILABLE, "Auth service unreachable"
         )
     except Exception as e:
+        result = "rejected"
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, e.__str__())
+    finally:
+        auth_verification_duration.labels(result).observe(time.perf_counter() - started)
 
-    return FirebaseClaims(**decoded)
+    return claims
 
 
 auth_scheme = HTTPBearer(auto_error=False)
@@ -54,10 +146,18 @@ async def get_firebase_claims(
     return await decode_firebase_token(creds.credentials)
 
 
+def invalidate_current_user(firebase_uid: str) -> None:
+    current_user_cache.pop(firebase_uid)
+
+
 async def get_current_user(
     claims: FirebaseClaims = Depends(get_firebase_claims),
     session: AsyncSession = Depends(get_session),
-) -> User | None:
+) -> CurrentUser | None:
+    cached = current_user_cache.get(claims.uid)
+    if cached is not None and cached.email == claims.email:
+        return cached
+
     stmt = (
         select(User)
         .where(User.firebase_uid == claims.uid)
@@ -66,4 +166,18 @@ async def get_current_user(
 
     stmt_scalar: SelectOfScalar[User] = cast(SelectOfScalar[User], stmt)
     result = await session.exec(stmt_scalar)
-    return result.one_or_none()
+    user = result.one_or_none()
+    if user is None:
+        return None
+
+    current_user = CurrentUser.model_validate(user, from_attributes=True)
+    current_user_cache.set(claims.uid, current_user)
+    return current_user
+
+
+async def get_read_session(
+    current_user: CurrentUser | None = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    session_maker = await read_session_maker(current_user.id if current_user else None)
+    async with session_maker() as session:
+        yield session
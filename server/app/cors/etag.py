@@ -0,0 +1,52 @@
+from typing import List
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def version_etag(version: int, variant: str | None = None) -> str:
+    # each representation of a version needs its own strong tag
+    return f'"{version}+{variant}"' if variant else f'"{version}"'
+
+
+def _etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 when ``If-None-Match`` already names ``etag``."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    # If-None-Match uses the weak comparison
+    tags = [tag.removeprefix("W/") for tag in _etags(header)]
+    if "*" in tags or etag in tags:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+        )
+    return None
+
+
+def cache_headers(etag: str) -> dict:
+    # clients may keep the response but have to revalidate it every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def expected_version(request: Request) -> int | None:
+    """The version an ``If-Match`` request was based on, None without one."""
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    tags = _etags(header)
+    # a strong comparison: weak tags never match
+    if len(tags) != 1 or not (tags[0].startswith('"') and tags[0].endswith('"')):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match must name a single layout version",
+        )
+    try:
+        return int(tags[0][1:-1].partition("+")[0])
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match must name a single layout version",
+        )
@@ -0,0 +1,192 @@
+import asyncio
+import contextlib
+import re
+import time
+from typing import Any, Dict
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from cryptography.x509 import load_pem_x509_certificate
+
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class KeySetUnavailable(Exception):
+    pass
+
+
+class InvalidIdToken(Exception):
+    pass
+
+
+class PublicKeySet:
+    """Google's token signing certificates, kept in memory.
+
+    The set honours the ``Cache-Control: max-age`` of the certificate
+    endpoint and is refreshed by a background task ``refresh_margin``
+    seconds before it expires, so requests never wait on key rotation.
+    Passing ``keys`` pins a static PEM set and disables fetching, which
+    is how tests verify tokens offline.
+    """
+
+    def __init__(
+        self,
+        url: str = GOOGLE_CERTS_URL,
+        keys: Dict[str, str] | None = None,
+        refresh_margin: float = 300,
+        retry_interval: float = 30,
+        timeout: float = 5,
+    ):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.static = keys is not None
+        self.fetched_at: float | None = None
+        self.expires_at: float | None = None
+        self._keys: Dict[str, RSAPublicKey] = {}
+        self._lock = asyncio.Lock()
+        self._client: httpx.AsyncClient | None = None
+        self._refresher: asyncio.Task | None = None
+        if keys is not None:
+            self._keys = self._load(keys)
+            self.fetched_at = time.time()
+
+    @staticmethod
+    def _load(certs: Dict[str, str]) -> Dict[str, RSAPublicKey]:
+        keys = {}
+        for kid, pem in certs.items():
+            public_key = load_pem_x509_certificate(pem.encode()).public_key()
+            if isinstance(public_key, RSAPublicKey):
+                keys[kid] = public_key
+        return keys
+
+    @property
+    def is_fresh(self) -> bool:
+        if self.static:
+            return True
+        return self.expires_at is not None and self.expires_at > time.time()
+
+    async def get(self, kid: str) -> RSAPublicKey:
+        if not self._keys:
+            await self.refresh()
+        elif kid not in self._keys and not self.is_fresh:
+            # an unknown kid on a stale set usually means the keys rotated
+            await self.refresh()
+
+        self._ensure_refresher()
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidIdToken("ID token has an unknown signing key")
+        return key
+
+    async def refresh(self) -> None:
+        if self.static:
+            return
+
+        fetched_at = self.fetched_at
+        async with self._lock:
+            if self.fetched_at != fetched_at and self.is_fresh:
+                # another request refreshed the set while we waited
+                return
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=self.timeout)
+            try:
+                response = await self._client.get(self.url)
+                response.raise_for_status()
+                keys = self._load(response.json())
+            except (httpx.HTTPError, ValueError) as e:
+                if not self._keys:
+                    raise KeySetUnavailable(str(e)) from e
+                return
+
+            match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+            max_age = int(match.group(1)) if match else 0
+            self._keys = keys
+            self.fetched_at = time.time()
+            self.expires_at = self.fetched_at + max_age
+
+    def _ensure_refresher(self) -> None:
+        if self.static or (self._refresher and not self._refresher.done()):
+            return
+        self._refresher = asyncio.get_running_loop().create_task(
+            self._refresh_loop()
+        )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = self.retry_interval
+            if self.expires_at is not None:
+                delay = max(
+                    self.expires_at - self.refresh_margin - time.time(),
+                    self.retry_interval,
+                )
+            await asyncio.sleep(delay)
+            with contextlib.suppress(KeySetUnavailable):
+                await self.refresh()
+
+    async def aclose(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens against a ``PublicKeySet``.
+
+    Applies the same checks as ``firebase_admin.auth.verify_id_token``
+    without blocking the event loop on certificate fetches.
+    """
+
+    def __init__(self, project_id: str, key_set: PublicKeySet, leeway: int = 0):
+        self.project_id = project_id
+        self.key_set = key_set
+        self.leeway = leeway
+
+    async def verify(self, id_token: str) -> Dict[str, Any]:
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.PyJWTError as e:
+            raise InvalidIdToken(str(e)) from e
+
+        if header.get("alg") != "RS256":
+            raise InvalidIdToken("ID token has an incorrect algorithm")
+        kid = header.get("kid")
+        if not kid:
+            raise InvalidIdToken("ID token has no 'kid' claim")
+
+        key = await self.key_set.get(kid)
+        try:
+            decoded = jwt.decode(
+                id_token,
+                key=key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}",
+                leeway=self.leeway,
+                options={"require": ["exp", "iat", "sub", "aud", "iss"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidIdToken(str(e)) from e
+
+        subject = decoded["sub"]
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise InvalidIdToken("ID token has an invalid 'sub' claim")
+        if decoded.get("auth_time", 0) > time.time() + self.leeway:
+            raise InvalidIdToken("ID token has a future 'auth_time' claim")
+
+        decoded["uid"] = subject
+        return decoded
+
+    async def aclose(self) -> None:
+        await self.key_set.aclose()
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.cors.firebase import PublicKeySet
+from app.db import pool_status
+
+
+def pool_saturation(engine: AsyncEngine) -> Dict[str, Any]:
+    status = pool_status(engine)
+    capacity = status["size"] + max(status["max_overflow"], 0)
+    in_use = status["checked_out"]
+    return {
+        **status,
+        "saturation": round(in_use / capacity, 3) if capacity else 0.0,
+        "saturated": capacity > 0 and in_use >= capacity,
+    }
+
+
+def key_set_status(key_set: PublicKeySet | None) -> Dict[str, Any]:
+    if key_set is None:
+        # keys are fetched with the first token a worker verifies
+        return {"loaded": False, "fresh": False}
+    now = time.time()
+    return {
+        "loaded": key_set.fetched_at is not None,
+        "fresh": key_set.is_fresh,
+        "age": round(now - key_set.fetched_at, 1) if key_set.fetched_at else None,
+        "expires_in": round(key_set.expires_at - now, 1) if key_set.expires_at else None,
+    }
+
+
+class ReadinessProbe:
+    """``SELECT 1`` per engine plus pool and auth key state.
+
+    The report is kept for ``ttl`` seconds and concurrent probes share
+    one check, so a probe storm reaches Postgres at most once per
+    interval. Only an unreachable database makes the worker unready;
+    pool saturation and stale signing keys are reported for the
+    dashboards. The ping opens a connection of its own rather than
+    waiting for one of the pool, so a busy worker stays ready.
+    """
+
+    def __init__(
+        self,
+        engines: Callable[[], Dict[str, AsyncEngine]],
+        key_set: Callable[[], PublicKeySet | None],
+        ttl: float = 2.0,
+        timeout: float = 1.0,
+        connect_args: Dict[str, Any] | None = None,
+    ):
+        self.engines = engines
+        self.key_set = key_set
+        self.ttl = ttl
+        self.timeout = timeout
+        self.connect_args = connect_args or {}
+        self._probes: Dict[URL, AsyncEngine] = {}
+        self._report: Tuple[float, bool, Dict[str, Any]] | None = None
+        self._lock = asyncio.Lock()
+
+    def probe_engine(self, engine: AsyncEngine) -> AsyncEngine:
+        """An unpooled engine for ``engine``'s database."""
+        probe = self._probes.get(engine.url)
+        if probe is None:
+            probe = create_async_engine(
+                engine.url, poolclass=NullPool, connect_args=self.connect_args
+            )
+            self._probes[engine.url] = probe
+        return probe
+
+    async def _ping(self, engine: AsyncEngine) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self._select_one(self.probe_engine(engine)), self.timeout
+            )
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"no answer within {self.timeout}s"}
+        except Exception as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency": round(time.perf_counter() - started, 4)}
+
+    @staticmethod
+    async def _select_one(engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check(self) -> Tuple[bool, Dict[str, Any]]:
+        engines = self.engines()
+        names = list(engines)
+        pings = await asyncio.gather(*(self._ping(engines[name]) for name in names))
+        databases = {
+            name: {**ping, "pool": pool_saturation(engines[name])}
+            for name, ping in zip(names, pings)
+        }
+        ready = all(ping["ok"] for ping in pings)
+        return ready, {
+            "status": "ready" if ready else "unready",
+            "databases": databases,
+            "auth_keys": key_set_status(self.key_set()),
+        }
+
+    async def check(self) -> Tuple[bool, Dict[str, Any]]:
+        report = self._report
+        if report is not None and report[0] > time.monotonic():
+            return report[1], report[2]
+        async with self._lock:
+            # another probe may have refreshed it while this one waited
+            report = self._report
+            if report is not None and report[0] > time.monotonic():
+                return report[1], report[2]
+            ready, content = await self._check()
+            self._report = (time.monotonic() + self.ttl, ready, content)
+            return ready, content
@@ -0,0 +1,138 @@
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Mapping
+
+import orjson
+
+from app.cors.metrics import log_records_dropped
+
+# ID of the request the current task is serving, set by RequestIdMiddleware
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# attributes every LogRecord has; anything else came in through `extra`
+_RECORD_FIELDS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys() | {"message", "asctime"}
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields become keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document: Dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            document["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != "request_id":
+                document[key] = value
+        if record.exc_info:
+            document["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(document, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of the records of noisy loggers.
+
+    ``rates`` maps logger names to the share to keep; a name covers its
+    child loggers. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to a background thread without ever blocking.
+
+    Only the request ID is captured here; formatting happens on the
+    listener thread. When the queue is full the record is dropped and
+    counted.
+    """
+
+    def __init__(self, queue_: "queue.Queue[logging.LogRecord]"):
+        super().__init__(queue_)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            log_records_dropped.labels(record.name.partition(".")[0]).inc()
+
+
+class LogPipeline:
+    """Root logging through a bounded queue drained by one thread."""
+
+    def __init__(
+        self,
+        level: str = "INFO",
+        json: bool = True,
+        queue_size: int = 10_000,
+        sample_rates: Mapping[str, float] | None = None,
+        sql_echo: bool = False,
+    ):
+        self.level = level
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        self.handler.addFilter(SamplingFilter(sample_rates or {}))
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(
+            JsonFormatter()
+            if json
+            else logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+        self.listener = QueueListener(self.queue, output, respect_handler_level=True)
+        self.sql_echo = sql_echo
+        self._previous: List[logging.Handler] = []
+
+    def start(self) -> None:
+        root = logging.getLogger()
+        self._previous = root.handlers[:]
+        root.handlers = [self.handler]
+        root.setLevel(self.level)
+        if self.sql_echo:
+            # what echo=True logs, without its synchronous stdout handler
+            logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+        self.listener.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        root = logging.getLogger()
+        if self.handler in root.handlers:
+            root.handlers = self._previous
+        # QueueListener.stop waits for the queue forever; give up after
+        # timeout, the thread is a daemon
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if self.queue.empty():
+            self.listener.stop()
@@ -0,0 +1,209 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+registry = CollectorRegistry(auto_describe=True)
+
+# requests that did not match any route share one label, so scanners
+# can not blow up the label set
+UNMATCHED_ROUTE = "unmatched"
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE")
+)
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk",
+    ["route", "method", "status"],
+    registry=registry,
+)
+requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64),
+    registry=registry,
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time per request spent waiting on database statements",
+    ["route"],
+    registry=registry,
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Duration of single database statements",
+    ["engine"],
+    registry=registry,
+)
+db_pool_checkout_duration = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    registry=registry,
+)
+auth_verification_duration = Histogram(
+    "auth_verification_duration_seconds",
+    "Time spent verifying Firebase ID tokens",
+    ["result"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+    registry=registry,
+)
+log_records_dropped = Counter(
+    "log_records_dropped",
+    "Log records dropped because the log queue was full",
+    ["logger"],
+    registry=registry,
+)
+
+
+def exposition_registry() -> CollectorRegistry:
+    """What /monitoring/metrics serves: this process's registry, or all
+    workers' metrics when running under the multi-worker server."""
+    from prometheus_client import multiprocess, values
+
+    # decided when prometheus_client was first imported, so this is what
+    # the metrics of this process are actually written to
+    if values.ValueClass is values.MutexValue:
+        return registry
+
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+
+
+# statistics of the request the current task is serving
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    # route IDs come from custom_generate_unique_id: "<tag>-<name>"
+    return getattr(route, "unique_id", None) or getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight requests and database use per route.
+
+    Everything is kept in process memory; a scrape of /monitoring/metrics
+    reads it without touching the request path.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # labelled children, looked up once instead of on every request
+        self._in_flight: Dict[str, Any] = {}
+        self._observers: Dict[Tuple[str, str, int], Tuple[Any, Any, Any]] = {}
+
+    def _observers_of(self, route: str, method: str, status_code: int) -> Tuple[Any, Any, Any]:
+        key = (route, method, status_code)
+        observers = self._observers.get(key)
+        if observers is None:
+            observers = self._observers[key] = (
+                request_duration.labels(route, method, str(status_code)),
+                request_db_queries.labels(route),
+                request_db_duration.labels(route),
+            )
+        return observers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        status_code = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = self._in_flight.get(method)
+        if in_flight is None:
+            in_flight = self._in_flight[method] = requests_in_flight.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            request_stats.reset(token)
+            duration, queries, db_time = self._observers_of(
+                route_name(scope), method, status_code
+            )
+            duration.observe(elapsed)
+            queries.observe(stats.queries)
+            db_time.observe(stats.db_time)
+
+
+def _before_execute(conn: Any, *_: Any) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Times every statement of ``engine`` and adds it to the current
+    request's statistics."""
+    query_duration = db_query_duration.labels(name)
+
+    def after_execute(conn: Any, *_: Any) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        query_duration.observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    def on_error(context: Any) -> None:
+        # a failed statement never reaches after_cursor_execute
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_execute)
+    event.listen(sync_engine, "handle_error", on_error)
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        # only the wait for an idle connection; opening a new one and the
+        # pre-ping happen after this returns
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool that reports how long each checkout waited for a connection."""
+
+    _queue_class = _TimedQueue
@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import tuple_
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.config.settings import settings
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# cursor of listings sorted by (created_at, id)
+CREATED_CURSOR = TypeAdapter(Tuple[datetime, uuid.UUID])
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """``?cursor=&limit=`` of a keyset-paginated listing.
+
+    The cursor is an opaque token holding the sort key of the last item
+    of the previous page.
+    """
+
+    cursor: str | None = None
+    limit: int = settings.PAGE_SIZE
+
+
+def page_params(default_limit: int = settings.PAGE_SIZE) -> Callable[..., PageParams]:
+    def dependency(
+        cursor: str | None = Query(default=None),
+        limit: int = Query(default=default_limit, ge=1, le=settings.MAX_PAGE_SIZE),
+    ) -> PageParams:
+        return PageParams(cursor, limit)
+
+    return dependency
+
+
+def encode_cursor(adapter: TypeAdapter, key: Tuple) -> str:
+    raw = json.dumps(adapter.dump_python(key, mode="json"), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(adapter: TypeAdapter, token: str | None) -> Tuple | None:
+    if token is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return adapter.validate_python(json.loads(raw))
+    except (binascii.Error, ValueError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def keyset(
+    stmt: Select,
+    columns: Sequence[ColumnElement],
+    after: Tuple | None,
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """Orders ``stmt`` by ``columns`` and starts it after the key ``after``.
+
+    One extra row is fetched to know whether there is a next page. The
+    row comparison lets Postgres seek straight into an index on the same
+    columns, so every page costs the same.
+    """
+    if after is not None:
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def page_of(
+    items: Sequence[T],
+    limit: int,
+    adapter: TypeAdapter,
+    key: Callable[[T], Tuple],
+) -> Tuple[List[T], str | None]:
+    items = list(items)
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(adapter, key(items[-1]))
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    # listings keep their plain list bodies; the next page is announced in
+    # a header
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def created_key(item: Any) -> Tuple:
+    return item.created_at, item.id
@@ -0,0 +1,337 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Protocol, Sequence, Tuple
+from urllib.parse import urlparse
+
+from pydantic import TypeAdapter
+
+from app.config.settings import settings
+from app.cors.cache import TTLCache
+
+TAG_PREFIX = "tag:"
+ENTRY_PREFIX = "cache:"
+
+
+class CacheBackendError(Exception):
+    pass
+
+
+class CacheBackend(Protocol):
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def aclose(self) -> None: ...
+
+
+class MemoryBackend:
+    """Entries in a process-local LRU; tag counters in a dict.
+
+    A counter is dropped once it has not been bumped for ``ttl``, when
+    every entry stored before its last bump has expired. Counter values
+    come from one clock shared by all tags, so a dropped tag that is
+    bumped again never repeats a value an older entry was stored under.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.entries: TTLCache[bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        # tag -> (counter, last bump); least recently bumped first
+        self.counters: Dict[str, Tuple[int, float]] = {}
+        self._clock = 0
+
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]:
+        values: List[bytes | None] = []
+        for key in keys:
+            if key.startswith(TAG_PREFIX):
+                counter = self.counters.get(key)
+                values.append(None if counter is None else str(counter[0]).encode())
+            else:
+                values.append(self.entries.get(key))
+        return values
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.entries.set(key, value)
+
+    async def incr(self, key: str) -> int:
+        now = time.monotonic()
+        while self.counters:
+            oldest = next(iter(self.counters))
+            if now - self.counters[oldest][1] < self.ttl:
+                break
+            del self.counters[oldest]
+        self._clock += 1
+        self.counters.pop(key, None)
+        self.counters[key] = (self._clock, now)
+        return self._clock
+
+    async def aclose(self) -> None:
+        self.entries.clear()
+
+
+class RedisBackend:
+    """Minimal RESP2 client: GET/MGET/SET EX/INCR over one connection.
+
+    Works against Redis or anything speaking its protocol (Valkey,
+    KeyDB, Dragonfly, a local stand-in in tests).
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        self.url = url
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", self.db)
+
+    async def _read(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("connection closed")
+        prefix, rest = line[:1], line[1:-2]
+        if prefix == b"+":
+            return rest.decode()
+        if prefix == b"-":
+            raise CacheBackendError(rest.decode())
+        if prefix == b":":
+            return int(rest)
+        if prefix == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if prefix == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [await self._read() for _ in range(length)]
+        raise CacheBackendError(f"unexpected reply {line!r}")
+
+    async def _roundtrip(self, *args: Any) -> Any:
+        parts = [str(arg).encode() if not isinstance(arg, bytes) else arg for arg in args]
+        command = b"*%d\r\n" % len(parts) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(part), part) for part in parts
+        )
+        self._writer.write(command)
+        await self._writer.drain()
+        return await self._read()
+
+    async def command(self, *args: Any) -> Any:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._roundtrip(*args), self.timeout)
+            except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                # drop the connection; the next command reconnects
+                await self._close()
+                raise CacheBackendError(str(e)) from e
+
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]:
+        return await self.command("MGET", *keys)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.command("SET", key, value, "EX", ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self.command("INCR", key)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.command("PUBLISH", channel, message)
+
+    async def listen(self, channel: str) -> AsyncIterator[bytes]:
+        """Yields the messages published on ``channel``.
+
+        Uses a connection of its own: a subscribed connection takes no
+        other commands. Raises CacheBackendError when it is lost.
+        """
+        subscriber = RedisBackend(self.url, self.timeout)
+        try:
+            await asyncio.wait_for(subscriber._connect(), self.timeout)
+            await asyncio.wait_for(subscriber._roundtrip("SUBSCRIBE", channel), self.timeout)
+            while True:
+                kind, _, message = await subscriber._read()
+                if kind == b"message":
+                    yield message
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            raise CacheBackendError(str(e)) from e
+        finally:
+            await subscriber._close()
+
+    async def _close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def aclose(self) -> None:
+        async with self._lock:
+            await self._close()
+
+
+class ResponseCache:
+    """Caches the results of read functions under invalidation tags.
+
+    Every tag has a counter. An entry remembers the counters of its tags
+    as they were *before* its query ran, and a hit is only served while
+    they are unchanged, so a write that commits while a read is in
+    flight can never be hidden by that read. Concurrent misses of one
+    key in this process share a single call.
+    """
+
+    def __init__(self, backend: CacheBackend | None, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def invalidate(self, *tags: str) -> None:
+        if self.backend is None:
+            return
+        for tag in tags:
+            try:
+                await self.backend.incr(TAG_PREFIX + tag)
+            except CacheBackendError:
+                self.errors += 1
+
+    def cached(
+        self,
+        namespace: str,
+        adapter: TypeAdapter,
+        tags: Callable[[Dict[str, Any]], Sequence[str]],
+        key_extra: str | None = None,
+    ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+        """Decorates an async read function taking a ``session`` argument.
+
+        ``tags`` derives the entry's tags from the call's arguments.
+        ``key_extra`` names a keyword argument the decorated function
+        accepts on top of its own; it only takes part in the key. Results
+        are stored as ``adapter`` JSON and every caller gets them
+        validated by it, on a miss too, never as ORM objects.
+        """
+
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                extra = kwargs.pop(key_extra, None) if key_extra is not None else None
+                if self.backend is None:
+                    return _validated(adapter, await func(*args, **kwargs))
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = {k: v for k, v in bound.arguments.items() if k != "session"}
+                if key_extra is not None:
+                    arguments[key_extra] = extra
+                digest = hashlib.sha1(repr(sorted(arguments.items())).encode()).hexdigest()
+                key = f"{ENTRY_PREFIX}{namespace}:{digest}"
+
+                while (inflight := self._inflight.get(key)) is not None:
+                    try:
+                        return await asyncio.shield(inflight)
+                    except asyncio.CancelledError:
+                        if not inflight.cancelled():
+                            raise
+                        # the request doing the call was cancelled, not
+                        # this one; take the call over
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                try:
+                    result = await self._lookup(
+                        key, list(tags(arguments)), adapter, func, args, kwargs
+                    )
+                    future.set_result(result)
+                    return result
+                except Exception as e:
+                    future.set_exception(e)
+                    # waiters get the exception; nobody else has to see it
+                    future.exception()
+                    raise
+                finally:
+                    del self._inflight[key]
+                    if not future.done():
+                        future.cancel()
+
+            return wrapper
+
+        return decorator
+
+    async def _lookup(self, key, tags, adapter, func, args, kwargs) -> Any:
+        try:
+            entry, *counters = await self.backend.get_many(
+                [key, *(TAG_PREFIX + tag for tag in tags)]
+            )
+        except CacheBackendError:
+            self.errors += 1
+            return _validated(adapter, await func(*args, **kwargs))
+
+        versions = [int(counter or 0) for counter in counters]
+        header = json.dumps(versions, separators=(",", ":")).encode()
+        if entry is not None:
+            stored, _, payload = entry.partition(b"\n")
+            if stored == header:
+                self.hits += 1
+                return adapter.validate_json(payload)
+
+        self.misses += 1
+        payload = adapter.dump_json(await func(*args, **kwargs))
+        try:
+            await self.backend.set(key, header + b"\n" + payload, self.ttl)
+        except CacheBackendError:
+            self.errors += 1
+        return adapter.validate_json(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+    async def aclose(self) -> None:
+        if self.backend is not None:
+            await self.backend.aclose()
+
+
+def _validated(adapter: TypeAdapter, result: Any) -> Any:
+    # what a cached entry would come back as
+    return adapter.validate_python(result, from_attributes=True)
+
+
+def create_backend() -> CacheBackend | None:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        if not settings.RESPONSE_CACHE_URL:
+            raise ValueError("RESPONSE_CACHE_URL is required for the redis backend")
+        return RedisBackend(settings.RESPONSE_CACHE_URL)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+    return None
+
+
+def user_tag(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def event_tag(event_id: Any) -> str:
+    return f"event:{event_id}"
+
+
+response_cache = ResponseCache(create_backend(), ttl=settings.RESPONSE_CACHE_TTL)
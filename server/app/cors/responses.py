@@ -0,0 +1,84 @@
+import datetime
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Type
+
+import msgpack
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _msgpack_default(value: Any) -> Any:
+    # the same text forms the JSON representation uses
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Can not pack {type(value).__name__}")
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """MessagePack is only sent to clients that ask for it explicitly."""
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        if media_type.lower() not in MSGPACK_MEDIA_TYPES:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def negotiated(
+    request: Request, content: Any, headers: Mapping[str, str] | None = None
+) -> Response:
+    response_class = MsgPackResponse if wants_msgpack(request) else ORJSONResponse
+    response = response_class(content, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def negotiated_json(
+    request: Request, document: str | bytes, headers: Mapping[str, str] | None = None
+) -> Response:
+    """Same as ``negotiated`` for content that already is JSON text."""
+    if wants_msgpack(request):
+        response: Response = MsgPackResponse(orjson.loads(document), headers=headers)
+    else:
+        response = Response(document, media_type="application/json", headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def dump_trusted(items: Iterable[Any], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Reads ``model``'s fields off ORM rows without validating them.
+
+    Only for rows fresh from our own typed columns, where validation
+    could not find anything; the encoders handle UUIDs and datetimes.
+    """
+    fields = tuple(model.model_fields)
+    rows = []
+    for item in items:
+        # loaded ORM columns and pydantic fields both live in __dict__;
+        # reading it directly skips the attribute instrumentation
+        state = item.__dict__
+        rows.append(
+            {field: state[field] if field in state else getattr(item, field) for field in fields}
+        )
+    return rows
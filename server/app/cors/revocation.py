@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import time
+from typing import Dict, Iterable, List, NamedTuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config.settings import init_firebase_admin_app
+
+
+class TokenState(NamedTuple):
+    fetched_at: float
+    valid_after: float | None
+    disabled: bool
+    exists: bool
+
+
+def _fetch_token_states(uids: List[str]) -> Dict[str, TokenState]:
+    from firebase_admin import auth
+
+    init_firebase_admin_app()
+    result = auth.get_users([auth.UidIdentifier(uid) for uid in uids])
+    now = time.time()
+    states = {
+        uid: TokenState(fetched_at=now, valid_after=None, disabled=False, exists=False)
+        for uid in uids
+    }
+    for user in result.users:
+        valid_after = user.tokens_valid_after_timestamp
+        states[user.uid] = TokenState(
+            fetched_at=now,
+            valid_after=valid_after / 1000 if valid_after else None,
+            disabled=user.disabled,
+            exists=True,
+        )
+    return states
+
+
+class RevocationWatcher:
+    """Per-uid cache of Firebase ``tokens_valid_after`` timestamps.
+
+    A request only calls Firebase when the uid's state is older than
+    ``staleness`` seconds. Uids seen within ``active_window`` seconds are
+    refreshed in batches by a background task, so active sessions stay
+    warm and a revoked session keeps working for at most ``staleness``
+    seconds.
+    """
+
+    batch_size = 100  # auth.get_users limit
+
+    def __init__(self, staleness: float, active_window: float, refresh_interval: float):
+        self.staleness = staleness
+        self.active_window = active_window
+        self.refresh_interval = refresh_interval
+        self._states: Dict[str, TokenState] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresher: asyncio.Task | None = None
+
+    async def ensure_not_revoked(self, uid: str, iat: int) -> None:
+        now = time.time()
+        self._last_seen[uid] = now
+        self._ensure_refresher()
+
+        state = self._states.get(uid)
+        if state is None or now - state.fetched_at > self.staleness:
+            state = await self._fetch(uid)
+
+        from firebase_admin import auth
+
+        if not state.exists:
+            raise auth.UserNotFoundError("No user record found for the given uid.")
+        if state.disabled:
+            raise auth.UserDisabledError("The user record is disabled.")
+        if state.valid_after is not None and iat < state.valid_after:
+            raise auth.RevokedIdTokenError("The Firebase ID token has been revoked.")
+
+    def invalidate(self, uid: str) -> None:
+        # forces the next request for this uid to ask Firebase again
+        self._states.pop(uid, None)
+
+    async def _fetch(self, uid: str) -> TokenState:
+        # concurrent requests for the same cold uid share one lookup
+        while (inflight := self._inflight.get(uid)) is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # the request doing the lookup was cancelled; take it over
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[uid] = future
+        try:
+            states = await run_in_threadpool(_fetch_token_states, [uid])
+            self._states.update(states)
+            future.set_result(states[uid])
+        except Exception as e:
+            future.set_exception(e)
+            # the waiting requests re-raise it; mark it retrieved here
+            future.exception()
+            raise
+        finally:
+            del self._inflight[uid]
+            if not future.done():
+                # cancelled: wake the waiters so one of them retries
+                future.cancel()
+        return states[uid]
+
+    def _active_uids(self) -> Iterable[str]:
+        cutoff = time.time() - self.active_window
+        for uid, seen_at in list(self._last_seen.items()):
+            if seen_at < cutoff:
+                del self._last_seen[uid]
+                self._states.pop(uid, None)
+            else:
+                yield uid
+
+    async def refresh_active(self) -> None:
+        stale_after = time.time() - self.refresh_interval
+        uids = [
+            uid
+            for uid in self._active_uids()
+            if uid not in self._states or self._states[uid].fetched_at < stale_after
+        ]
+        for i in range(0, len(uids), self.batch_size):
+            states = await run_in_threadpool(
+                _fetch_token_states, uids[i : i + self.batch_size]
+            )
+            self._states.update(states)
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher and not self._refresher.done():
+            return
+        self._refresher = asyncio.get_running_loop().create_task(
+            self._refresh_loop()
+        )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            with contextlib.suppress(Exception):
+                await self.refresh_active()
+
+    async def aclose(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
@@ -0,0 +1,85 @@
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List
+
+# pid, started_at, heartbeat per worker slot
+_FIELDS = 3
+
+
+class WorkerBoard:
+    """Shared-memory table of the workers of one server.
+
+    The supervisor creates it before forking. Each worker writes only
+    its own row, so no lock is needed, and any worker can read every row
+    to report on its siblings.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._values = multiprocessing.RawArray("d", size * _FIELDS)
+        self.slot: int | None = None
+
+    def claim(self, slot: int) -> None:
+        self.slot = slot
+        base = slot * _FIELDS
+        self._values[base] = os.getpid()
+        self._values[base + 1] = time.time()
+        self._values[base + 2] = 0.0
+
+    def beat(self) -> None:
+        if self.slot is not None:
+            self._values[self.slot * _FIELDS + 2] = time.time()
+
+    def pid(self, slot: int) -> int:
+        return int(self._values[slot * _FIELDS])
+
+    def heartbeat(self, slot: int) -> float:
+        return self._values[slot * _FIELDS + 2]
+
+    def rows(self, timeout: float) -> List[Dict[str, Any]]:
+        now = time.time()
+        rows = []
+        for slot in range(self.size):
+            pid, started_at, heartbeat = self._values[slot * _FIELDS : (slot + 1) * _FIELDS]
+            if not pid:
+                continue
+            age = now - heartbeat if heartbeat else None
+            rows.append(
+                {
+                    "slot": slot,
+                    "pid": int(pid),
+                    "uptime": round(now - started_at, 1),
+                    "heartbeat_age": round(age, 3) if age is not None else None,
+                    "healthy": age is not None and age < timeout,
+                }
+            )
+        return rows
+
+
+# set in each worker by the supervisor in app/server.py; None when the
+# app runs in a single process
+worker_board: WorkerBoard | None = None
+
+
+async def _beat(board: WorkerBoard, interval: float) -> None:
+    # written from the event loop, so a blocked loop stops the heartbeat
+    while True:
+        board.beat()
+        await asyncio.sleep(interval)
+
+
+def start_heartbeat(interval: float) -> asyncio.Task | None:
+    if worker_board is None:
+        return None
+    return asyncio.get_running_loop().create_task(_beat(worker_board, interval))
+
+
+async def stop_heartbeat(task: asyncio.Task | None) -> None:
+    if task is None:
+        return
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
@@ -1,20 +1,182 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import logging
+from typing import Any, AsyncGenerator, Dict, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel
-from app.config.settings import settings
+from app.config.settings import Settings, settings
+from app.cors.cache import TTLCache
+from app.cors.metrics import TimedQueuePool, instrument_engine
+from app.cors.response_cache import CacheBackendError, RedisBackend, response_cache
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-async_engine = create_async_engine(settings.db_url, echo=True)
+logger = logging.getLogger(__name__)
+
+POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "pool_timeout": 30,
+    },
+    # sized per uvicorn worker: workers * (pool_size + max_overflow) must
+    # stay below Postgres max_connections
+    "production": {
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "pool_timeout": 5,
+    },
+}
+
+
+def engine_options(settings_: Settings) -> Dict[str, Any]:
+    options = dict(POOL_PROFILES[settings_.DB_POOL_PROFILE])
+    overrides = {
+        "pool_size": settings_.DB_POOL_SIZE,
+        "max_overflow": settings_.DB_MAX_OVERFLOW,
+        "pool_recycle": settings_.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings_.DB_POOL_PRE_PING,
+        "pool_timeout": settings_.DB_POOL_TIMEOUT,
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+
+    if settings_.DB_CONNECTION_MODE == "pgbouncer":
+        # transaction pooling hands each transaction a different server
+        # connection, so named prepared statements can not be reused
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings_.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings_.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return {
+        **options,
+        "connect_args": connect_args,
+        # reports checkout waits to /monitoring/metrics
+        "poolclass": TimedQueuePool,
+    }
+
+
+class _LazySessionMaker(async_sessionmaker[AsyncSession]):
+    """Binds itself to the engines the first time a session is made."""
+
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        if _engines is None:
+            init_engines()
+        return super().__call__(**local_kw)
+
+
+async_session = _LazySessionMaker(class_=AsyncSession, expire_on_commit=False)
+
+async_read_session = _LazySessionMaker(class_=AsyncSession, expire_on_commit=False)
+
+# (primary, replica); the replica is the primary when none is configured.
+# Created by the lifespan, or on first use outside of the app
+_engines: Tuple[AsyncEngine, AsyncEngine] | None = None
+
+
+def init_engines() -> Tuple[AsyncEngine, AsyncEngine]:
+    global _engines
+    if _engines is None:
+        primary = create_async_engine(settings.db_url, **engine_options(settings))
+        instrument_engine(primary, "primary")
+        replica = primary
+        if settings.DB_REPLICA_URL:
+            replica = create_async_engine(settings.DB_REPLICA_URL, **engine_options(settings))
+            instrument_engine(replica, "replica")
+        async_session.configure(bind=primary)
+        async_read_session.configure(bind=replica)
+        _engines = (primary, replica)
+    return _engines
 
-async_session = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
+
+def get_engine() -> AsyncEngine:
+    return init_engines()[0]
+
+
+def engines() -> Dict[str, AsyncEngine]:
+    primary, replica = init_engines()
+    named = {"primary": primary}
+    if replica is not primary:
+        named["replica"] = replica
+    return named
+
+
+async def dispose_engines() -> None:
+    global _engines
+    if _engines is None:
+        return
+    primary, replica = _engines
+    _engines = None
+    await primary.dispose()
+    if replica is not primary:
+        await replica.dispose()
+
+
+# users who wrote within the read-your-writes window, as seen by this
+# process; with a replica and the redis cache they are kept in Redis as
+# well, so the next read sticks to the primary on any worker
+recent_writers: TTLCache[bool] = TTLCache(
+    maxsize=100_000, ttl=settings.DB_READ_YOUR_WRITES_WINDOW
 )
+WRITER_PREFIX = "writer:"
+
+
+def _shared_writers() -> RedisBackend | None:
+    backend = response_cache.backend
+    if settings.DB_REPLICA_URL and isinstance(backend, RedisBackend):
+        return backend
+    return None
+
+
+async def mark_write(user_id: UUID) -> None:
+    recent_writers.set(user_id, True)
+    if (backend := _shared_writers()) is not None:
+        try:
+            await backend.set(
+                f"{WRITER_PREFIX}{user_id}", b"1", settings.DB_READ_YOUR_WRITES_WINDOW
+            )
+        except CacheBackendError:
+            logger.warning("Could not share the write of user %s", user_id)
+
+
+async def read_session_maker(user_id: UUID | None) -> async_sessionmaker[AsyncSession]:
+    if user_id is None:
+        return async_read_session
+    if recent_writers.get(user_id):
+        return async_session
+    if (backend := _shared_writers()) is not None:
+        try:
+            (mark,) = await backend.get_many([f"{WRITER_PREFIX}{user_id}"])
+        except CacheBackendError:
+            # unsure whether the user just wrote; the primary is never stale
+            return async_session
+        if mark is not None:
+            return async_session
+    return async_read_session
+
+
+def pool_status(engine: AsyncEngine | None = None) -> Dict[str, Any]:
+    pool = (engine or get_engine()).pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": getattr(pool, "_max_overflow", 0),
+    }
 
 
 async def init_db() -> None:
-    async with async_engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
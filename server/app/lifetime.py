@@ -1,10 +1,45 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from typing import Awaitable, Callable, AsyncGenerator
 from fastapi import FastAPI
 
+from app.api.v1.events.live import live_sessions
+from app.api.v1.seating.models import shutdown_solver_pool
+from app.config.settings import init_firebase_admin_app, settings
+from app.cors.dependencies.base import close_auth_clients
+from app.cors.logs import LogPipeline
+from app.cors.response_cache import response_cache
+from app.cors.workers import start_heartbeat, stop_heartbeat
+from app.db import dispose_engines, init_engines
+
+
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    logs = LogPipeline(
+        level=settings.LOG_LEVEL,
+        json=settings.LOG_FORMAT == "json",
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sample_rates=settings.LOG_SAMPLE_RATES,
+        sql_echo=settings.DB_ECHO,
+    )
+    logs.start()
+    # created here rather than at import, so workers, test collection and
+    # alembic do not pay for clients they may never use
+    init_firebase_admin_app()
+    init_engines()
+    heartbeat = start_heartbeat(settings.WORKER_HEARTBEAT_INTERVAL)
     yield
-    # TODO: change to logging system
-    print("FastAPI is shutting down")
+    await stop_heartbeat(heartbeat)
+    await live_sessions.close()
+    shutdown_solver_pool()
+    await close_auth_clients()
+    await response_cache.aclose()
+    await dispose_engines()
+    logger.info("FastAPI is shutting down")
+    # last, so the records of the shutdown itself are written; draining the
+    # queue sleeps, so keep it off the event loop
+    await asyncio.to_thread(logs.stop)
@@ -2,9 +2,10 @@ from fastapi.routing import APIRoute
 from app.config.settings import settings
 from app.middleware import make_middleware
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.cors.exception.base import CustomException
 from app.api import router
+from app.lifetime import lifespan
 
 def on_auth_error(_request: Request, exc: Exception):
     status_code, error_code, message = 401, None, str(exc)
@@ -43,7 +44,9 @@ def create_app()-> FastAPI:
         docs_url=None if settings.ENVIRONMENT == "production" else "/docs",
         redoc_url=None if settings.ENVIRONMENT == "production" else "/redoc",
         generate_unique_id_function=custom_generate_unique_id,
-        middleware=make_middleware()
+        middleware=make_middleware(),
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
     init_routers(app_=app_)
     init_listeners(app_=app_)
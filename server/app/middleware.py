@@ -1,19 +1,140 @@
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware import Middleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import re
+import uuid
 from typing import List
 
+from app.config.settings import settings
+from app.cors.logs import request_id
+from app.cors.metrics import MetricsMiddleware
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always there
+    brotli = None
+
 origins = [r"https?:\/\/localhost:\d{4}"]
 
 def make_middleware() -> List[Middleware]:
     middleware = [
+        Middleware(RequestIdMiddleware),
         Middleware(
             CORSMiddleware,
             allow_origins=["*"],
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["ETag", "X-Next-Cursor", "X-Request-ID"],
+        ),
+        Middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
         ),
     ]
+    if settings.METRICS_ENABLED:
+        # outermost, so the latency covers the other middleware too
+        middleware.insert(0, Middleware(MetricsMiddleware))
     return middleware
 
 
+def _accepted_encodings(header: str) -> List[str]:
+    accepted = []
+    for part in header.split(","):
+        coding, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append(coding.lower())
+    return accepted
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # streamed chunks are flushed so clients see rows as they come
+        compressed = self.compressor.process(body)
+        if more_body:
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """gzip or brotli for responses of at least ``minimum_size`` bytes.
+
+    Brotli wins when the client accepts both; bodies that already carry a
+    Content-Encoding and event streams pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        responder: ASGIApp
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+# request IDs from upstream proxies are kept when they look sane
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+
+class RequestIdMiddleware:
+    """Tags the request with ``X-Request-ID`` for every log record it
+    emits, taking the caller's ID when it sent one."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id", "")
+        current = incoming if _REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id.set(current)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = current
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -1,6 +1,12 @@
 import uuid
+from typing import List, Tuple
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+
+# largest coordinate or table side accepted from clients, in canvas units
+MAX_CANVAS_SIZE = 100_000.0
+# chairs per table; every chair is a row and several solver array entries
+MAX_TABLE_SEATS = 100
 
 
 class CreateUserRequest(BaseModel):
@@ -24,5 +30,41 @@ class CreateTableRequest(BaseModel):
     width: int
     title: str
     shape: str
-    seats: int
+    seats: int = Field(ge=0, le=MAX_TABLE_SEATS)
     event_id: uuid.UUID
+
+
+class LayoutTableRequest(BaseModel):
+    id: uuid.UUID | None = None
+    name: str = "Table 1"
+    shape: str = "round"
+    seats: int = Field(default=4, ge=0, le=MAX_TABLE_SEATS)
+    x: float = Field(default=0.0, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    y: float = Field(default=0.0, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    width: float = Field(default=0.0, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+    height: float = Field(default=0.0, ge=0, le=MAX_CANVAS_SIZE, allow_inf_nan=False)
+
+
+class SaveLayoutRequest(BaseModel):
+    tables: List[LayoutTableRequest]
+
+
+class GuestImportRow(BaseModel):
+    first_name: str = Field(min_length=1)
+    last_name: str = Field(min_length=1)
+    email: EmailStr | None = None
+
+
+class SeatingPreference(BaseModel):
+    guest_id: uuid.UUID
+    table_id: uuid.UUID
+    weight: float = 1.0
+
+
+class SolveSeatingRequest(BaseModel):
+    # guests in one party must share a table
+    parties: List[List[uuid.UUID]] = []
+    keep_apart: List[Tuple[uuid.UUID, uuid.UUID]] = []
+    preferred_tables: List[SeatingPreference] = []
+    time_budget: float = Field(default=2.0, gt=0, le=30)
+    apply: bool = False
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import List
 
 from pydantic import BaseModel
 
@@ -14,13 +15,84 @@ class EventResponse(BaseModel):
     id: uuid.UUID
     title: str
     created_at: datetime
+    layout_version: int
 
 
 class TableResponse(BaseModel):
-    id: str
-    x: int
-    y: int
-    height: int
-    width: int
+    id: uuid.UUID
+    x: float
+    y: float
+    height: float | None
+    width: float | None
     shape: str
     name: str
+    seats: int
+
+
+class GuestSummaryResponse(BaseModel):
+    id: uuid.UUID
+    first_name: str
+    last_name: str
+    email: str | None
+
+
+class ChairResponse(BaseModel):
+    id: uuid.UUID
+    seat_number: int | None
+    x: float
+    y: float
+    guest: GuestSummaryResponse | None
+
+
+class FullTableResponse(TableResponse):
+    chairs: List[ChairResponse]
+
+
+class FullEventResponse(EventResponse):
+    tables: List[FullTableResponse]
+
+
+class TableDistanceResponse(BaseModel):
+    id: uuid.UUID
+    distance: float
+
+
+class GuestResponse(BaseModel):
+    id: uuid.UUID
+    first_name: str
+    last_name: str
+    email: str | None
+    created_at: datetime
+
+
+class GuestImportError(BaseModel):
+    row: int
+    field: str | None
+    message: str
+
+
+class GuestImportResponse(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[GuestImportError]
+    # the report stops after GUEST_IMPORT_MAX_ERRORS entries
+    truncated: bool = False
+
+
+class SeatAssignmentResponse(BaseModel):
+    guest_id: uuid.UUID
+    table_id: uuid.UUID | None
+    seat_id: uuid.UUID | None = None
+
+
+class SeatingScoreResponse(BaseModel):
+    total: float
+    preferences: float
+    violated_separations: int
+    unseated_guests: int
+
+
+class SeatingSolutionResponse(BaseModel):
+    assignments: List[SeatAssignmentResponse]
+    score: SeatingScoreResponse
+    applied: bool
@@ -1,7 +1,9 @@
 from sqlmodel import (
     SQLModel,
     Field,
+    BigInteger,
     Column,
+    Index,
     VARCHAR,
     TIMESTAMP,
     text,
@@ -15,6 +17,8 @@ from typing import List
 
 class UserEventLink(SQLModel, table=True):
     __tablename__ = "user_event_associations"
+    # the primary key covers lookups by user; this one lookups by event
+    __table_args__ = (Index("ix_user_event_associations_event_id", "event_id"),)
 
     user_id: UUID | None = Field(foreign_key="users.id", primary_key=True)
     event_id: UUID | None = Field(foreign_key="events.id", primary_key=True)
@@ -70,6 +74,11 @@ class Event(SQLModel, table=True):
     __tablename__ = "events"
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     title: str = Field()
+    # bumped by every write to the event, its tables or its seats
+    layout_version: int = Field(
+        default=0,
+        sa_column=Column(BigInteger, nullable=False, server_default=text("0")),
+    )
     created_at: datetime = Field(
         sa_column=Column(
             TIMESTAMP(timezone=True),
@@ -95,11 +104,17 @@ class Event(SQLModel, table=True):
 
 class Guest(SQLModel, table=True):
     __tablename__ = "guests"
+    __table_args__ = (
+        Index("ix_guests_event_id_created_at", "event_id", "created_at", "id"),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     first_name: str = Field()
     last_name: str = Field()
     email: EmailStr | None = Field(sa_column=Column("email", VARCHAR))
 
+    # relationship
+    event_id: UUID | None = Field(default=None, foreign_key="events.id")
+
     created_at: datetime = Field(
         sa_column=Column(
             TIMESTAMP(timezone=True),
@@ -119,6 +134,7 @@ class Guest(SQLModel, table=True):
 
 class Table(SQLModel, table=True):
     __tablename__ = "tables"
+    __table_args__ = (Index("ix_tables_event_id_name", "event_id", "name", "id"),)
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str = Field(default="Table 1")
@@ -139,6 +155,10 @@ class Table(SQLModel, table=True):
 
 class Seat(SQLModel, table=True):
     __tablename__ = "seats"
+    __table_args__ = (
+        Index("ix_seats_table_id_seat_number", "table_id", "seat_number"),
+        Index("ix_seats_guest_id", "guest_id"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     seat_number: int | None = Field(default=None)
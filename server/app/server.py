@@ -0,0 +1,279 @@
+"""Production server: one uvicorn worker per core under a small supervisor.
+
+The app is imported once in the supervisor and the workers are forked
+from it, so they start warm and share the imported code. With
+SO_REUSEPORT every worker accepts on its own socket and the kernel
+spreads connections evenly; without it the workers share one socket.
+On SIGTERM or SIGINT workers stop accepting, finish in-flight requests
+and run the lifespan shutdown, which disposes of their pools.
+
+More than one worker needs RESPONSE_CACHE_BACKEND=redis: the workers
+share the response cache, the read-your-writes marks and the live
+layout sessions through it, so any worker can serve any request.
+
+Start it with start-app or serve-app, never by importing app.main
+first: the metrics directory must be set before prometheus_client is
+imported.
+"""
+
+import contextlib
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from app.config.settings import settings
+
+logger = logging.getLogger("app.server")
+
+
+def reuseport_supported() -> bool:
+    # only Linux balances connections across SO_REUSEPORT sockets
+    return sys.platform.startswith("linux") and hasattr(socket, "SO_REUSEPORT")
+
+
+def _signal(pid: int, signum: int) -> None:
+    # the worker may have exited since it was last reaped
+    with contextlib.suppress(ProcessLookupError):
+        os.kill(pid, signum)
+
+
+def bind_socket(host: str, port: int, backlog: int, reuseport: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    def __init__(
+        self,
+        workers: int,
+        host: str,
+        port: int,
+        backlog: int = 2048,
+        graceful_timeout: float = 30,
+        heartbeat_timeout: float = 30,
+    ):
+        from app.cors.workers import WorkerBoard
+
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reuseport = reuseport_supported()
+        self.board = WorkerBoard(workers)
+        self.children: Dict[int, int] = {}  # pid -> slot
+        self.spawned_at: Dict[int, float] = {}
+        self.stopping = False
+        self._shared: socket.socket | None = None
+
+    def _socket(self) -> socket.socket:
+        if self.reuseport:
+            # a socket of its own for every (re)spawned worker
+            return bind_socket(self.host, self.port, self.backlog, reuseport=True)
+        if self._shared is None:
+            self._shared = bind_socket(self.host, self.port, self.backlog, reuseport=False)
+        return self._shared
+
+    def spawn(self, slot: int) -> None:
+        sock = self._socket()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._run_worker(slot, sock)
+                code = 0
+            finally:
+                os._exit(code)
+        if self.reuseport:
+            # the worker holds the socket now
+            sock.close()
+        self.children[pid] = slot
+        self.spawned_at[slot] = time.monotonic()
+
+    def _run_worker(self, slot: int, sock: socket.socket) -> None:
+        import uvicorn
+
+        from app.cors import workers
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self.board.claim(slot)
+        workers.worker_board = self.board
+
+        from app.main import app
+
+        config = uvicorn.Config(
+            app,
+            # uvloop and httptools when installed, asyncio and h11 otherwise
+            loop="auto",
+            http="auto",
+            lifespan="on",
+            backlog=self.backlog,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            # requests are measured by the metrics middleware
+            access_log=False,
+            log_config=None,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _stop(self, signum: int, _frame: object) -> None:
+        if self.stopping:
+            return
+        logger.info("Draining %d workers", len(self.children))
+        self.stopping = True
+        for pid in self.children:
+            _signal(pid, signal.SIGTERM)
+
+    def _reap(self) -> None:
+        from prometheus_client import multiprocess
+
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            slot = self.children.pop(pid, None)
+            if slot is None:
+                continue
+            multiprocess.mark_process_dead(pid)
+            if not self.stopping:
+                logger.warning(
+                    "Worker %d (pid %d) exited with %d, replacing it",
+                    slot,
+                    pid,
+                    os.waitstatus_to_exitcode(status),
+                )
+                self.spawn(slot)
+
+    def _check_heartbeats(self) -> None:
+        now_wall, now = time.time(), time.monotonic()
+        for pid, slot in list(self.children.items()):
+            heartbeat = self.board.heartbeat(slot)
+            if self.board.pid(slot) != pid:
+                # not claimed yet; give it the timeout to start up
+                heartbeat = 0.0
+            stale = (
+                now_wall - heartbeat > self.heartbeat_timeout
+                if heartbeat
+                else now - self.spawned_at[slot] > self.heartbeat_timeout
+            )
+            if stale:
+                logger.error("Worker %d (pid %d) stopped answering, killing it", slot, pid)
+                _signal(pid, signal.SIGKILL)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        logger.info(
+            "Serving on %s:%d with %d workers (%s)",
+            self.host,
+            self.port,
+            self.workers,
+            "SO_REUSEPORT" if self.reuseport else "shared socket",
+        )
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        while self.children and not self.stopping:
+            time.sleep(0.5)
+            self._reap()
+            self._check_heartbeats()
+
+        # drain: workers finish their requests and lifespan shutdown
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self._reap()
+        for pid in list(self.children):
+            logger.error("Worker pid %d did not drain in time, killing it", pid)
+            _signal(pid, signal.SIGKILL)
+        while self.children:
+            pid, _ = os.waitpid(-1, 0)
+            self.children.pop(pid, None)
+        if self._shared is not None:
+            self._shared.close()
+
+
+def check_workers(workers: int) -> None:
+    if workers == 1:
+        return
+    if settings.RESPONSE_CACHE_BACKEND != "redis":
+        raise SystemExit(
+            f"{workers} workers would each keep their own response cache, "
+            "read-your-writes marks and live sessions, and miss each other's "
+            "writes; set RESPONSE_CACHE_BACKEND=redis or SERVER_WORKERS=1"
+        )
+
+
+def solver_workers(workers: int) -> int:
+    # every server worker has its own solver pool; share the cores
+    return settings.SEATING_SOLVER_WORKERS or max(1, (os.cpu_count() or 1) // workers)
+
+
+def serve() -> None:
+    if "prometheus_client" in sys.modules:
+        raise RuntimeError(
+            "serve() must run before prometheus_client is imported; "
+            "start the server with start-app or serve-app"
+        )
+    # metrics of all workers are aggregated through files in this
+    # directory; it has to be set before prometheus_client is imported
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="wedding-table-metrics-")
+    )
+    for stale in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, stale))
+    # the supervisor logs plainly; workers set up the log pipeline in
+    # their lifespan
+    logging.basicConfig(
+        level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+
+    workers = settings.SERVER_WORKERS or os.cpu_count() or 1
+    check_workers(workers)
+    # read when the seating module is imported, so before the preload
+    settings.SEATING_SOLVER_WORKERS = solver_workers(workers)
+
+    # preload: every worker forks with the app already imported
+    import app.main  # noqa: F401
+
+    Supervisor(
+        workers=workers,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        backlog=settings.SERVER_BACKLOG,
+        graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+        heartbeat_timeout=settings.WORKER_HEARTBEAT_TIMEOUT,
+    ).run()
+
+
+def start() -> None:
+    """start-app: the multi-worker server in production, a reloading
+    development server otherwise. Does not import app.main itself."""
+    if settings.ENVIRONMENT == "production":
+        serve()
+        return
+
+    import uvicorn
+
+    uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
+
+
+def main() -> None:
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+from typing import Any, List
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from .api.v1.events.access import ensure_event_member, fetch_scoped
+from .schemas.schema import Table
+
+EVENT_ID, USER_ID = uuid.uuid4(), uuid.uuid4()
+
+
+class _Result:
+    def __init__(self, rows: List[Any]) -> None:
+        self.rows = rows
+
+    def all(self) -> List[Any]:
+        return self.rows
+
+    def first(self) -> Any:
+        return self.rows[0] if self.rows else None
+
+
+class _Session:
+    """Answers every statement with the next canned result."""
+
+    def __init__(self, *results: List[Any]) -> None:
+        self.info: dict = {}
+        self.results = list(results)
+        self.statements: List[str] = []
+
+    async def exec(self, stmt: Any) -> _Result:
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return _Result(self.results.pop(0))
+
+
+def _tables():
+    return select(Table).where(Table.event_id == EVENT_ID)
+
+
+def test_rows_prove_membership_in_the_same_statement() -> None:
+    session = _Session(["table"])
+
+    async def scenario():
+        rows = await fetch_scoped(_tables(), EVENT_ID, USER_ID, session)
+        # nested checks of the same request are answered from the memo
+        await ensure_event_member(EVENT_ID, USER_ID, session)
+        return rows
+
+    assert asyncio.run(scenario()) == ["table"]
+    assert len(session.statements) == 1
+    assert "EXISTS" in session.statements[0]
+
+
+def test_empty_result_is_told_apart_from_no_access() -> None:
+    member = _Session([], [True])
+    assert asyncio.run(fetch_scoped(_tables(), EVENT_ID, USER_ID, member)) == []
+    assert len(member.statements) == 2
+
+    stranger = _Session([], [])
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(fetch_scoped(_tables(), EVENT_ID, USER_ID, stranger))
+    assert e.value.status_code == 404
+
+
+def test_known_members_skip_the_exists_clause() -> None:
+    session = _Session([True], ["table"])
+
+    async def scenario():
+        await ensure_event_member(EVENT_ID, USER_ID, session)
+        return await fetch_scoped(_tables(), EVENT_ID, USER_ID, session)
+
+    assert asyncio.run(scenario()) == ["table"]
+    assert "EXISTS" not in session.statements[1]
@@ -0,0 +1,30 @@
+import time
+
+from .cors.cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction() -> None:
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_respects_earlier_deadline() -> None:
+    cache: TTLCache[str] = TTLCache(maxsize=10, ttl=60)
+    cache.set("expired", "token", expires_at=time.time() - 1)
+    cache.set("short", "token", expires_at=time.time() + 0.05)
+
+    assert cache.get("expired") is None
+    assert cache.get("short") == "token"
+    time.sleep(0.06)
+    assert cache.get("short") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Any, List
+
+import pytest
+
+from .api.v1.users.users import create_user, delete_user
+from .cors.dependencies.base import FirebaseClaims, current_user_cache, get_current_user
+from .schemas.request import CreateUserRequest
+from .schemas.schema import User
+
+UID = "firebase-uid"
+
+
+class _Result:
+    def __init__(self, user: User | None) -> None:
+        self.user = user
+
+    def one_or_none(self) -> User | None:
+        return self.user
+
+
+class _Session:
+    """Stands in for the user table with a single row."""
+
+    def __init__(self, user: User | None = None) -> None:
+        self.user = user
+        self.lookups: List[Any] = []
+
+    async def exec(self, stmt: Any) -> _Result:
+        self.lookups.append(stmt)
+        return _Result(self.user)
+
+    async def get(self, model: Any, id: Any) -> User | None:
+        return self.user if self.user is not None and self.user.id == id else None
+
+    def add(self, user: User) -> None:
+        self.user = user
+
+    async def delete(self, user: User) -> None:
+        self.user = None
+
+    async def commit(self) -> None:
+        pass
+
+    async def refresh(self, user: User) -> None:
+        pass
+
+
+def _claims(email: str = "ada@example.com") -> FirebaseClaims:
+    now = int(time.time())
+    return FirebaseClaims(uid=UID, email=email, iat=now, exp=now + 3600, firebase={})
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    current_user_cache.clear()
+    yield
+    current_user_cache.clear()
+
+
+def test_cached_user_skips_the_database() -> None:
+    session = _Session(User(firebase_uid=UID, full_name="Ada", email="ada@example.com"))
+
+    first = asyncio.run(get_current_user(_claims(), session))
+    second = asyncio.run(get_current_user(_claims(), session))
+
+    assert first == second
+    assert first.full_name == "Ada"
+    assert len(session.lookups) == 1
+
+
+def test_a_changed_email_is_looked_up_again() -> None:
+    session = _Session(User(firebase_uid=UID, full_name="Ada", email="ada@example.com"))
+    asyncio.run(get_current_user(_claims(), session))
+
+    asyncio.run(get_current_user(_claims("ada@example.org"), session))
+
+    assert len(session.lookups) == 2
+
+
+def test_unknown_users_are_not_cached() -> None:
+    session = _Session()
+    assert asyncio.run(get_current_user(_claims(), session)) is None
+
+    session.user = User(firebase_uid=UID, full_name="Ada", email="ada@example.com")
+
+    assert asyncio.run(get_current_user(_claims(), session)) is not None
+    assert len(session.lookups) == 2
+
+
+def test_create_user_invalidates_the_cached_user() -> None:
+    session = _Session(User(firebase_uid=UID, full_name="Old", email="ada@example.com"))
+    asyncio.run(get_current_user(_claims(), session))
+
+    payload = CreateUserRequest(full_name="Ada", email="ada@example.com")
+    asyncio.run(create_user(payload, _claims(), session))
+    current = asyncio.run(get_current_user(_claims(), session))
+
+    assert current.full_name == "Ada"
+    assert len(session.lookups) == 2
+
+
+def test_delete_user_invalidates_the_cached_user() -> None:
+    session = _Session(User(firebase_uid=UID, full_name="Ada", email="ada@example.com"))
+    current = asyncio.run(get_current_user(_claims(), session))
+
+    asyncio.run(delete_user(current.id, session, current))
+
+    assert current_user_cache.get(UID) is None
+    assert asyncio.run(get_current_user(_claims(), session)) is None
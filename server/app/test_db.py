@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+from . import db
+from .config.settings import settings
+from .cors.cache import TTLCache
+from .cors.metrics import TimedQueuePool
+from .cors.response_cache import RedisBackend
+from .db import POOL_PROFILES, engine_options, mark_write, read_session_maker
+from .test_response_cache import RespStandIn
+
+
+def _options(**overrides):
+    return engine_options(settings.model_copy(update=overrides))
+
+
+def test_unset_pool_options_come_from_the_profile() -> None:
+    options = _options(
+        DB_POOL_PROFILE="production",
+        DB_POOL_SIZE=None,
+        DB_MAX_OVERFLOW=None,
+        DB_POOL_RECYCLE=None,
+        DB_POOL_PRE_PING=None,
+        DB_POOL_TIMEOUT=None,
+    )
+
+    for name, value in POOL_PROFILES["production"].items():
+        assert options[name] == value
+    assert options["poolclass"] is TimedQueuePool
+
+
+def test_explicit_settings_override_the_profile() -> None:
+    options = _options(
+        DB_POOL_PROFILE="production",
+        DB_POOL_SIZE=3,
+        DB_MAX_OVERFLOW=0,
+        DB_POOL_RECYCLE=None,
+        DB_POOL_PRE_PING=False,
+        DB_POOL_TIMEOUT=None,
+    )
+
+    assert options["pool_size"] == 3
+    # falsy overrides still win over the profile
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is False
+    assert options["pool_recycle"] == POOL_PROFILES["production"]["pool_recycle"]
+    assert options["pool_timeout"] == POOL_PROFILES["production"]["pool_timeout"]
+
+
+def test_direct_connections_keep_the_statement_cache() -> None:
+    connect_args = _options(DB_CONNECTION_MODE="direct", DB_STATEMENT_CACHE_SIZE=50)[
+        "connect_args"
+    ]
+
+    assert connect_args == {"statement_cache_size": 50, "prepared_statement_cache_size": 50}
+
+
+def test_pgbouncer_disables_prepared_statement_reuse() -> None:
+    connect_args = _options(DB_CONNECTION_MODE="pgbouncer")["connect_args"]
+
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name = connect_args["prepared_statement_name_func"]
+    # every statement gets a fresh name so no two transactions collide
+    assert name() != name()
+    assert name().startswith("__asyncpg_")
+
+
+def test_recent_writers_read_from_the_primary(monkeypatch) -> None:
+    monkeypatch.setattr(db, "recent_writers", TTLCache(maxsize=10, ttl=0.05))
+    writer, reader = uuid.uuid4(), uuid.uuid4()
+
+    async def main() -> None:
+        await mark_write(writer)
+
+        assert await read_session_maker(writer) is db.async_session
+        assert await read_session_maker(reader) is db.async_read_session
+        assert await read_session_maker(None) is db.async_read_session
+
+        # back on the replica once the read-your-writes window has passed
+        await asyncio.sleep(0.06)
+        assert await read_session_maker(writer) is db.async_read_session
+
+    asyncio.run(main())
+
+
+def test_writes_stick_to_the_primary_on_every_worker(monkeypatch) -> None:
+    monkeypatch.setattr(db.settings, "DB_REPLICA_URL", "postgresql+asyncpg://replica/db")
+    monkeypatch.setattr(db, "recent_writers", TTLCache(maxsize=10, ttl=60))
+    writer = uuid.uuid4()
+
+    async def main() -> None:
+        stand_in = RespStandIn()
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        monkeypatch.setattr(db.response_cache, "backend", backend)
+        try:
+            await mark_write(writer)
+            assert f"writer:{writer}".encode() in stand_in.data
+
+            # another worker has not seen the write itself
+            db.recent_writers.clear()
+            assert await read_session_maker(writer) is db.async_session
+            assert await read_session_maker(uuid.uuid4()) is db.async_read_session
+
+            # Redis gone: unsure whether the user wrote, so the primary
+            await backend.aclose()
+            server.close()
+            await server.wait_closed()
+            assert await read_session_maker(uuid.uuid4()) is db.async_session
+        finally:
+            await backend.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from .cors.etag import expected_version, not_modified, version_etag
+
+
+def _request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def test_if_none_match_returns_304_for_the_current_version() -> None:
+    etag = version_etag(7)
+
+    response = not_modified(_request(if_none_match='"6", W/"7"'), etag)
+
+    assert response is not None and response.status_code == 304
+    assert response.headers["etag"] == '"7"'
+    assert not_modified(_request(if_none_match='"6"'), etag) is None
+    assert not_modified(_request(), etag) is None
+
+
+def test_if_match_names_the_expected_version() -> None:
+    assert expected_version(_request(if_match='"12"')) == 12
+    assert expected_version(_request(if_match="*")) is None
+    assert expected_version(_request()) is None
+
+
+@pytest.mark.parametrize("header", ['W/"12"', '"1", "2"', '"abc"'])
+def test_unusable_if_match_is_a_failed_precondition(header: str) -> None:
+    with pytest.raises(HTTPException) as e:
+        expected_version(_request(if_match=header))
+    assert e.value.status_code == 412
@@ -0,0 +1,171 @@
+"""The event document Postgres builds for ``/events/{id}/full``.
+
+Needs the Postgres at ``QUERY_PLAN_DATABASE_URL``, like the query-plan
+harness; skipped without it.
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Any, Dict
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config.settings import settings
+from .cors.dependencies.base import CurrentUser, get_current_user, get_read_session
+from .main import app
+from .schemas.response import FullEventResponse
+from .schemas.schema import Event, Guest, Seat, Table, User, UserEventLink
+
+DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+SCHEMA = "event_document_test"
+
+pytestmark = pytest.mark.skipif(
+    DATABASE_URL is None, reason="QUERY_PLAN_DATABASE_URL is not set"
+)
+
+MEMBER, STRANGER, EVENT_ID = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+HEAD, SIDE = uuid.uuid4(), uuid.uuid4()
+ANN = uuid.uuid4()
+CHAIRS = [uuid.uuid4() for _ in range(2)]
+
+
+def _engine():
+    # NullPool: the test client runs requests on an event loop of its own
+    return create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+
+
+async def _seed() -> None:
+    engine = _engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                User(id=MEMBER, firebase_uid="member", full_name="Ada", email="ada@example.com"),
+                User(id=STRANGER, firebase_uid="stranger", full_name="Eve", email="eve@example.com"),
+                Event(id=EVENT_ID, title="Wedding"),
+            ]
+        )
+        await session.flush()
+        session.add_all(
+            [
+                UserEventLink(user_id=MEMBER, event_id=EVENT_ID),
+                Guest(id=ANN, first_name="Ann", last_name="Lee", email=None, event_id=EVENT_ID),
+                # inserted out of name order
+                Table(id=SIDE, name="Side", shape="rectangle", seats=2, x=300, y=0, width=200, height=80, event_id=EVENT_ID),
+                Table(id=HEAD, name="Head", seats=2, x=0, y=0, width=100, height=100, event_id=EVENT_ID),
+            ]
+        )
+        await session.flush()
+        session.add_all(
+            [
+                Seat(id=CHAIRS[1], seat_number=2, x=50, y=120, table_id=HEAD),
+                Seat(id=CHAIRS[0], seat_number=1, x=50, y=0, table_id=HEAD, guest_id=ANN),
+            ]
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+async def _drop() -> None:
+    engine = _engine()
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def client():
+    asyncio.run(_seed())
+    engine = _engine()
+    current = {"user": MEMBER}
+
+    async def read_session():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=current["user"], firebase_uid="uid", full_name="Ada", email="ada@example.com"
+    )
+    app.dependency_overrides[get_read_session] = read_session
+    try:
+        yield TestClient(app), current
+    finally:
+        app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
+        asyncio.run(_drop())
+
+
+def _full(client: TestClient, **headers: str):
+    return client.get(f"{settings.api_versions['v1']}/events/{EVENT_ID}/full", headers=headers)
+
+
+def _document(client) -> Dict[str, Any]:
+    test_client, _ = client
+    response = _full(test_client)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_document_matches_the_response_model(client) -> None:
+    document = _document(client)
+
+    parsed = FullEventResponse.model_validate(document)
+    # same fields at every level; Postgres writes timestamps as +00:00
+    dumped = parsed.model_dump(mode="json")
+    assert dumped.keys() == document.keys()
+    assert dumped["tables"] == document["tables"]
+    assert parsed.id == EVENT_ID and parsed.title == "Wedding" and parsed.layout_version == 0
+
+
+def test_tables_are_ordered_by_name_and_chairs_by_number(client) -> None:
+    document = _document(client)
+
+    assert [table["id"] for table in document["tables"]] == [str(HEAD), str(SIDE)]
+    head, side = document["tables"]
+    assert [chair["seat_number"] for chair in head["chairs"]] == [1, 2]
+    assert side["chairs"] == []
+
+
+def test_empty_chairs_have_a_null_guest(client) -> None:
+    head = _document(client)["tables"][0]
+
+    assert head["chairs"][0]["guest"] == {
+        "id": str(ANN),
+        "first_name": "Ann",
+        "last_name": "Lee",
+        "email": None,
+    }
+    assert head["chairs"][1]["guest"] is None
+
+
+def test_msgpack_carries_the_same_document(client) -> None:
+    test_client, _ = client
+
+    response = _full(test_client, accept="application/msgpack")
+
+    assert response.headers["content-type"].startswith("application/msgpack")
+    assert msgpack.unpackb(response.content) == _document(client)
+
+
+def test_non_members_get_a_404(client) -> None:
+    test_client, current = client
+    current["user"] = STRANGER
+    try:
+        assert _full(test_client).status_code == 404
+    finally:
+        current["user"] = MEMBER
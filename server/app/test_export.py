@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import uuid
+from typing import Any, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from .api.v1.guests import models
+from .config.settings import settings
+from .cors.dependencies.base import CurrentUser, get_current_user, get_read_session
+from .main import app
+
+EVENT_ID = uuid.uuid4()
+GUEST_ID, TABLE_ID, SEAT_ID = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+ROWS = [
+    (GUEST_ID, "Ann", "Lee, Jr.", "ann@example.com", TABLE_ID, "Family", SEAT_ID, 1),
+    (uuid.uuid4(), "Bob", 'Ray "Bobby"', None, None, None, None, None),
+]
+
+
+class _Stream:
+    async def partitions(self):
+        # two server-side cursor batches
+        yield ROWS[:1]
+        yield ROWS[1:]
+
+
+class _ExportSession:
+    async def __aenter__(self) -> "_ExportSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def stream(self, stmt: Any) -> _Stream:
+        return _Stream()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def member(*args):
+        return None
+
+    monkeypatch.setattr(models, "ensure_event_member", member)
+    async def session_maker(user_id):
+        return _ExportSession
+
+    monkeypatch.setattr(models, "read_session_maker", session_maker)
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=uuid.uuid4(), firebase_uid="uid", full_name="Ada", email="ada@example.com"
+    )
+    app.dependency_overrides[get_read_session] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _export(client: TestClient, *query: str):
+    url = f"{settings.api_versions['v1']}/events/{EVENT_ID}/export/seating"
+    return client.get(url + "".join(query))
+
+
+def test_csv_export_has_a_header_and_quotes_fields(client) -> None:
+    response = _export(client)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f'seating-{EVENT_ID}.csv"' in response.headers["content-disposition"]
+    rows: List[List[str]] = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(models.EXPORT_COLUMNS)
+    assert rows[1] == [
+        str(GUEST_ID), "Ann", "Lee, Jr.", "ann@example.com", str(TABLE_ID), "Family", str(SEAT_ID), "1"
+    ]
+    # unseated guests have empty seat columns
+    assert rows[2][1:] == ["Bob", 'Ray "Bobby"', "", "", "", "", ""]
+
+
+def test_ndjson_export_has_one_object_per_guest(client) -> None:
+    response = _export(client, "?format=ndjson")
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    documents = [json.loads(line) for line in response.text.splitlines()]
+    assert documents[0] == dict(
+        zip(
+            models.EXPORT_COLUMNS,
+            [str(GUEST_ID), "Ann", "Lee, Jr.", "ann@example.com", str(TABLE_ID), "Family", str(SEAT_ID), 1],
+        )
+    )
+    assert documents[1]["email"] is None and documents[1]["seat_number"] is None
+
+
+def test_unknown_export_formats_are_rejected(client) -> None:
+    assert _export(client, "?format=xlsx").status_code == 422
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import time
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from firebase_admin import auth
+
+from .cors import revocation
+from .cors.firebase import FirebaseTokenVerifier, InvalidIdToken, PublicKeySet
+from .cors.revocation import RevocationWatcher, TokenState
+
+PROJECT_ID = "wedding-table-test"
+
+
+def _make_signing_key() -> tuple[rsa.RSAPrivateKey, str]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(private_key, hashes.SHA256())
+    )
+    pem = certificate.public_bytes(serialization.Encoding.PEM).decode()
+    return private_key, pem
+
+
+SIGNING_KEY, CERTIFICATE = _make_signing_key()
+
+
+def _id_token(kid: str = "key-1", **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "firebase-uid",
+        "iat": now,
+        "exp": now + 3600,
+        "auth_time": now,
+        "email": "test@gmail.com",
+        "firebase": {"sign_in_provider": "custom"},
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, SIGNING_KEY, algorithm="RS256", headers={"kid": kid})
+
+
+def _verifier() -> FirebaseTokenVerifier:
+    return FirebaseTokenVerifier(
+        project_id=PROJECT_ID, key_set=PublicKeySet(keys={"key-1": CERTIFICATE})
+    )
+
+
+def test_verify_id_token_offline() -> None:
+    decoded = asyncio.run(_verifier().verify(_id_token()))
+
+    assert decoded["uid"] == "firebase-uid"
+    assert decoded["email"] == "test@gmail.com"
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        _id_token(kid="unknown"),
+        _id_token(aud="another-project"),
+        _id_token(iss="https://securetoken.google.com/another-project"),
+        _id_token(exp=int(time.time()) - 10),
+        _id_token(sub=""),
+    ],
+)
+def test_verify_id_token_rejects_invalid_tokens(token: str) -> None:
+    with pytest.raises(InvalidIdToken):
+        asyncio.run(_verifier().verify(token))
+
+
+def test_revocation_watcher_caches_and_invalidates(monkeypatch) -> None:
+    lookups: list[list[str]] = []
+    valid_after = {"firebase-uid": None}
+
+    def fake_fetch(uids: list[str]) -> dict[str, TokenState]:
+        lookups.append(uids)
+        return {
+            uid: TokenState(time.time(), valid_after[uid], False, True)
+            for uid in uids
+        }
+
+    monkeypatch.setattr(revocation, "_fetch_token_states", fake_fetch)
+    watcher = RevocationWatcher(staleness=60, active_window=600, refresh_interval=30)
+    issued_at = int(time.time()) - 10
+
+    async def scenario() -> None:
+        await watcher.ensure_not_revoked("firebase-uid", issued_at)
+        await watcher.ensure_not_revoked("firebase-uid", issued_at)
+        assert len(lookups) == 1
+
+        valid_after["firebase-uid"] = time.time()
+        watcher.invalidate("firebase-uid")
+        with pytest.raises(auth.RevokedIdTokenError):
+            await watcher.ensure_not_revoked("firebase-uid", issued_at)
+        await watcher.aclose()
+
+    asyncio.run(scenario())
+    assert len(lookups) == 2
+
+
+def test_revocation_lookup_survives_a_cancelled_owner(monkeypatch) -> None:
+    calls = 0
+
+    def slow_fetch(uids: list[str]) -> dict[str, TokenState]:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return {uid: TokenState(time.time(), None, False, True) for uid in uids}
+
+    monkeypatch.setattr(revocation, "_fetch_token_states", slow_fetch)
+    watcher = RevocationWatcher(staleness=60, active_window=600, refresh_interval=30)
+    issued_at = int(time.time()) - 10
+
+    async def scenario() -> None:
+        owner = asyncio.create_task(watcher.ensure_not_revoked("firebase-uid", issued_at))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(watcher.ensure_not_revoked("firebase-uid", issued_at))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+
+        await asyncio.wait_for(waiter, 1)
+        assert owner.cancelled()
+        await watcher.aclose()
+
+    asyncio.run(scenario())
+    assert calls == 2
@@ -0,0 +1,116 @@
+import asyncio
+import csv
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from .api.v1.guests import models
+from .api.v1.guests.csv_stream import csv_rows
+
+CSV = (
+    "first_name,last_name,email\r\n"
+    '"Ann ""Annie""",Lee,ann@example.com\r\n'
+    'Bob,"Two\nlines",\r\n'
+    "Cleo,Diaz,cleo@example.com"
+).encode()
+
+
+async def _parse(chunk_size: int):
+    async def chunks():
+        for i in range(0, len(CSV), chunk_size):
+            yield CSV[i : i + chunk_size]
+
+    return [row async for row in csv_rows(chunks())]
+
+
+def test_csv_rows_do_not_depend_on_chunk_boundaries() -> None:
+    expected = [
+        ["first_name", "last_name", "email"],
+        ['Ann "Annie"', "Lee", "ann@example.com"],
+        ["Bob", "Two\nlines", ""],
+        ["Cleo", "Diaz", "cleo@example.com"],
+    ]
+    for chunk_size in (1, 2, 5, 64, len(CSV)):
+        assert asyncio.run(_parse(chunk_size)) == expected
+
+
+def test_csv_rows_decode_split_multibyte_characters() -> None:
+    data = "\ufefffirst_name,last_name\nZoë,Ångström\n".encode()
+
+    async def chunks():
+        for byte in data:
+            yield bytes([byte])
+
+    async def parse():
+        return [row async for row in csv_rows(chunks())]
+
+    assert asyncio.run(parse()) == [["first_name", "last_name"], ["Zoë", "Ångström"]]
+
+
+def _chunks(data: bytes, size: int):
+    async def chunks():
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    return chunks()
+
+
+async def _rows(data: bytes, size: int, **kwargs):
+    return [row async for row in csv_rows(_chunks(data, size), **kwargs)]
+
+
+def test_csv_rows_accept_classic_mac_line_endings() -> None:
+    data = b"first_name,last_name\rAnn,Lee\rBob,Ray\r"
+
+    for chunk_size in (1, 3, len(data)):
+        assert asyncio.run(_rows(data, chunk_size, max_record=32)) == [
+            ["first_name", "last_name"],
+            ["Ann", "Lee"],
+            ["Bob", "Ray"],
+        ]
+
+
+def test_csv_rows_refuse_records_beyond_the_limit() -> None:
+    # without line breaks the whole file would have to be buffered
+    data = b"first_name,last_name " + b"x" * 100
+
+    with pytest.raises(csv.Error):
+        asyncio.run(_rows(data, 8, max_record=64))
+
+
+class _ImportSession:
+    def __init__(self) -> None:
+        self.rolled_back = False
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    driver_connection = None
+
+    async def rollback(self) -> None:
+        self.rolled_back = True
+
+
+def test_unreadable_rows_are_a_client_error(monkeypatch) -> None:
+    async def member(*args):
+        return None
+
+    monkeypatch.setattr(models, "ensure_event_member", member)
+    monkeypatch.setattr(models.settings, "GUEST_IMPORT_MAX_RECORD_SIZE", 64)
+    session = _ImportSession()
+    data = b"first_name,last_name\nAnn,Lee\n" + b'"' + b"x" * 100
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(
+            models.import_guests_by_event(
+                uuid.uuid4(), _chunks(data, 16), False, uuid.uuid4(), session
+            )
+        )
+
+    assert e.value.status_code == 400
+    assert e.value.detail.startswith("CSV row 3 could not be read")
+    assert session.rolled_back
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+from typing import Any, List
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from .api.v1.tables import model
+from .schemas.request import LayoutTableRequest, SaveLayoutRequest
+from .schemas.schema import Table
+
+EVENT_ID, USER_ID = uuid.uuid4(), uuid.uuid4()
+
+
+class _Result:
+    def __init__(self, rows: List[Any]) -> None:
+        self.rows = rows
+
+    def scalars(self) -> "_Result":
+        return self
+
+    def all(self) -> List[Any]:
+        return self.rows
+
+
+class _Session:
+    """Records the compiled statements; the upsert returns ``returned``
+    tables (every row by default)."""
+
+    def __init__(self, returned: int | None = None) -> None:
+        self.returned = returned
+        self.statements: List[Any] = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def exec(self, stmt: Any, **kwargs: Any) -> _Result:
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append(compiled)
+        # multi-row VALUES binds the ids as id_m0, id_m1, ...
+        ids = [value for key, value in compiled.params.items() if key.startswith("id_m")]
+        return _Result([Table(id=id, event_id=EVENT_ID) for id in ids][: self.returned])
+
+    async def commit(self) -> None:
+        self.committed = True
+
+    async def rollback(self) -> None:
+        self.rolled_back = True
+
+
+@pytest.fixture(autouse=True)
+def _no_side_effects(monkeypatch):
+    async def bump(event_id, session, expected_version=None, user_id=None):
+        return 2
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(model, "bump_layout_version", bump)
+    monkeypatch.setattr(model, "regenerate_seats", nothing)
+    monkeypatch.setattr(model, "invalidate_event", nothing)
+
+
+def _layout(*ids: uuid.UUID | None) -> SaveLayoutRequest:
+    return SaveLayoutRequest(
+        tables=[
+            LayoutTableRequest(id=table_id, x=i * 500, y=0, width=100, height=100)
+            for i, table_id in enumerate(ids)
+        ]
+    )
+
+
+def test_upsert_only_updates_tables_of_the_event() -> None:
+    session = _Session()
+    kept = uuid.uuid4()
+
+    tables, version = asyncio.run(
+        model.save_layout_by_event(EVENT_ID, _layout(kept, None), USER_ID, session)
+    )
+
+    upsert = str(session.statements[0])
+    assert "ON CONFLICT (id) DO UPDATE SET" in upsert
+    assert "WHERE tables.event_id = %(event_id_1)s" in upsert
+    assert "RETURNING" in upsert
+    assert session.statements[0].params["event_id_1"] == EVENT_ID
+    assert len(tables) == 2 and version == 2
+    assert session.committed
+
+
+def test_tables_missing_from_the_layout_are_deleted_with_their_seats() -> None:
+    session = _Session()
+    kept = uuid.uuid4()
+
+    asyncio.run(model.save_layout_by_event(EVENT_ID, _layout(kept), USER_ID, session))
+
+    removal = session.statements[1]
+    sql = str(removal)
+    assert sql.startswith("WITH removed_seats AS")
+    assert "DELETE FROM seats WHERE seats.table_id IN" in sql
+    assert "DELETE FROM tables WHERE tables.event_id" in sql
+    assert "NOT IN" in sql
+    assert [kept] in removal.params.values()
+
+
+def test_an_empty_layout_removes_every_table() -> None:
+    session = _Session()
+
+    tables, _ = asyncio.run(
+        model.save_layout_by_event(EVENT_ID, _layout(), USER_ID, session)
+    )
+
+    assert tables == []
+    assert len(session.statements) == 1
+    assert str(session.statements[0]).startswith("WITH removed_seats AS")
+
+
+def test_tables_of_another_event_reject_the_whole_layout() -> None:
+    # the conflict guard skipped one row, so fewer rows come back
+    session = _Session(returned=1)
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(
+            model.save_layout_by_event(
+                EVENT_ID, _layout(uuid.uuid4(), uuid.uuid4()), USER_ID, session
+            )
+        )
+
+    assert e.value.status_code == 409
+    assert session.rolled_back and not session.committed
+    assert len(session.statements) == 1
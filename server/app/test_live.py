@@ -0,0 +1,435 @@
+import asyncio
+import uuid
+from typing import Any, List, Set
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from .api.v1.events import live
+from .api.v1.events.live import LayoutSession, LiveConnection, LiveUpdate
+from .cors.response_cache import RedisBackend
+from .schemas.schema import Guest, Table
+from .test_response_cache import RespStandIn
+
+EVENT_ID = uuid.uuid4()
+TABLE_A, TABLE_B = uuid.uuid4(), uuid.uuid4()
+GUEST_ID, MISSING_GUEST = uuid.uuid4(), uuid.uuid4()
+
+
+class _Result:
+    def __init__(self, rows: List[Any]) -> None:
+        self.rows = rows
+
+    def scalars(self) -> "_Result":
+        return self
+
+    def all(self) -> List[Any]:
+        return self.rows
+
+    def scalar_one(self) -> Any:
+        (row,) = self.rows
+        return row
+
+
+class _Database:
+    """Serves the event's tables and records the batched updates."""
+
+    def __init__(self) -> None:
+        self.tables = [
+            Table(id=id, event_id=EVENT_ID, shape="round", seats=4, x=x, y=0, width=100, height=100)
+            for id, x in ((TABLE_A, 0), (TABLE_B, 500))
+        ]
+        self.guests = [GUEST_ID]
+        self.version = 3
+        self.updates: List[Any] = []
+        self.regenerated: List[List[uuid.UUID]] = []
+        self.fail = False
+        # guests the foreign key no longer finds
+        self.deleted_guests: Set[uuid.UUID] = set()
+        self.deleted_tables: Set[uuid.UUID] = set()
+
+    def __call__(self) -> "_Database":
+        return self
+
+    async def __aenter__(self) -> "_Database":
+        # a new transaction; what was not committed is rolled back
+        self.uncommitted: List[Any] = []
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def exec(self, stmt: Any, params: Any = None) -> _Result:
+        if params is None:
+            selected = stmt.column_descriptions[0]
+            if selected.get("entity") is Guest:
+                return _Result(self.guests)
+            if selected["name"] == "layout_version":
+                return _Result([self.version])
+            tables = [table for table in self.tables if table.id in self.remaining]
+            return _Result(tables if selected["name"] == "Table" else [t.id for t in tables])
+        if self.fail:
+            raise ConnectionError("database went away")
+        if any(row.get("b_guest_id") in self.deleted_guests for row in params):
+            raise IntegrityError(str(stmt), params, Exception("seats_guest_id_fkey"))
+        self.uncommitted.append((stmt.table.name, params))
+        return _Result([])
+
+    @property
+    def remaining(self) -> Set[uuid.UUID]:
+        return {table.id for table in self.tables} - self.deleted_tables
+
+    async def commit(self) -> None:
+        self.updates.extend(self.uncommitted)
+        self.uncommitted = []
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.sent: List[Any] = []
+
+    async def send_json(self, data: Any) -> None:
+        self.sent.append(data)
+
+
+@pytest.fixture
+def database(monkeypatch) -> _Database:
+    database = _Database()
+
+    async def regenerate(tables, session):
+        database.regenerated.append([table.id for table in tables])
+
+    async def bump(event_id, session, expected=None, user_id=None):
+        if expected != database.version:
+            raise HTTPException(status_code=412, detail="The layout was changed by someone else")
+        database.version += 1
+        return database.version
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(live, "async_session", database)
+    monkeypatch.setattr(live, "regenerate_seats", regenerate)
+    monkeypatch.setattr(live, "bump_layout_version", bump)
+    monkeypatch.setattr(live, "invalidate_event", nothing)
+    return database
+
+
+def _update(**fields: Any):
+    return LiveUpdate.validate_python(fields)
+
+
+def _run(scenario) -> None:
+    async def main():
+        session = LayoutSession(EVENT_ID, broadcast_interval=60, persist_interval=60)
+        await session.ready
+        try:
+            await scenario(session)
+        finally:
+            await session.close()
+
+    asyncio.run(main())
+
+
+def test_connection_outbox_merges_pending_diffs() -> None:
+    socket = _Socket()
+    connection = LiveConnection(socket)
+
+    async def scenario():
+        sender = asyncio.create_task(connection.send_forever())
+        connection.push("tables", "a", {"x": 1})
+        connection.push("tables", "a", {"x": 2, "y": 3})
+        connection.push("seats", "s", {"guest_id": None})
+        await asyncio.sleep(0)
+        sender.cancel()
+
+    asyncio.run(scenario())
+
+    assert socket.sent == [
+        {"type": "diff", "tables": {"a": {"x": 2, "y": 3}}, "seats": {"s": {"guest_id": None}}}
+    ]
+
+
+def test_edits_are_coalesced_and_not_echoed(database) -> None:
+    editor, viewer = LiveConnection(_Socket()), LiveConnection(_Socket())
+
+    async def scenario(session):
+        session.connections |= {editor, viewer}
+        assert session.apply(_update(type="table", id=TABLE_A, x=10), editor) is None
+        assert session.apply(_update(type="table", id=TABLE_A, x=20, name="Head"), editor) is None
+        session.flush_broadcast()
+
+        assert editor._outbox == {}
+        assert viewer._outbox == {"tables": {str(TABLE_A): {"x": 20, "name": "Head"}}}
+        assert session._persist == {("table", TABLE_A): {"x": 20, "name": "Head"}}
+
+    _run(scenario)
+
+
+def test_tables_of_other_events_are_rejected(database) -> None:
+    editor, viewer = LiveConnection(_Socket()), LiveConnection(_Socket())
+
+    async def scenario(session):
+        session.connections |= {editor, viewer}
+        error = session.apply(_update(type="table", id=uuid.uuid4(), name="Mine"), editor)
+        session.flush_broadcast()
+
+        assert error == "Unknown table"
+        assert viewer._outbox == {}
+        assert session._persist == {}
+
+    _run(scenario)
+
+
+def test_overlapping_moves_are_rejected(database) -> None:
+    editor = LiveConnection(_Socket())
+
+    async def scenario(session):
+        error = session.apply(_update(type="table", id=TABLE_A, x=450), editor)
+
+        assert error.startswith("Table overlaps")
+        assert session._persist == {}
+
+    _run(scenario)
+
+
+def test_persist_batches_edits_with_the_same_columns(database) -> None:
+    editor = LiveConnection(_Socket())
+    seat_id = uuid.uuid4()
+
+    async def scenario(session):
+        session.apply(_update(type="table", id=TABLE_A, x=10, y=10), editor)
+        session.apply(_update(type="table", id=TABLE_B, y=20, x=700), editor)
+        session.apply(_update(type="seat", id=seat_id, guest_id=None), editor)
+        await session.flush_persist()
+
+    _run(scenario)
+
+    # one executemany per table kind and column set
+    assert database.updates == [
+        (
+            "tables",
+            [
+                {"b_id": TABLE_A, "b_x": 10, "b_y": 10},
+                {"b_id": TABLE_B, "b_x": 700, "b_y": 20},
+            ],
+        ),
+        ("seats", [{"b_id": seat_id, "b_guest_id": None}]),
+    ]
+    assert database.regenerated == [[TABLE_A, TABLE_B]]
+
+
+def test_failed_writes_are_kept_for_the_next_flush(database) -> None:
+    editor = LiveConnection(_Socket())
+
+    async def scenario(session):
+        session.apply(_update(type="table", id=TABLE_A, x=10, name="Old"), editor)
+        database.fail = True
+        with pytest.raises(ConnectionError):
+            await session.flush_persist()
+        session.apply(_update(type="table", id=TABLE_A, name="New"), editor)
+
+        assert session._persist == {("table", TABLE_A): {"x": 10, "name": "New"}}
+
+        database.fail = False
+        await session.flush_persist()
+        assert session._persist == {}
+
+    _run(scenario)
+
+    assert database.updates == [
+        ("tables", [{"b_id": TABLE_A, "b_name": "New", "b_x": 10}])
+    ]
+
+
+def test_guests_of_other_events_are_rejected(database) -> None:
+    editor = LiveConnection(_Socket())
+    seat_id = uuid.uuid4()
+
+    async def scenario(session):
+        error = session.apply(_update(type="seat", id=seat_id, guest_id=uuid.uuid4()), editor)
+
+        assert error == "Unknown guest"
+        assert session.apply(_update(type="seat", id=seat_id, guest_id=GUEST_ID), editor) is None
+        assert session.apply(_update(type="seat", id=seat_id, guest_id=None), editor) is None
+
+    _run(scenario)
+
+
+def test_edits_the_database_rejects_do_not_block_the_others(database) -> None:
+    editor = LiveConnection(_Socket())
+    poisoned, seat_id = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario(session):
+        session.apply(_update(type="seat", id=poisoned, guest_id=GUEST_ID), editor)
+        session.apply(_update(type="seat", id=seat_id, guest_id=None), editor)
+        session.apply(_update(type="table", id=TABLE_A, name="Head"), editor)
+        # deleted after the edit was accepted
+        database.deleted_guests.add(GUEST_ID)
+        await session.flush_persist()
+
+        assert session._persist == {}
+
+    _run(scenario)
+
+    assert database.updates == [
+        ("seats", [{"b_id": seat_id, "b_guest_id": None}]),
+        ("tables", [{"b_id": TABLE_A, "b_name": "Head"}]),
+    ]
+
+
+def test_seats_are_only_regenerated_for_tables_that_still_exist(database) -> None:
+    editor = LiveConnection(_Socket())
+
+    async def scenario(session):
+        session.apply(_update(type="table", id=TABLE_A, seats=6), editor)
+        session.apply(_update(type="table", id=TABLE_B, seats=6), editor)
+        # a layout save removed it meanwhile
+        database.deleted_tables.add(TABLE_B)
+        await session.flush_persist()
+
+    _run(scenario)
+
+    assert database.regenerated == [[TABLE_A]]
+
+
+def test_writes_from_elsewhere_reload_the_session(database) -> None:
+    editor, viewer = LiveConnection(_Socket()), LiveConnection(_Socket())
+
+    async def scenario(session):
+        session.connections |= {editor, viewer}
+        session.apply(_update(type="table", id=TABLE_A, name="Mine"), editor)
+        # a layout save moved table B next to A and bumped the version
+        database.tables[1].x = 150
+        database.version += 1
+        await session.flush_persist()
+
+        assert session._persist == {}
+        assert session.version == 4
+        assert viewer._reload == 4 and editor._reload == 4
+        # overlap checks run against the saved layout now
+        assert session.apply(_update(type="table", id=TABLE_A, x=100), editor).startswith(
+            "Table overlaps"
+        )
+
+        session.apply(_update(type="table", id=TABLE_A, name="Again"), editor)
+        await session.flush_persist()
+        assert session.version == 5
+
+    _run(scenario)
+
+    assert database.updates == [("tables", [{"b_id": TABLE_A, "b_name": "Again"}])]
+
+
+def test_reload_replaces_pending_diffs() -> None:
+    socket = _Socket()
+    connection = LiveConnection(socket)
+
+    async def scenario():
+        sender = asyncio.create_task(connection.send_forever())
+        connection.push("tables", "a", {"x": 1})
+        connection.reload(7)
+        await asyncio.sleep(0)
+        sender.cancel()
+
+    asyncio.run(scenario())
+
+    assert socket.sent == [{"type": "reload", "layout_version": 7}]
+
+
+async def _until(condition) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+def _run_on_two_workers(scenario) -> None:
+    async def main():
+        stand_in = RespStandIn()
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        sessions = [
+            LayoutSession(EVENT_ID, broadcast_interval=60, persist_interval=60, shared=backend)
+            for _ in range(2)
+        ]
+        try:
+            for session in sessions:
+                await session.ready
+            channel = f"live:{EVENT_ID}".encode()
+            await _until(lambda: len(stand_in.subscribers.get(channel, [])) == 2)
+            await scenario(*sessions, stand_in)
+        finally:
+            for session in sessions:
+                await session.close()
+            await backend.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_sessions_on_other_workers_share_edits_and_writes(database) -> None:
+    editor, viewer = LiveConnection(_Socket()), LiveConnection(_Socket())
+
+    async def scenario(first, second, stand_in):
+        first.connections.add(editor)
+        second.connections.add(viewer)
+        first.apply(_update(type="table", id=TABLE_A, x=10), editor)
+        await first.broadcast()
+
+        await _until(lambda: viewer._outbox)
+        assert viewer._outbox == {"tables": {str(TABLE_A): {"x": 10}}}
+        # the other worker checks moves against the relayed geometry
+        assert second.apply(_update(type="table", id=TABLE_B, x=50), viewer).startswith(
+            "Table overlaps"
+        )
+
+        await first.flush_persist()
+        await _until(lambda: second.version == 4)
+        second.apply(_update(type="table", id=TABLE_B, name="Side"), viewer)
+        await second.flush_persist()
+
+        assert second.version == 5
+        assert editor._reload is None and viewer._reload is None
+
+    _run_on_two_workers(scenario)
+
+    assert database.updates == [
+        ("tables", [{"b_id": TABLE_A, "b_x": 10}]),
+        ("tables", [{"b_id": TABLE_B, "b_name": "Side"}]),
+    ]
+
+
+def test_a_write_of_another_worker_is_not_a_conflict(database) -> None:
+    editor, viewer = LiveConnection(_Socket()), LiveConnection(_Socket())
+
+    async def scenario(first, second, stand_in):
+        first.connections.add(viewer)
+        second.connections.add(editor)
+        second.apply(_update(type="table", id=TABLE_B, name="Side"), editor)
+        # the first worker wrote 3 -> 4; its message has not arrived yet
+        database.version = 4
+        stand_in.data[f"live-version:{EVENT_ID}".encode()] = b"3:4"
+        await second.flush_persist()
+
+        assert second.version == 4
+        assert second._persist == {("table", TABLE_B): {"name": "Side"}}
+        await second.flush_persist()
+        assert second.version == 5
+
+        # a layout save is a conflict on every worker
+        database.version += 1
+        second.apply(_update(type="table", id=TABLE_B, name="Lost"), editor)
+        await second.flush_persist()
+
+        assert editor._reload == 6
+        await _until(lambda: viewer._reload is not None)
+        assert first.version == 6 and viewer._reload == 6
+
+    _run_on_two_workers(scenario)
+
+    assert database.updates == [("tables", [{"b_id": TABLE_B, "b_name": "Side"}])]
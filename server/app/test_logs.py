@@ -0,0 +1,75 @@
+import logging
+import queue
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from .cors.logs import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    request_id,
+)
+from .cors.metrics import registry
+from .middleware import RequestIdMiddleware
+
+
+def _record(name: str = "app", level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(name, level, __file__, 1, "seated %s guests", (12,), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_records_carry_the_request_id_into_json() -> None:
+    handler = BoundedQueueHandler(queue.Queue())
+    token = request_id.set("abc123")
+    try:
+        handler.handle(_record(event_id="e1"))
+    finally:
+        request_id.reset(token)
+
+    document = orjson.loads(JsonFormatter().format(handler.queue.get_nowait()))
+
+    assert document["message"] == "seated 12 guests"
+    assert document["request_id"] == "abc123"
+    assert document["event_id"] == "e1"
+    assert document["level"] == "INFO"
+
+
+def test_a_full_queue_drops_records_instead_of_blocking() -> None:
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+    before = registry.get_sample_value("log_records_dropped_total", {"logger": "app"}) or 0
+
+    for _ in range(5):
+        handler.handle(_record())
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert registry.get_sample_value("log_records_dropped_total", {"logger": "app"}) == before + 3
+
+
+def test_sampling_only_thins_out_the_configured_loggers() -> None:
+    sampler = SamplingFilter({"sqlalchemy.engine": 0.0})
+
+    assert not sampler.filter(_record("sqlalchemy.engine.Engine"))
+    assert sampler.filter(_record("sqlalchemy.engine.Engine", logging.WARNING))
+    assert sampler.filter(_record("sqlalchemy.pool"))
+    assert sampler.filter(_record("app.api"))
+
+
+def test_request_ids_are_kept_or_generated() -> None:
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/")
+    async def index():
+        return {"request_id": request_id.get()}
+
+    client = TestClient(app)
+    kept = client.get("/", headers={"X-Request-ID": "lb-42"})
+    replaced = client.get("/", headers={"X-Request-ID": "not a valid id"})
+
+    assert kept.headers["x-request-id"] == kept.json()["request_id"] == "lb-42"
+    assert replaced.headers["x-request-id"] == replaced.json()["request_id"]
+    assert len(replaced.json()["request_id"]) == 32
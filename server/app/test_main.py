@@ -1,11 +1,13 @@
 from fastapi.testclient import TestClient
 from firebase_admin.auth import UserRecord, UserNotFoundError
 from httpx import request
-from .config.settings import settings
+from .config.settings import init_firebase_admin_app, settings
 from .main import app
 from firebase_admin import auth
 from faker import Faker
 
+# the app initializes Firebase in its lifespan; these helpers call it directly
+init_firebase_admin_app()
 client = TestClient(app)
 
 TEST_FIREBASE_USER = {
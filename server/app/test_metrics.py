@@ -0,0 +1,106 @@
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine, text
+from sqlalchemy.util import greenlet_spawn
+
+from .cors.metrics import (
+    MetricsMiddleware,
+    RequestStats,
+    TimedQueuePool,
+    instrument_engine,
+    registry,
+    request_stats,
+)
+from .api.v1.monitoring import monitoring_router
+
+
+def _sample(name: str, **labels: str) -> float:
+    value = registry.get_sample_value(name, labels)
+    return value or 0.0
+
+
+def _client() -> TestClient:
+    app = FastAPI(
+        generate_unique_id_function=lambda route: f"{route.tags[0]}-{route.name}"
+    )
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(monitoring_router, prefix="/monitoring")
+
+    @app.get("/items/{item_id}", tags=["items"])
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    assert any(isinstance(r, APIRoute) and r.unique_id == "items-read_item" for r in app.routes)
+    return TestClient(app)
+
+
+def test_latency_is_recorded_per_route_id() -> None:
+    client = _client()
+    labels = {"route": "items-read_item", "method": "GET", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample(
+        "http_request_duration_seconds_count", route="unmatched", method="GET", status="404"
+    ) >= 1
+    assert _sample("http_requests_in_flight", method="GET") == 0
+
+
+def test_metrics_endpoint_speaks_the_prometheus_text_format() -> None:
+    client = _client()
+    client.get("/items/1")
+
+    response = client.get("/monitoring/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    names = {family.name for family in text_string_to_metric_families(response.text)}
+    assert {"http_request_duration_seconds", "db_query_duration_seconds"} <= names
+
+
+def test_statements_count_towards_the_current_request() -> None:
+    engine = create_engine("sqlite://")
+    instrument_engine(SimpleNamespace(sync_engine=engine), "test")
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+            conn.execute(text("select 2"))
+    finally:
+        request_stats.reset(token)
+
+    assert stats.queries == 2
+    assert stats.db_time > 0
+    assert _sample("db_query_duration_seconds_count", engine="test") == 2
+
+
+def test_pool_checkout_time_excludes_opening_connections() -> None:
+    def slow_connect():
+        time.sleep(0.05)
+        return sqlite3.connect(":memory:")
+
+    pool = TimedQueuePool(slow_connect, pool_size=1, max_overflow=0)
+    before = _sample("db_pool_checkout_duration_seconds_sum")
+    count = _sample("db_pool_checkout_duration_seconds_count")
+
+    def checkouts():
+        # the first checkout opens a connection, the second reuses it
+        pool.connect().close()
+        pool.connect().close()
+
+    asyncio.run(greenlet_spawn(checkouts))
+
+    assert _sample("db_pool_checkout_duration_seconds_count") == count + 2
+    assert _sample("db_pool_checkout_duration_seconds_sum") - before < 0.05
@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from .cors.pagination import CREATED_CURSOR, decode_cursor, keyset, page_of
+from .schemas.schema import Event
+
+
+def test_cursor_round_trips_the_sort_key() -> None:
+    key = (datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc), uuid.uuid4())
+    items = [object(), object(), object()]
+
+    page, cursor = page_of(items, 2, CREATED_CURSOR, lambda _: key)
+
+    assert page == items[:2]
+    assert decode_cursor(CREATED_CURSOR, cursor) == key
+
+
+def test_last_page_has_no_cursor() -> None:
+    assert page_of([1, 2], 2, CREATED_CURSOR, lambda _: ()) == ([1, 2], None)
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "bm90IGpzb24", "WzEsMl0"])
+def test_invalid_cursor_is_a_bad_request(token: str) -> None:
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(CREATED_CURSOR, token)
+    assert e.value.status_code == 400
+
+
+def test_keyset_seeks_past_the_cursor() -> None:
+    after = (datetime(2025, 6, 1, tzinfo=timezone.utc), uuid.uuid4())
+
+    stmt = keyset(select(Event), [Event.created_at, Event.id], after, 50, descending=True)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "(events.created_at, events.id) < (" in sql
+    assert "ORDER BY events.created_at DESC, events.id DESC" in sql
+    assert "LIMIT" in sql
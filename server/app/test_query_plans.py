@@ -0,0 +1,257 @@
+"""Query-plan regression harness.
+
+Seeds a synthetic wedding-planner dataset into a throw-away schema of
+the Postgres at ``QUERY_PLAN_DATABASE_URL``, runs the repository
+functions against it and checks ``EXPLAIN (ANALYZE, FORMAT JSON)`` of
+every SELECT they issue:
+
+- no sequential scan of an application table,
+- estimated cost within ``COST_TOLERANCE`` of ``query_plan_baseline.json``.
+
+Run with ``QUERY_PLAN_UPDATE_BASELINE=1`` to (re)write the baseline.
+Skipped when no database URL is configured.
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .api.v1.events import models as event_models
+from .api.v1.guests import models as guest_models
+from .api.v1.tables import model as table_models
+from .cors.pagination import PageParams
+from .cors.response_cache import response_cache
+
+DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+UPDATE_BASELINE = os.getenv("QUERY_PLAN_UPDATE_BASELINE") == "1"
+BASELINE = Path(__file__).with_name("query_plan_baseline.json")
+SCHEMA = "query_plan_harness"
+COST_TOLERANCE = 1.25
+
+USERS, EVENTS, TABLES_PER_EVENT, SEATS_PER_TABLE, GUESTS_PER_EVENT = (
+    1_000,
+    2_000,
+    20,
+    8,
+    150,
+)
+
+SEED = [
+    f"""
+    INSERT INTO users (id, firebase_uid, full_name, email)
+    SELECT gen_random_uuid(), 'uid-' || i, 'User ' || i, 'user' || i || '@example.com'
+    FROM generate_series(1, {USERS}) AS i
+    """,
+    f"""
+    INSERT INTO events (id, title)
+    SELECT gen_random_uuid(), 'Event ' || i FROM generate_series(1, {EVENTS}) AS i
+    """,
+    f"""
+    INSERT INTO user_event_associations (user_id, event_id)
+    SELECT u.id, e.id
+    FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM events) AS e
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM users) AS u
+        ON u.n = e.n % {USERS}
+    """,
+    f"""
+    INSERT INTO tables (id, name, shape, seats, x, y, width, height, event_id)
+    SELECT gen_random_uuid(), 'Table ' || t, 'round', {SEATS_PER_TABLE},
+        (t % 10) * 150, (t / 10) * 150, 100, 100, e.id
+    FROM events AS e, generate_series(1, {TABLES_PER_EVENT}) AS t
+    """,
+    f"""
+    INSERT INTO guests (id, first_name, last_name, email, event_id)
+    SELECT gen_random_uuid(), 'Guest', 'Number ' || g, 'guest' || g || '@example.com', e.id
+    FROM events AS e, generate_series(1, {GUESTS_PER_EVENT}) AS g
+    """,
+    f"""
+    INSERT INTO seats (id, seat_number, x, y, table_id)
+    SELECT gen_random_uuid(), s, 0, 0, t.id
+    FROM tables AS t, generate_series(1, {SEATS_PER_TABLE}) AS s
+    """,
+    """
+    WITH s AS (
+        SELECT seats.id, tables.event_id,
+            row_number() OVER (PARTITION BY tables.event_id ORDER BY seats.id) AS n
+        FROM seats JOIN tables ON tables.id = seats.table_id
+    ), g AS (
+        SELECT id, event_id, row_number() OVER (PARTITION BY event_id ORDER BY id) AS n
+        FROM guests
+    )
+    UPDATE seats SET guest_id = g.id
+    FROM s JOIN g ON g.event_id = s.event_id AND g.n = s.n
+    WHERE seats.id = s.id
+    """,
+    "ANALYZE",
+]
+
+pytestmark = pytest.mark.skipif(
+    DATABASE_URL is None, reason="QUERY_PLAN_DATABASE_URL is not set"
+)
+
+
+def _walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+async def _capture(session_maker, scenarios) -> List[Tuple[str, str, Any]]:
+    """Runs every scenario and returns the SELECTs it sent to Postgres."""
+    captured: List[Tuple[str, str, Any]] = []
+    current = {"name": ""}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((current["name"], statement, parameters))
+
+    sync_engine = session_maker.kw["bind"].sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        for name, scenario in scenarios:
+            current["name"] = name
+            async with session_maker() as session:
+                await scenario(session)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+    return captured
+
+
+async def _scenarios(session_maker) -> List[Tuple[str, Any]]:
+    async with session_maker() as session:
+        user_id, event_id = (
+            await session.execute(
+                text("SELECT user_id, event_id FROM user_event_associations LIMIT 1")
+            )
+        ).one()
+
+    async def events_page(session):
+        await event_models.get_all_events_by_user(user_id, PageParams(None, 50), session)
+
+    async def events_by_title(session):
+        await event_models.get_all_events_by_user(
+            user_id, PageParams(None, 50), session, title="Event 1"
+        )
+
+    async def event_detail(session):
+        await event_models.get_event_by_user(user_id, event_id, session)
+
+    async def event_document(session):
+        await event_models.get_event_document_by_user(user_id, event_id, session)
+
+    async def tables_page(session):
+        await event_models.get_tables_by_event(
+            event_id, user_id, PageParams(None, 200), session
+        )
+
+    async def guests_page(session):
+        _, cursor = await guest_models.get_guests_by_event(
+            event_id, user_id, PageParams(None, 20), session
+        )
+        await guest_models.get_guests_by_event(
+            event_id, user_id, PageParams(cursor, 20), session
+        )
+
+    async def unseated_guests(session):
+        await guest_models.get_guests_by_event(
+            event_id, user_id, PageParams(None, 50), session, seated=False
+        )
+
+    async def nearby_tables(session):
+        table_models.spatial_indexes.clear()
+        await table_models.get_tables_within_radius(
+            event_id, 100, 100, 300, user_id, session
+        )
+
+    async def seating_export(session):
+        async for _ in guest_models._stream_seating(event_id, "csv", session_maker):
+            pass
+
+    return [
+        ("events_page", events_page),
+        ("events_by_title", events_by_title),
+        ("event_detail", event_detail),
+        ("event_document", event_document),
+        ("tables_page", tables_page),
+        ("guests_page", guests_page),
+        ("unseated_guests", unseated_guests),
+        ("nearby_tables", nearby_tables),
+        ("seating_export", seating_export),
+    ]
+
+
+async def _explain_all() -> Dict[str, Dict[str, Any]]:
+    engine = create_async_engine(
+        DATABASE_URL, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # every call has to reach Postgres
+    response_cache.backend = None
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(SQLModel.metadata.create_all)
+            for statement in SEED:
+                await conn.execute(text(statement))
+
+        captured = await _capture(session_maker, await _scenarios(session_maker))
+        plans: Dict[str, Dict[str, Any]] = {}
+        async with engine.connect() as conn:
+            for index, (name, statement, parameters) in enumerate(captured):
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+                )
+                raw = result.scalar()
+                plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                plans[f"{name}#{sum(1 for n, *_ in captured[:index] if n == name)}"] = {
+                    "sql": statement,
+                    "plan": plan,
+                }
+            await conn.rollback()
+        return plans
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def plans() -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_explain_all())
+
+
+def test_repository_queries_use_indexes(plans) -> None:
+    app_tables = {table.name for table in SQLModel.metadata.sorted_tables}
+    seq_scans = [
+        f"{name}: Seq Scan on {node['Relation Name']}\n{query['sql']}"
+        for name, query in plans.items()
+        for node in _walk(query["plan"])
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in app_tables
+    ]
+    assert not seq_scans, "\n\n".join(seq_scans)
+
+
+def test_repository_query_costs_do_not_regress(plans) -> None:
+    costs = {name: query["plan"]["Total Cost"] for name, query in plans.items()}
+    if UPDATE_BASELINE:
+        BASELINE.write_text(json.dumps(costs, indent=2, sort_keys=True) + "\n")
+        return
+    if not BASELINE.exists():
+        pytest.skip("no baseline; run with QUERY_PLAN_UPDATE_BASELINE=1 first")
+
+    baseline = json.loads(BASELINE.read_text())
+    regressions = [
+        f"{name}: {cost:.1f} > {baseline[name]:.1f} * {COST_TOLERANCE}\n{plans[name]['sql']}"
+        for name, cost in costs.items()
+        if name in baseline and cost > baseline[name] * COST_TOLERANCE
+    ]
+    assert not regressions, "\n\n".join(regressions)
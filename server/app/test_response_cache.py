@@ -0,0 +1,222 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pydantic import TypeAdapter
+
+from .api.v1.events import models as event_models
+from .cors.response_cache import MemoryBackend, RedisBackend, ResponseCache, response_cache
+from .schemas.response import EventResponse, TableResponse
+from .schemas.schema import Table
+
+
+class RespStandIn:
+    """Just enough of a Redis server for the cache: MGET, SET, INCR,
+    PUBLISH and SUBSCRIBE."""
+
+    def __init__(self):
+        self.data: Dict[bytes, bytes] = {}
+        self.subscribers: Dict[bytes, List[asyncio.StreamWriter]] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while line := await reader.readline():
+            args: List[bytes] = []
+            for _ in range(int(line[1:])):
+                length = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(length + 2))[:-2])
+            command = args[0].upper()
+            if command == b"MGET":
+                values = [self.data.get(key) for key in args[1:]]
+                reply = b"*%d\r\n" % len(values) + b"".join(
+                    b"$-1\r\n" if v is None else b"$%d\r\n%s\r\n" % (len(v), v)
+                    for v in values
+                )
+            elif command == b"SET":
+                self.data[args[1]] = args[2]
+                reply = b"+OK\r\n"
+            elif command == b"INCR":
+                value = int(self.data.get(args[1], b"0")) + 1
+                self.data[args[1]] = b"%d" % value
+                reply = b":%d\r\n" % value
+            elif command == b"SUBSCRIBE":
+                self.subscribers.setdefault(args[1], []).append(writer)
+                reply = b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:1\r\n" % (
+                    len(args[1]),
+                    args[1],
+                )
+            elif command == b"PUBLISH":
+                receivers = self.subscribers.get(args[1], [])
+                for receiver in receivers:
+                    receiver.write(
+                        b"*3\r\n$7\r\nmessage\r\n"
+                        + b"".join(b"$%d\r\n%s\r\n" % (len(a), a) for a in args[1:])
+                    )
+                reply = b":%d\r\n" % len(receivers)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            writer.write(reply)
+            await writer.drain()
+        for receivers in self.subscribers.values():
+            if writer in receivers:
+                receivers.remove(writer)
+        writer.close()
+
+
+async def _exercise(cache: ResponseCache) -> None:
+    calls: List[int] = []
+
+    @cache.cached("double", TypeAdapter(int), tags=lambda args: [f"n:{args['n']}"])
+    async def double(n: int, session=None) -> int:
+        calls.append(n)
+        await asyncio.sleep(0.01)
+        return n * 2
+
+    # concurrent misses share one call
+    assert await asyncio.gather(*(double(2) for _ in range(5))) == [4] * 5
+    assert calls == [2]
+    # the session does not take part in the key
+    assert await double(2, session=object()) == 4
+    assert calls == [2]
+
+    await cache.invalidate("n:2")
+    assert await double(2) == 4
+    assert await double(3) == 6
+    assert calls == [2, 2, 3]
+    assert cache.stats()["hits"] == 1
+
+
+def test_memory_backend() -> None:
+    asyncio.run(_exercise(ResponseCache(MemoryBackend(100, 60), ttl=60)))
+
+
+def test_redis_protocol_backend() -> None:
+    async def main() -> None:
+        stand_in = RespStandIn()
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        try:
+            await _exercise(ResponseCache(backend, ttl=60))
+            assert any(key.startswith(b"cache:double:") for key in stand_in.data)
+        finally:
+            await backend.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others() -> None:
+    async def main() -> None:
+        cache = ResponseCache(MemoryBackend(100, 60), ttl=60)
+        calls: List[int] = []
+
+        @cache.cached("slow", TypeAdapter(int), tags=lambda args: [])
+        async def slow(n: int) -> int:
+            calls.append(n)
+            await asyncio.sleep(0.05)
+            return n
+
+        owner = asyncio.create_task(slow(1))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(slow(1))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+
+        # the waiter takes the call over instead of being cancelled too
+        assert await asyncio.wait_for(waiter, 1) == 1
+        assert owner.cancelled()
+        assert calls == [1, 1]
+
+    asyncio.run(main())
+
+
+def test_event_bodies_are_keyed_by_layout_version(monkeypatch) -> None:
+    stored = {"title": "Old", "layout_version": 1}
+
+    async def fetch_event(event_id, user_id, session):
+        return EventResponse(
+            id=event_id, created_at=datetime.now(timezone.utc), **stored
+        )
+
+    monkeypatch.setattr(event_models, "fetch_event", fetch_event)
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(100, 60))
+    user_id, event_id = uuid.uuid4(), uuid.uuid4()
+
+    async def read(version: int) -> str:
+        event = await event_models.get_event_by_user(
+            user_id, event_id, None, layout_version=version
+        )
+        return event.title
+
+    async def main() -> None:
+        assert await read(1) == "Old"
+        # the bump committed, its invalidation has not landed (or never
+        # reaches this worker): the new version still misses the cache
+        stored.update(title="New", layout_version=2)
+        assert await read(2) == "New"
+
+    asyncio.run(main())
+
+
+def test_unreachable_backend_falls_through() -> None:
+    async def main() -> None:
+        cache = ResponseCache(RedisBackend("redis://127.0.0.1:1/0", timeout=0.2), ttl=60)
+
+        @cache.cached("one", TypeAdapter(int), tags=lambda args: [])
+        async def one() -> int:
+            return 1
+
+        assert await one() == 1
+        assert cache.stats()["errors"] == 1
+
+    asyncio.run(main())
+
+
+def test_every_caller_gets_validated_results() -> None:
+    async def main() -> None:
+        for backend in (MemoryBackend(100, 60), None):
+            cache = ResponseCache(backend, ttl=60)
+
+            @cache.cached("table", TypeAdapter(TableResponse), tags=lambda args: [])
+            async def table(n: int) -> Table:
+                await asyncio.sleep(0.01)
+                return Table(id=uuid.uuid4(), name=f"Table {n}")
+
+            # the owner of the call and its waiters alike, never the ORM row
+            results = await asyncio.gather(table(1), table(1))
+            results.append(await table(1))
+            assert all(type(result) is TableResponse for result in results)
+
+    asyncio.run(main())
+
+
+def test_tag_counters_are_dropped_without_serving_stale_entries(monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr("app.cors.response_cache.time.monotonic", lambda: now[0])
+
+    async def main() -> None:
+        backend = MemoryBackend(100, ttl=10)
+        cache = ResponseCache(backend, ttl=10)
+        value = {"n": 1}
+
+        @cache.cached("value", TypeAdapter(int), tags=lambda args: ["tag"])
+        async def read() -> int:
+            return value["n"]
+
+        await cache.invalidate("tag")
+        assert await read() == 1
+        for i in range(100):
+            await cache.invalidate(f"other:{i}")
+        now[0] = 20.0
+        await cache.invalidate("unrelated")
+        # counters not bumped for a ttl are gone
+        assert list(backend.counters) == ["tag:unrelated"]
+
+        # "tag" starts over but never repeats the value the entry holds
+        value["n"] = 2
+        await cache.invalidate("tag")
+        assert await read() == 2
+
+    asyncio.run(main())
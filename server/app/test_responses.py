@@ -0,0 +1,81 @@
+import gzip
+import uuid
+
+import brotli
+import msgpack
+import orjson
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from .cors.responses import dump_trusted, negotiated, wants_msgpack
+from .middleware import CompressionMiddleware
+
+
+class _Row(BaseModel):
+    id: uuid.UUID
+    name: str
+
+
+ROWS = [_Row(id=uuid.uuid4(), name=f"Table {i}") for i in range(200)]
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+
+    @app.get("/rows")
+    def rows(request: Request):
+        return negotiated(request, dump_trusted(ROWS, _Row))
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("application/msgpack", True),
+        ("application/json;q=1, application/x-msgpack;q=0.5", True),
+        ("application/msgpack;q=0", False),
+        ("*/*", False),
+        ("", False),
+    ],
+)
+def test_msgpack_is_only_sent_when_asked_for(accept: str, expected: bool) -> None:
+    request = Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+    assert wants_msgpack(request) is expected
+
+
+def test_json_and_msgpack_carry_the_same_rows() -> None:
+    client = _client()
+
+    as_json = client.get("/rows")
+    as_msgpack = client.get("/rows", headers={"Accept": "application/msgpack"})
+
+    assert as_json.headers["content-type"] == "application/json"
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert as_json.headers["vary"] == as_msgpack.headers["vary"] == "Accept, Accept-Encoding"
+    expected = [{"id": str(row.id), "name": row.name} for row in ROWS]
+    assert orjson.loads(as_json.content) == expected
+    assert msgpack.unpackb(as_msgpack.content) == expected
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding, decompress",
+    [
+        ("gzip, br", "br", brotli.decompress),
+        ("gzip, br;q=0", "gzip", gzip.decompress),
+        ("identity", None, lambda body: body),
+    ],
+)
+def test_large_bodies_are_compressed(accept_encoding, encoding, decompress) -> None:
+    client = _client()
+
+    # iter_raw skips the client side decoding
+    with client.stream("GET", "/rows", headers={"Accept-Encoding": accept_encoding}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers.get("content-encoding") == encoding
+    assert len(orjson.loads(decompress(raw))) == len(ROWS)
@@ -0,0 +1,160 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+import numpy as np
+import pytest
+
+from .api.v1.seating import models
+from .api.v1.seating.solver import (
+    InfeasibleSeating,
+    anneal,
+    build_problem,
+)
+from .schemas.request import SolveSeatingRequest
+from .schemas.schema import Table
+
+
+def _wedding(guests: int = 500, tables: int = 50, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    parties = [list(range(i, i + 4)) for i in range(0, 200, 4)]
+    keep_apart = [(int(a), int(b)) for a, b in rng.integers(200, guests, size=(100, 2)) if a != b]
+    preferences = [(int(g), int(t), 5.0) for g, t in zip(range(0, guests, 3), rng.integers(tables, size=guests))]
+    problem = build_problem(guests, [10] * tables, parties, keep_apart, preferences)
+    return problem, parties, keep_apart
+
+
+def test_anneal_respects_hard_constraints() -> None:
+    problem, parties, keep_apart = _wedding()
+
+    solution = anneal(problem, time_budget=2.0, seed=1)
+
+    assert solution.unseated_guests == 0
+    assert solution.violated_separations == 0
+    load = np.bincount(solution.assignment, weights=problem.unit_sizes, minlength=50)
+    assert (load <= problem.capacities).all()
+
+    table_of = np.empty(500, dtype=int)
+    for unit, guests in enumerate(problem.units):
+        table_of[guests] = solution.assignment[unit]
+    for party in parties:
+        assert len(set(table_of[party])) == 1
+    for a, b in keep_apart:
+        assert table_of[a] != table_of[b]
+
+
+def test_anneal_reports_unseated_guests_when_tables_are_full() -> None:
+    problem = build_problem(12, [4, 4])
+
+    solution = anneal(problem, time_budget=0.1, seed=1)
+
+    assert solution.unseated_guests == 4
+    assert (solution.assignment == -1).sum() == 4
+
+
+def test_build_problem_rejects_contradicting_constraints() -> None:
+    with pytest.raises(InfeasibleSeating):
+        build_problem(3, [4], parties=[[0, 1]], keep_apart=[(0, 1)])
+
+
+EVENT_ID, USER_ID = uuid.uuid4(), uuid.uuid4()
+
+
+class _Result:
+    def __init__(self, rows: List[Any]) -> None:
+        self.rows = rows
+
+    def all(self) -> List[Any]:
+        return self.rows
+
+
+class _Session:
+    """Holds the event's seat rows and records the guest updates."""
+
+    def __init__(self, seats: List[Tuple[uuid.UUID, uuid.UUID]]) -> None:
+        self.seats = seats
+        self.assigned: List[Any] = []
+
+    async def exec(self, stmt: Any, params: Any = None) -> _Result:
+        if params is not None:
+            self.assigned.extend(params)
+        return _Result(self.seats if hasattr(stmt, "column_descriptions") else [])
+
+    async def commit(self) -> None:
+        pass
+
+
+@pytest.fixture
+def solve(monkeypatch):
+    """Runs the solver for two four-seat tables and two guests, in threads."""
+    tables = [Table(id=uuid.uuid4(), event_id=EVENT_ID, shape="round", seats=4) for _ in range(2)]
+    guests = [uuid.uuid4(), uuid.uuid4()]
+    bumped: List[int | None] = []
+
+    async def fetch_scoped(stmt, *args):
+        name = stmt.column_descriptions[0]["name"]
+        return {"layout_version": [7], "id": guests, "Table": tables}[name]
+
+    async def bump(event_id, session, expected=None, user_id=None):
+        bumped.append(expected)
+        return (expected or 7) + 1
+
+    async def apply_seating(*args):
+        return {}
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(models, "fetch_scoped", fetch_scoped)
+    monkeypatch.setattr(models, "bump_layout_version", bump)
+    monkeypatch.setattr(models, "apply_seating", apply_seating)
+    monkeypatch.setattr(models, "invalidate_event", nothing)
+    monkeypatch.setattr(models, "SOLVER_WORKERS", 1)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        monkeypatch.setattr(models, "get_solver_pool", lambda: pool)
+
+        def run(expected_version: int | None = None) -> List[int | None]:
+            payload = SolveSeatingRequest(time_budget=0.01, apply=True)
+            asyncio.run(
+                models.solve_seating_by_event(
+                    EVENT_ID, payload, USER_ID, _Session([]), expected_version
+                )
+            )
+            return bumped
+
+        yield run
+
+
+def test_applying_checks_the_layout_the_solution_was_computed_for(solve) -> None:
+    # a layout saved while the solver ran makes the bump fail with a 412
+    assert solve() == [7]
+
+
+def test_if_match_is_checked_when_sent(solve) -> None:
+    assert solve(expected_version=5) == [5]
+
+
+def test_missing_seat_rows_are_placed_around_the_table(monkeypatch) -> None:
+    full, short = (
+        Table(id=uuid.uuid4(), event_id=EVENT_ID, shape="round", seats=2, x=0, y=0, width=100, height=100)
+        for _ in range(2)
+    )
+    chairs = [(uuid.uuid4(), full.id), (uuid.uuid4(), full.id), (uuid.uuid4(), short.id)]
+    session = _Session(chairs[:2])
+    regenerated: List[List[uuid.UUID]] = []
+
+    async def regenerate(tables, session_):
+        regenerated.append([table.id for table in tables])
+        session.seats = chairs
+
+    monkeypatch.setattr(models, "regenerate_seats", regenerate)
+    ann, bob, cid = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    seat_of = asyncio.run(
+        models.apply_seating(EVENT_ID, [full, short], {0: [ann, bob], 1: [cid]}, session)
+    )
+
+    assert regenerated == [[short.id]]
+    assert seat_of == {ann: chairs[0][0], bob: chairs[1][0], cid: chairs[2][0]}
+    assert len(session.assigned) == 3
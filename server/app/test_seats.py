@@ -0,0 +1,52 @@
+import uuid
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from .api.v1.events.live import LiveUpdate
+from .api.v1.tables.seats import SEAT_DISTANCE, seat_positions
+from .schemas.request import MAX_TABLE_SEATS, LayoutTableRequest
+
+
+def test_round_table_seats_sit_on_a_circle() -> None:
+    positions = seat_positions(["round"], [100], [100], [100], [80], [8])
+
+    distance = np.hypot(positions.x - 150, positions.y - 140)
+    assert np.allclose(distance, 40 + SEAT_DISTANCE)
+    assert positions.seat_number.tolist() == list(range(1, 9))
+
+
+def test_rectangle_seats_sit_on_the_offset_perimeter() -> None:
+    positions = seat_positions(["rectangle"], [100], [100], [200], [100], [12])
+
+    on_vertical = np.isclose(positions.x, 100 - SEAT_DISTANCE) | np.isclose(
+        positions.x, 300 + SEAT_DISTANCE
+    )
+    on_horizontal = np.isclose(positions.y, 100 - SEAT_DISTANCE) | np.isclose(
+        positions.y, 200 + SEAT_DISTANCE
+    )
+    assert (on_vertical | on_horizontal).all()
+    assert len(set(zip(positions.x.round(3), positions.y.round(3)))) == 12
+
+
+def test_mixed_event_is_grouped_by_table() -> None:
+    positions = seat_positions(
+        ["triangle", "oval", "square", "round"],
+        [0, 300, 600, 900],
+        [0, 0, 0, 0],
+        [100, 150, 100, 100],
+        [100, 60, 100, None],
+        [3, 10, 0, 4],
+    )
+
+    assert np.bincount(positions.table_index, minlength=4).tolist() == [3, 10, 0, 4]
+    assert (positions.x >= 0).all() and (positions.y >= 0).all()
+
+
+def test_seat_counts_are_bounded() -> None:
+    assert LayoutTableRequest(seats=MAX_TABLE_SEATS).seats == MAX_TABLE_SEATS
+    with pytest.raises(ValidationError):
+        LayoutTableRequest(seats=1_000_000_000)
+    with pytest.raises(ValidationError):
+        LiveUpdate.validate_python({"type": "table", "id": uuid.uuid4(), "seats": MAX_TABLE_SEATS + 1})
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from .config.settings import settings
+from .cors import workers
+from .cors.metrics import exposition_registry, registry
+from .cors.workers import WorkerBoard, start_heartbeat, stop_heartbeat
+from .main import app
+from .server import bind_socket, check_workers, reuseport_supported, solver_workers
+
+
+def test_board_reports_heartbeats_of_claimed_slots() -> None:
+    board = WorkerBoard(3)
+    board.claim(1)
+    board.beat()
+
+    rows = board.rows(timeout=30)
+
+    assert [row["slot"] for row in rows] == [1]
+    assert rows[0]["pid"] == os.getpid()
+    assert rows[0]["healthy"]
+
+
+def test_a_worker_without_recent_heartbeat_is_unhealthy() -> None:
+    board = WorkerBoard(1)
+    board.claim(0)
+    assert not board.rows(timeout=30)[0]["healthy"]
+
+    board.beat()
+    time.sleep(0.02)
+
+    assert not board.rows(timeout=0.01)[0]["healthy"]
+
+
+def test_heartbeat_runs_on_the_event_loop() -> None:
+    board = WorkerBoard(1)
+    board.claim(0)
+
+    async def run() -> None:
+        workers.worker_board = board
+        try:
+            task = start_heartbeat(0.01)
+            await asyncio.sleep(0.03)
+            await stop_heartbeat(task)
+        finally:
+            workers.worker_board = None
+
+    asyncio.run(run())
+
+    assert board.heartbeat(0) > 0
+
+
+@pytest.mark.skipif(not reuseport_supported(), reason="needs SO_REUSEPORT")
+def test_workers_can_each_bind_the_same_port() -> None:
+    first = bind_socket("127.0.0.1", 0, 16, reuseport=True)
+    try:
+        port = first.getsockname()[1]
+        second = bind_socket("127.0.0.1", port, 16, reuseport=True)
+        second.close()
+    finally:
+        first.close()
+
+
+def test_without_reuseport_the_port_can_be_bound_once() -> None:
+    first = bind_socket("127.0.0.1", 0, 16, reuseport=False)
+    try:
+        with pytest.raises(OSError):
+            bind_socket("127.0.0.1", first.getsockname()[1], 16, reuseport=False)
+    finally:
+        first.close()
+
+
+def test_workers_endpoint_is_empty_in_a_single_process() -> None:
+    client = TestClient(app)
+
+    response = client.get(settings.api_versions["v1"] + "/monitoring/workers")
+
+    assert response.status_code == 200
+    assert response.json() == {"served_by": os.getpid(), "workers": []}
+
+
+@pytest.mark.parametrize("backend", ["memory", "none"])
+def test_several_workers_need_redis(monkeypatch, backend) -> None:
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_BACKEND", backend)
+    check_workers(1)
+    with pytest.raises(SystemExit):
+        check_workers(4)
+
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_BACKEND", "redis")
+    check_workers(4)
+
+
+def test_workers_share_the_cores_between_solver_pools(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SEATING_SOLVER_WORKERS", None)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    assert solver_workers(4) == 2
+    assert solver_workers(16) == 1
+
+    monkeypatch.setattr(settings, "SEATING_SOLVER_WORKERS", 3)
+    assert solver_workers(4) == 3
+
+
+def test_the_launcher_does_not_import_prometheus_client() -> None:
+    # serve() has to set the metrics directory before that import
+    code = "import sys, app.server; print('prometheus_client' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_a_single_process_exposes_its_own_registry() -> None:
+    assert exposition_registry() is registry
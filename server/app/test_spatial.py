@@ -0,0 +1,120 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from .api.v1.events.live import LiveUpdate
+from .api.v1.tables.spatial import (
+    SpatialGrid,
+    distance_to_outline,
+    find_overlaps,
+    outlines_overlap,
+    table_outline,
+)
+from .config.settings import settings
+from .cors.dependencies.base import CurrentUser, get_current_user, get_read_session
+from .main import app
+from .schemas.request import LayoutTableRequest
+
+
+def test_touching_tables_do_not_overlap() -> None:
+    a = table_outline("rectangle", 0, 0, 100, 50)
+    b = table_outline("rectangle", 100, 0, 100, 50)
+    c = table_outline("round", 190, 0, 50, 50)
+
+    assert not outlines_overlap(a, b)
+    assert outlines_overlap(b, c)
+
+
+def test_round_tables_only_overlap_inside_their_circle() -> None:
+    # the bounding boxes overlap in the corner, the circles do not
+    a = table_outline("round", 0, 0, 100, 100)
+    b = table_outline("round", 80, 80, 100, 100)
+
+    assert not outlines_overlap(a, b)
+
+
+def test_find_overlaps_reports_pairs() -> None:
+    ids = [uuid.uuid4() for _ in range(3)]
+    grid = SpatialGrid(cell_size=100)
+
+    pairs = find_overlaps(
+        grid,
+        [
+            (ids[0], "rectangle", 0, 0, 100, 100),
+            (ids[1], "triangle", 500, 500, 100, 100),
+            (ids[2], "oval", 50, 50, 100, 60),
+        ],
+    )
+
+    assert pairs == [(ids[0], ids[2])]
+    assert len(grid) == 3
+
+
+def test_move_and_queries() -> None:
+    grid = SpatialGrid(cell_size=100)
+    for i in range(20):
+        for j in range(20):
+            grid.insert((i, j), table_outline("round", i * 200, j * 200, 100, 100))
+
+    nearest = grid.nearest(1050, 1050, k=1)
+    assert nearest[0][0] == (5, 5)
+    assert nearest[0][1] == 0.0
+
+    grid.move((5, 5), table_outline("round", 5000, 5000, 100, 100))
+    assert grid.overlapping(table_outline("round", 1000, 1000, 100, 100)) == []
+    assert [key for key, _ in grid.within_radius(5050, 5050, 10)] == [(5, 5)]
+
+
+def test_zero_area_tables_are_not_everywhere() -> None:
+    grid = SpatialGrid(cell_size=100)
+    grid.insert("empty", table_outline("round", 0, 0, 0, 0))
+    grid.insert("real", table_outline("rectangle", 5000, 5000, 100, 100))
+
+    assert grid.nearest(5050, 5050, k=1) == [("real", 0.0)]
+
+    # a zero-height table is a segment, not a line through the room
+    flat = table_outline("rectangle", 0, 0, 100, 0)
+    assert distance_to_outline(flat, 50, 0) == 0.0
+    assert distance_to_outline(flat, 400, 0) == 300.0
+    assert distance_to_outline(flat, 50, 30) == 30.0
+
+
+def test_huge_tables_go_to_the_oversized_bucket() -> None:
+    grid = SpatialGrid(cell_size=100)
+    grid.insert("hall", table_outline("rectangle", 0, 0, 300_000, 300_000))
+    grid.insert("small", table_outline("rectangle", 1000, 1000, 100, 100))
+
+    assert grid._cells.keys() == {(10, 10), (10, 11), (11, 10), (11, 11)}
+    assert grid.overlapping(table_outline("rectangle", 5000, 5000, 50, 50)) == ["hall"]
+    assert sorted(grid.overlapping(table_outline("rectangle", 1050, 1050, 10, 10))) == [
+        "hall",
+        "small",
+    ]
+
+    grid.remove("hall")
+    assert grid.overlapping(table_outline("rectangle", 5000, 5000, 50, 50)) == []
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("nan"), 1e9])
+def test_table_geometry_must_be_finite_and_bounded(value: float) -> None:
+    with pytest.raises(ValidationError):
+        LayoutTableRequest(width=value)
+    with pytest.raises(ValidationError):
+        LiveUpdate.validate_python({"type": "table", "id": uuid.uuid4(), "x": value})
+
+
+@pytest.mark.parametrize(
+    "query", ["x=nan&y=0&radius=10", "x=0&y=0&radius=inf", "x=0&y=-inf&radius=10"]
+)
+def test_nearby_rejects_non_finite_coordinates(query: str) -> None:
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=uuid.uuid4(), firebase_uid="uid", full_name="Ada", email="ada@example.com"
+    )
+    app.dependency_overrides[get_read_session] = lambda: None
+    try:
+        url = f"{settings.api_versions['v1']}/events/{uuid.uuid4()}/tables/nearby?{query}"
+        assert TestClient(app).get(url).status_code == 422
+    finally:
+        app.dependency_overrides.clear()
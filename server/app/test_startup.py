@@ -0,0 +1,81 @@
+"""Startup budget: import time of the app and time to its first response.
+
+Both run in fresh interpreters, best of a few runs. The budgets are
+about 1.5x what a development machine measures; slower CI runners can
+raise them with STARTUP_IMPORT_BUDGET_MS and STARTUP_FIRST_REQUEST_BUDGET_MS.
+"""
+
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+import pytest
+
+SERVER_DIR = pathlib.Path(__file__).resolve().parents[1]
+RUNS = 3
+
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 2000))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", 3000))
+
+# created in the lifespan; importing the app must not load them
+LAZY_MODULES = ("firebase_admin", "google.auth", "asyncpg")
+
+FIRST_REQUEST = """
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+
+with TestClient(app) as client:
+    response = client.get(settings.api_versions["v1"] + "/monitoring/livez")
+    assert response.status_code == 200, response.text
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_time_ms(module: str) -> float:
+    # the last line of -X importtime is the module itself:
+    # "import time: self [us] | cumulative | module"
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in reversed(stderr.splitlines()):
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        if name.strip() == module:
+            return int(cumulative_us) / 1000
+    raise AssertionError(f"{module} missing from the importtime output")
+
+
+def test_importing_the_app_leaves_heavy_clients_alone() -> None:
+    check = "import sys, app.main; print(','.join(m for m in %r if m in sys.modules))"
+    loaded = _python("-c", check % (LAZY_MODULES,)).stdout.strip()
+
+    assert loaded == ""
+
+
+def test_app_import_stays_within_budget() -> None:
+    best = min(_import_time_ms("app.main") for _ in range(RUNS))
+
+    assert best <= IMPORT_BUDGET_MS, f"importing app.main took {best:.0f} ms"
+
+
+def test_first_request_stays_within_budget() -> None:
+    if not (SERVER_DIR / "service-account.json").exists():
+        pytest.skip("the lifespan needs service-account.json")
+
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        _python("-c", FIRST_REQUEST)
+        timings.append((time.perf_counter() - started) * 1000)
+    best = min(timings)
+
+    assert best <= FIRST_REQUEST_BUDGET_MS, f"first response after {best:.0f} ms"
@@ -0,0 +1,32 @@
+"""guest event
+
+Revision ID: 0b0277a296de
+Revises: da3260e62930
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b0277a296de'
+down_revision: Union[str, Sequence[str], None] = 'da3260e62930'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('guests', sa.Column('event_id', sa.Uuid(), nullable=True))
+    op.create_index(op.f('ix_guests_event_id'), 'guests', ['event_id'], unique=False)
+    op.create_foreign_key(None, 'guests', 'events', ['event_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('guests_event_id_fkey', 'guests', type_='foreignkey')
+    op.drop_index(op.f('ix_guests_event_id'), table_name='guests')
+    op.drop_column('guests', 'event_id')
@@ -0,0 +1,38 @@
+"""query indexes
+
+Revision ID: 5c1e8d2f4a7b
+Revises: 0b0277a296de
+Create Date: 2026-10-18 14:02:17.104322
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8d2f4a7b'
+down_revision: Union[str, Sequence[str], None] = '0b0277a296de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_event_associations_event_id', 'user_event_associations', ['event_id'], unique=False)
+    op.create_index('ix_tables_event_id_name', 'tables', ['event_id', 'name', 'id'], unique=False)
+    op.create_index('ix_seats_table_id_seat_number', 'seats', ['table_id', 'seat_number'], unique=False)
+    op.create_index('ix_seats_guest_id', 'seats', ['guest_id'], unique=False)
+    # the composite index also serves plain event_id lookups
+    op.create_index('ix_guests_event_id_created_at', 'guests', ['event_id', 'created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_guests_event_id'), table_name='guests')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_guests_event_id'), 'guests', ['event_id'], unique=False)
+    op.drop_index('ix_guests_event_id_created_at', table_name='guests')
+    op.drop_index('ix_seats_guest_id', table_name='seats')
+    op.drop_index('ix_seats_table_id_seat_number', table_name='seats')
+    op.drop_index('ix_tables_event_id_name', table_name='tables')
+    op.drop_index('ix_user_event_associations_event_id', table_name='user_event_associations')
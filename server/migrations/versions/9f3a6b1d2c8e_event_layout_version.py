@@ -0,0 +1,28 @@
+"""event layout version
+
+Revision ID: 9f3a6b1d2c8e
+Revises: 5c1e8d2f4a7b
+Create Date: 2026-10-18 15:21:09.631457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3a6b1d2c8e'
+down_revision: Union[str, Sequence[str], None] = '5c1e8d2f4a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('layout_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'layout_version')